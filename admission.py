@@ -0,0 +1,290 @@
+# admission.py
+"""Admission control for the expensive POST endpoints (login, signup, registration).
+
+Two layers, applied by the ``@admission.limit(route)`` decorator:
+
+Token buckets
+    Each rule allows ``N`` requests per ``S`` seconds (bursts up to ``N``)
+    per client IP, per user and per route overall. A request over any of
+    its buckets gets an immediate ``429`` with ``Retry-After``. Buckets live
+    in process memory by default. Set ``ADMISSION_STORE_URL=redis://...``
+    (needs the ``redis`` package) to share them across workers and hosts.
+    Any object with ``take(key, rate, burst)`` works as a store.
+
+Concurrency gate
+    At most ``ADMISSION_MAX_INFLIGHT`` limited requests run at once per
+    process; it defaults to a little under ``MYSQL_POOL_MAX_SIZE`` so they
+    can never take every database connection. Up to
+    ``ADMISSION_MAX_QUEUE`` more wait up to ``ADMISSION_QUEUE_TIMEOUT``
+    seconds for a slot. Anything beyond that is shed with a ``503`` instead
+    of piling up behind the pool.
+
+Rules come from ``ADMISSION_RULES``, e.g.
+``auth.login:ip=20/60,user=10/300,route=200/1;register_event:user=5/10``.
+Login attempts count against the email being tried as their "user". The IP
+is ``request.remote_addr``, so behind a proxy wrap the app in Werkzeug's
+``ProxyFix``. Outcomes are exported on ``/metrics``.
+"""
+
+import functools
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, has_app_context, request, Response
+from flask_login import current_user
+
+import metrics
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+DEFAULT_RULES = (
+    'auth.login:ip=20/60,user=10/300,route=200/1;'
+    'auth.signup:ip=5/600,route=20/1;'
+    'register_event:ip=30/60,user=10/60,route=100/1'
+)
+
+# Idle buckets are dropped once the in-memory store holds this many
+MAX_MEMORY_BUCKETS = 100000
+
+# Outcomes counted besides 'served'
+RATE_LIMITED, SHED = 'rate_limited', 'shed'
+
+
+def parse_rules(spec):
+    """``{route: {scope: (rate_per_second, burst)}}`` from an ``ADMISSION_RULES`` string."""
+    rules = {}
+    for part in filter(None, (p.strip() for p in (spec or '').split(';'))):
+        route, _, limits = part.partition(':')
+        scopes = {}
+        for limit in filter(None, (l.strip() for l in limits.split(','))):
+            scope, _, value = limit.partition('=')
+            count, _, seconds = value.partition('/')
+            count, seconds = int(count), float(seconds or 1)
+            scopes[scope.strip()] = (count / seconds, count)
+        rules[route.strip()] = scopes
+    return rules
+
+
+class MemoryStore:
+    """Per-process token buckets."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, rate, burst):
+        """Take one token from ``key``; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                retry_after = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / rate
+            if len(self._buckets) > MAX_MEMORY_BUCKETS:
+                self._prune(now)
+        return retry_after
+
+    def _prune(self, now):
+        # A bucket idle long enough to have refilled is the same as no bucket;
+        # without the rate at hand, a minute idle is a safe stand-in.
+        self._buckets = {key: value for key, value in self._buckets.items() if now - value[1] < 60}
+
+
+class RedisStore:
+    """Token buckets shared through Redis; one atomic script call per check."""
+
+    SCRIPT = """
+        local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(state[1]) or burst
+        local ts = tonumber(state[2]) or now
+        tokens = math.min(burst, tokens + (now - ts) * rate)
+        local retry = 0
+        if tokens >= 1 then tokens = tokens - 1 else retry = (1 - tokens) / rate end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+        return tostring(retry)
+    """
+
+    def __init__(self, url, logger=None):
+        if redis is None:
+            raise RuntimeError("ADMISSION_STORE_URL points at Redis but the redis package is not installed")
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.logger = logger
+
+    def take(self, key, rate, burst):
+        try:
+            return float(self.script(keys=[f'admission:{key}'], args=[rate, burst]))
+        except redis.RedisError as e:
+            # Fail open: an unreachable limiter must not take the site down
+            if self.logger:
+                self.logger.warning("Rate limit store unavailable: %s", e)
+            return 0
+
+
+class ConcurrencyGate:
+    """Bounded in-flight slots with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_inflight, max_queue, queue_timeout):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self.inflight = 0
+        self.queued = 0
+
+    def enter(self):
+        """Claim a slot; False means the request should be shed."""
+        with self._cond:
+            if self.inflight < self.max_inflight:
+                self.inflight += 1
+                return True
+            if self.queued >= self.max_queue:
+                return False
+            self.queued += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self.inflight >= self.max_inflight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        if self.inflight >= self.max_inflight:
+                            return False
+                self.inflight += 1
+                return True
+            finally:
+                self.queued -= 1
+
+    def leave(self):
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify()
+
+
+class AppAdmission:
+    """One app's rules, bucket store, gate and outcome counts, kept in ``app.extensions['admission']``."""
+
+    def __init__(self, enabled, rules, store, gate):
+        self.enabled = enabled
+        self.rules = rules
+        self.store = store
+        self.gate = gate
+        self.counts = Counter()
+        self._counts_lock = threading.Lock()
+
+    def check_buckets(self, route):
+        """Seconds until the request would be allowed, or 0 if it is."""
+        wait = 0
+        for scope, (rate, burst) in self.rules.get(route, {}).items():
+            identity = _identity(scope)
+            if identity is None:
+                continue
+            wait = max(wait, self.store.take(f"{route}:{scope}:{identity}", rate, burst))
+        return wait
+
+    def count(self, route, outcome):
+        with self._counts_lock:
+            self.counts[(route, outcome)] += 1
+
+    def snapshot(self):
+        with self._counts_lock:
+            return list(self.counts.items())
+
+
+class Admission:
+    """The ``admission`` extension; each app it is initialized on gets its own ``AppAdmission``."""
+
+    def __init__(self):
+        # Registered here rather than in init_app() so a second app can't list it twice
+        metrics.register(self.collect)
+
+    def init_app(self, app):
+        config = app.config
+        store = MemoryStore()
+        if config.get('ADMISSION_STORE_URL'):
+            store = RedisStore(config['ADMISSION_STORE_URL'], app.logger)
+
+        pool_size = config.get('MYSQL_POOL_MAX_SIZE', 10)
+        max_inflight = config.get('ADMISSION_MAX_INFLIGHT') or max(1, pool_size - 2)
+        gate = ConcurrencyGate(max_inflight,
+                               config.get('ADMISSION_MAX_QUEUE', 2 * max_inflight),
+                               config.get('ADMISSION_QUEUE_TIMEOUT', 0.5))
+        app.extensions['admission'] = AppAdmission(
+            config.get('ADMISSION_ENABLED', True),
+            parse_rules(config.get('ADMISSION_RULES') or DEFAULT_RULES),
+            store,
+            gate,
+        )
+
+    def limit(self, route):
+        """Apply ``route``'s rules and the concurrency gate to POSTs of a view."""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                state = current_app.extensions.get('admission')
+                if state is None or not state.enabled or request.method != 'POST':
+                    return view(*args, **kwargs)
+
+                retry_after = state.check_buckets(route)
+                if retry_after:
+                    state.count(route, RATE_LIMITED)
+                    return _reject(429, "Too many requests. Please slow down.", retry_after)
+
+                if not state.gate.enter():
+                    state.count(route, SHED)
+                    return _reject(503, "The site is busy right now. Please try again in a moment.", 1)
+                try:
+                    state.count(route, 'served')
+                    return view(*args, **kwargs)
+                finally:
+                    state.gate.leave()
+            return wrapper
+        return decorator
+
+    def collect(self):
+        state = current_app.extensions.get('admission') if has_app_context() else None
+        if state is None:
+            return []
+        counts = state.snapshot()
+        return [
+            ('eventease_admission_requests_total', 'counter', 'Limited requests by outcome',
+             [({'route': route, 'outcome': outcome}, value) for (route, outcome), value in counts]),
+            ('eventease_admission_inflight', 'gauge', 'Limited requests running',
+             [({}, state.gate.inflight)]),
+            ('eventease_admission_queued', 'gauge', 'Limited requests waiting for a slot',
+             [({}, state.gate.queued)]),
+        ]
+
+
+def _identity(scope):
+    if scope == 'ip':
+        return request.remote_addr or 'unknown'
+    if scope == 'route':
+        return '*'
+    if scope == 'user':
+        if current_user.is_authenticated:
+            return f"id:{current_user.get_id()}"
+        # Login attempts count against the account being tried
+        email = (request.form.get('email') or '').strip().lower()
+        return f"email:{email}" if email else None
+    current_app.logger.warning("Unknown admission scope %r", scope)
+    return None
+
+
+def _reject(status, message, retry_after):
+    response = Response(message, status=status, mimetype='text/plain')
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+admission = Admission()
@@ -1,70 +1,265 @@
 # app.py
-
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from flask_login import LoginManager, login_required, current_user
+#
+# Build the app with create_app(). It only wires configuration, extensions and
+# routes: nothing connects to MySQL, starts a thread or imports the mail stack
+# until it is first used, so it is cheap to run in a preloading master
+#
+#     gunicorn -w 4 --preload 'app:create_app()'
+#
+# and every forked worker starts with its own empty connection pools.
+
+from flask import Flask, abort, current_app, render_template, request, redirect, url_for, flash
+from flask.cli import with_appcontext
+from flask_login import login_required, current_user
 import MySQLdb.cursors
-from config import config
+from MySQLdb.cursors import DictCursor
+import config
 from extensions import mysql, login_manager
-from auth_routes import auth, User
-from werkzeug.security import generate_password_hash
-from werkzeug.security import check_password_hash
-from flask_paginate import Pagination, get_page_parameter
-from flask import Response
-import csv
-from io import StringIO
+from event_cache import event_catalog, decode_cursor
+from reservations import reserve_seat, release_seat, RESERVED, ALREADY_REGISTERED, EVENT_NOT_FOUND
+import outbox
+import bulk
+import event_stats
+import images
+import search
+import waitlist
+import timeline
+import export_jobs
+import archive
+from registration_query import REGISTRATIONS_FROM, registration_filters
+from count_cache import registration_counts
+from user_cache import user_cache, identity_from_session, remember_identity
+from sql_profiler import profiler
+from passwords import hasher
+from admission import admission
+from response_cache import auth_state, cached_fragment, conditional_page, content_digest
+import metrics
+from auth_routes import auth
+from flask import Response, jsonify
 from user import User
 import os
-from werkzeug.utils import secure_filename
-from flask_mysqldb import MySQL
+import time
+import click
+
+
+class Routes:
+    """URL rules and CLI commands declared at import time, added to each app by ``create_app()``."""
+
+    def __init__(self):
+        self._rules = []
+        self._commands = []
+
+    def route(self, rule, **options):
+        def decorator(view):
+            self._rules.append((rule, view, options))
+            return view
+        return decorator
 
+    def command(self, name):
+        def decorator(fn):
+            command = click.command(name)(with_appcontext(fn))
+            self._commands.append(command)
+            return command
+        return decorator
 
-from flask_mail import Mail, Message
+    def init_app(self, app):
+        for rule, view, options in self._rules:
+            app.add_url_rule(rule, view_func=view, **options)
+        for command in self._commands:
+            app.cli.add_command(command)
 
 
+routes = Routes()
 
-app = Flask(__name__)
-app.config.from_object(config)
 
-# Initialize extensions
-mysql.init_app(app)
-login_manager.init_app(app)
-login_manager.login_view = 'auth.login'
+def create_app(config_object=config):
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+
+    # Add email configuration to app config
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')  # Use your email provider's SMTP server
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))  # Use port 587 for secure TLS
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '1') == '1'  # Use TLS (Transport Layer Security)
+    app.config['MAIL_USERNAME'] = 'pavithrareddy043@gmail.com'  # Replace with your email
+    app.config['MAIL_PASSWORD'] = 'rlqz claz ttab lwef'  # Replace with your email password or app password
+    app.config['MAIL_DEFAULT_SENDER'] = 'your-email@gmail.com'  # Default sender email address
+
+    # Initialize extensions
+    mysql.init_app(app)
+    profiler.init_app(app)
+    hasher.init_app(app)
+    admission.init_app(app)
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+
+    # Register Blueprint and routes
+    app.register_blueprint(auth, url_prefix='/auth')
+    routes.init_app(app)
+
+    app.jinja_env.globals['event_image'] = images.event_image
+    return app
 
-# Register Blueprint
-app.register_blueprint(auth, url_prefix='/auth')
 
 @login_manager.user_loader
 def load_user(user_id):
-    cur = mysql.connection.cursor(MySQLdb.cursors.DictCursor)
-    cur.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+    # Signed-session mode: the identity rides along in the cookie
+    user = identity_from_session(user_id) or user_cache.get(user_id)
+    if user:
+        return user
+
+    cur = mysql.read_connection.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute("SELECT id, username, email, role FROM users WHERE id = %s", (user_id,))
     row = cur.fetchone()
     cur.close()
 
     if row:
         # ✅ Instantiate with role for admin detection
-        return User(id=row['id'], username=row['username'], email=row['email'], role=row['role'])
+        user = User(id=row['id'], username=row['username'], email=row['email'], role=row['role'])
+        user_cache.put(user)
+        return user
     return None
 
-@app.route('/', methods=['GET', 'POST'])
+@routes.route('/', methods=['GET', 'POST'])
+@admission.limit('register_event')  # the POST reserves a seat; GETs pass straight through
 def home():
-    cur = mysql.connection.cursor(MySQLdb.cursors.DictCursor)  # ← make cursor return dictionaries
-    cur.execute("SELECT * FROM events")
-    events = cur.fetchall()
-
     if request.method == 'POST' and current_user.is_authenticated and not current_user.is_admin:
         event_id = request.form['event_id']
         user_id = current_user.id
 
-        cur.execute("INSERT INTO registrations (user_id, event_id) VALUES (%s, %s)", (user_id, event_id))
-        mysql.connection.commit()
-        flash('You have successfully registered for the event!')
+        result = reserve_seat(mysql.connection, user_id, event_id)
+        if result == RESERVED:
+            mysql.connection.commit()
+            flash('You have successfully registered for the event!')
+        elif result == ALREADY_REGISTERED:
+            flash("You are already registered for this event!", "warning")
+        elif result == EVENT_NOT_FOUND:
+            flash("That event no longer exists.", "warning")
+        else:
+            join_waitlist(user_id, event_id)
 
         return redirect(url_for('home'))
 
-    return render_template('home.html', events=events)
+    query = (request.args.get('q') or '').strip()
+    if query:
+        return search_results(query)
+
+    # Served from the catalog cache; keyset-paginated on (date, id)
+    cursor = decode_cursor(request.args.get('after'))
+    state = auth_state()
+    grid = cached_fragment(('home', state, cursor), lambda: render_home_grid(cursor))
+    next_cursor, has_events = grid.extra
+
+    parts = ('home', state, current_user.get_id(), getattr(current_user, 'username', None), cursor, grid.digest)
+    return conditional_page(parts, lambda: render_template(
+        'home.html', event_grid=grid.html, has_events=has_events,
+        next_cursor=next_cursor, paged=cursor is not None))
+
+
+def render_home_grid(cursor):
+    events, next_cursor = event_catalog.page(cursor)
+    return render_template('_event_grid.html', events=events), (next_cursor, bool(events))
+
 
+def search_results(query):
+    """Home page search: ranked, page-numbered results rendered with the same card grid."""
+    page = max(1, min(request.args.get('page', 1, type=int), search.MAX_SEARCH_PAGE))
+    state = auth_state()
 
-@app.route('/test-db')
+    def build():
+        events, has_more = search.search_events(query, page)
+        return render_template('_event_grid.html', events=events), (has_more, bool(events))
+
+    # Search pages have their own cache, so arbitrary queries can't evict the catalog
+    grid = cached_fragment(search.results_key('home_search', state, ' '.join(search.words(query)), page), build,
+                           cache=search.results_cache)
+    has_more, has_events = grid.extra
+
+    parts = ('home_search', state, current_user.get_id(), getattr(current_user, 'username', None), grid.digest)
+    return conditional_page(parts, lambda: render_template(
+        'home.html', event_grid=grid.html, has_events=has_events, query=query, page=page,
+        next_page=page + 1 if has_more else None, prev_page=page - 1 if page > 1 else None))
+
+
+def admin_event_list():
+    """The admin event list, rendered once per catalog generation."""
+    def build():
+        cur = mysql.read_connection.cursor()
+        cur.execute("SELECT * FROM events ORDER BY date ASC")
+        raw_events = cur.fetchall()
+        cur.close()
+
+        # Convert each tuple to a dictionary
+        events = [
+            {
+                'id': e[0],
+                'title': e[1],
+                'date': e[2],
+                'location': e[3],
+                'description': e[4]
+            }
+            for e in raw_events
+        ]
+        return render_template('_admin_event_list.html', events=events), None
+
+    return cached_fragment(('admin_events',), build)
+
+
+def render_admin_dashboard():
+    """Event list from the fragment cache; counts and the first pending registrations from the event counters."""
+    event_list = admin_event_list()
+    stats = event_stats.summary(mysql.read_connection)
+    pending_regs = event_stats.top_pending(mysql.read_connection, current_app.config.get('ADMIN_PENDING_LIMIT', 20))
+    parts = ('admin_dashboard', current_user.get_id(), current_user.username, event_list.digest,
+             content_digest((stats, pending_regs)))
+    return conditional_page(parts, lambda: render_template('admin_dashboard.html', event_list=event_list.html,
+                                                           stats=stats, pending_regs=pending_regs))
+
+
+@routes.route('/search/suggest')
+def search_suggest():
+    # ?scope=events|users&q=<prefix>; registrant names are for admins only
+    scope = request.args.get('scope', 'events')
+    if scope == 'users':
+        if not (current_user.is_authenticated and current_user.is_admin):
+            # Called by fetch() on every keystroke: no flash, no redirect to a page
+            abort(403)
+        index = search.users_index
+    else:
+        index = search.events_index
+    limit = min(request.args.get('limit', 10, type=int), 25)
+    return jsonify(index.suggest(request.args.get('q', ''), limit))
+
+
+@routes.route('/media/events/<path:filename>')
+def event_media(filename):
+    # Content-hashed names, so clients may cache them forever
+    return images.serve(filename)
+
+
+@routes.route('/admin/db-pool')
+@login_required
+def db_pool_stats():
+    if not current_user.is_admin:
+        flash("Access denied.")
+        return redirect(url_for('home'))
+    return jsonify(mysql.stats())
+
+
+@routes.route('/admin/sql-stats')
+@login_required
+def sql_stats():
+    if not current_user.is_admin:
+        flash("Access denied.")
+        return redirect(url_for('home'))
+    return jsonify(profiler.snapshot())
+
+
+@routes.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@routes.route('/test-db')
 def test_db():
     cur = mysql.connection.cursor()
     cur.execute("SELECT * FROM events")
@@ -72,46 +267,52 @@ def test_db():
     return str(data)
 
 
-@app.route('/admin/dashboard', methods=['GET', 'POST'])
+@routes.route('/admin/dashboard', methods=['GET', 'POST'])
 @login_required
 def admin_dashboard():
     if not current_user.is_admin:
         flash("Access denied.")
         return redirect(url_for('home'))
 
-    cur = mysql.connection.cursor()
-
     if request.method == 'POST':
         title = request.form['title']
         date = request.form['date']
         location = request.form['location']
         description = request.form['description']
+        cur = mysql.connection.cursor()
         cur.execute("INSERT INTO events (title, date, location, description) VALUES (%s, %s, %s, %s)",
                     (title, date, location, description))
         mysql.connection.commit()
+        event_catalog.invalidate()
+        search.events_index.put(cur.lastrowid, title, location)
         flash('Event added successfully!')
         return redirect(url_for('admin_dashboard'))
 
-    cur.execute("SELECT * FROM events ORDER BY date ASC")
-    raw_events = cur.fetchall()
+    return render_admin_dashboard()
+
+
+def join_waitlist(user_id, event_id, name=None, email=None, phone=None):
+    """Queue the user for a full event and flash what happened."""
+    outcome = waitlist.join(mysql.connection, user_id, event_id, name, email, phone)
+    if outcome == waitlist.PROMOTED:
+        flash("A seat just opened up and it's yours! A confirmation email is on its way.", "success")
+    elif outcome == waitlist.ALREADY_WAITLISTED:
+        flash("This event is full and you're already on its waitlist.", "info")
+    else:
+        flash("This event is full, so you've been added to the waitlist. "
+              "We'll email you as soon as a seat opens up.", "info")
 
-    # Convert each tuple to a dictionary
-    events = [
-        {
-            'id': e[0],
-            'title': e[1],
-            'date': e[2],
-            'location': e[3],
-            'description': e[4]
-        }
-        for e in raw_events
-    ]
 
-    return render_template('admin_dashboard.html', events=events)
+def promote_waitlist(event_id):
+    """Hand seats freed on ``event_id`` to its waitlist, if anyone is waiting."""
+    promoted = waitlist.promote(mysql.connection, event_id, current_app.config.get('WAITLIST_PROMOTE_BATCH_SIZE', 100))
+    if promoted:
+        flash(f"{len(promoted)} waitlisted user(s) promoted into the freed seats.", "info")
 
 
-@app.route('/register_event/<int:event_id>', methods=['GET', 'POST'])
+@routes.route('/register_event/<int:event_id>', methods=['GET', 'POST'])
 @login_required
+@admission.limit('register_event')
 def register_event(event_id):
     user_id = current_user.id
 
@@ -129,36 +330,23 @@ def register_event(event_id):
             flash("Invalid phone number. Please enter a 10-digit number.", "danger")
             return redirect(url_for('register_event', event_id=event_id))
 
-        cur = mysql.connection.cursor(MySQLdb.cursors.DictCursor)
+        # 🎟️ Duplicate check, capacity check and insert in one transaction
+        result = reserve_seat(mysql.connection, user_id, event_id, name, email, phone)
 
-        # 🔄 Prevent duplicate registration
-        cur.execute("SELECT * FROM registrations WHERE user_id = %s AND event_id = %s", (user_id, event_id))
-        if cur.fetchone():
+        if result == ALREADY_REGISTERED:
             flash("You are already registered for this event!", "warning")
             return redirect(url_for('dashboard'))
 
-        # 🎟️ Check event capacity
-        cur.execute("""
-            SELECT capacity, 
-                   (SELECT COUNT(*) FROM registrations WHERE event_id = %s) AS registered_count 
-            FROM events WHERE id = %s
-        """, (event_id, event_id))
-        event_data = cur.fetchone()
-
-        if event_data['registered_count'] >= event_data['capacity']:
-            flash("Event is full! You cannot register.", "danger")
+        if result == EVENT_NOT_FOUND:
+            flash("That event no longer exists.", "warning")
             return redirect(url_for('home'))
 
-        # ✅ Proceed with registration
-        cur.execute("""
-            INSERT INTO registrations (user_id, event_id, name, email, phone)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (user_id, event_id, name, email, phone))
-        mysql.connection.commit()
+        if result != RESERVED:
+            join_waitlist(user_id, event_id, name, email, phone)
+            return redirect(url_for('dashboard'))
 
-        # 📧 Send confirmation email
-        msg = Message('Event Registration Confirmation', recipients=[email])
-        msg.body = f"""
+        # 📧 Queue confirmation email; it commits together with the registration
+        body = f"""
             Hello {name},
 
             You have successfully registered for the event!
@@ -169,21 +357,17 @@ def register_event(event_id):
             Best regards,
             EventEase Team
         """
-        try:
-            mail.send(msg)
-            flash("Registration successful! A confirmation email has been sent.", "success")
-        except Exception as e:
-            flash("Registration successful, but email sending failed.", "warning")
-            print(e)
+        outbox.enqueue(mysql.connection, email, 'Event Registration Confirmation', body)
+        mysql.connection.commit()
+
+        flash("Registration successful! A confirmation email is on its way.", "success")
 
         return redirect(url_for('dashboard'))
 
     # GET request – show the registration form
     return render_template('register_event.html', event_id=event_id)
 
-from MySQLdb.cursors import DictCursor
-
-@app.route('/admin/edit/<int:event_id>', methods=['GET', 'POST'])
+@routes.route('/admin/edit/<int:event_id>', methods=['GET', 'POST'])
 @login_required
 def edit_event(event_id):
     if not current_user.is_admin:
@@ -207,18 +391,32 @@ def edit_event(event_id):
         date = request.form['date']
         location = request.form['location']
         description = request.form['description']
+        capacity = request.form.get('capacity', '').strip()
+        if capacity and not capacity.isdigit():
+            flash("Capacity must be a whole number.", "danger")
+            return redirect(url_for('edit_event', event_id=event_id))
+        # Blank means unlimited
+        capacity = int(capacity) if capacity else None
+
+        # Keep the existing image unless a new one was uploaded
+        try:
+            image_filename = images.save_upload(request.files.get('image')) or event['image_path']
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for('edit_event', event_id=event_id))
 
-        # Keep the existing image (no changes to image)
-        image_filename = event['image_path']
-
-        # Update event details in the database (excluding image update)
         cur.execute("""
             UPDATE events 
-            SET title=%s, date=%s, location=%s, description=%s 
+            SET title=%s, date=%s, location=%s, description=%s, image_path=%s, capacity=%s
             WHERE id=%s
-        """, (title, date, location, description, event_id))
+        """, (title, date, location, description, image_filename, capacity, event_id))
+        timeline.event_changed(cur, event_id, title, date, location)
         mysql.connection.commit()
-        
+        event_catalog.invalidate()
+        search.events_index.put(event_id, title, location)
+        if event['capacity'] is not None and (capacity is None or capacity > event['capacity']):
+            promote_waitlist(event_id)
+
         flash('Event updated successfully!')
         return redirect(url_for('admin_dashboard'))
 
@@ -227,7 +425,7 @@ def edit_event(event_id):
 
 
 
-@app.route('/admin/delete/<int:event_id>', methods=['POST'])
+@routes.route('/admin/delete/<int:event_id>', methods=['POST'])
 @login_required
 def delete_event(event_id):
     if not current_user.is_admin:
@@ -237,10 +435,14 @@ def delete_event(event_id):
     cur = mysql.connection.cursor()
     cur.execute("DELETE FROM events WHERE id = %s", (event_id,))
     mysql.connection.commit()
+    event_catalog.invalidate()
+    # Its registrations left their users' timelines through the foreign keys
+    timeline.feed_validators.clear()
+    search.events_index.discard(event_id)
     flash('Event deleted successfully!')
     return redirect(url_for('admin_dashboard'))
 
-@app.route('/admin/add', methods=['GET', 'POST'])
+@routes.route('/admin/add', methods=['GET', 'POST'])
 @login_required
 def add_event():
     if not current_user.is_admin:
@@ -252,30 +454,63 @@ def add_event():
         date = request.form['date']
         location = request.form['location']
         description = request.form['description']
+        try:
+            image_filename = images.save_upload(request.files.get('image'))
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for('add_event'))
 
         cur = mysql.connection.cursor()
-        cur.execute("INSERT INTO events (title, date, location, description) VALUES (%s, %s, %s, %s)",
-                    (title, date, location, description))
+        cur.execute("INSERT INTO events (title, date, location, description, image_path) VALUES (%s, %s, %s, %s, %s)",
+                    (title, date, location, description, image_filename))
         mysql.connection.commit()
+        event_catalog.invalidate()
+        search.events_index.put(cur.lastrowid, title, location)
         flash("Event added successfully!", "success")
         return redirect(url_for('admin_dashboard'))
 
     return render_template('add_event.html')
 
-@app.route('/profile', methods=['GET', 'POST'])
+@routes.route('/admin/events/import', methods=['GET', 'POST'])
 @login_required
-def profile():
-    cur = mysql.connection.cursor()
+def import_events():
+    if not current_user.is_admin:
+        flash("Access denied", "danger")
+        return redirect(url_for('home'))
 
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash("Choose a file to import.", "danger")
+            return redirect(url_for('import_events'))
+        try:
+            report = bulk.import_events(mysql.connection, bulk.iter_event_rows(upload.stream, upload.filename))
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for('import_events'))
+        if report['imported']:
+            event_catalog.invalidate()
+            search.events_index.reset()
+        flash(f"Imported {report['imported']} events, rejected {report['rejected']}.",
+              "success" if not report['rejected'] else "warning")
+
+    return render_template('import_events.html', report=report)
+
+
+@routes.route('/profile', methods=['GET', 'POST'])
+@login_required
+def profile():
     if request.method == 'POST':
         name = request.form['name']
         email = request.form['email']
         password = request.form['password']
+        cur = mysql.connection.cursor()
 
         # Update the user info in the database
         if password:
             # Hash the new password
-            hashed_password = generate_password_hash(password, method='sha256')
+            hashed_password = hasher.hash(password)
             cur.execute("""
                 UPDATE users SET name = %s, email = %s, password = %s WHERE id = %s
             """, (name, email, hashed_password, current_user.id))
@@ -285,15 +520,18 @@ def profile():
             """, (name, email, current_user.id))
         
         mysql.connection.commit()
+        user_cache.invalidate(current_user.id)
+        remember_identity(current_user.id, current_user.username, email, current_user.role)
         flash('Profile updated successfully!')
         return redirect(url_for('profile'))
 
     # Retrieve current user data
+    cur = mysql.read_connection.cursor()
     cur.execute("SELECT * FROM users WHERE id = %s", (current_user.id,))
     user = cur.fetchone()
     return render_template('profile.html', user=user)
 
-@app.route('/registrations', methods=['GET'])
+@routes.route('/registrations', methods=['GET'])
 @login_required
 def registrations():
     event_id = request.args.get('event_id', type=int)
@@ -301,14 +539,21 @@ def registrations():
     search = request.args.get('search', type=str)
     export = request.args.get('export', type=str)
 
-    page = request.args.get(get_page_parameter(), type=int, default=1)
-    per_page = 5
-    offset = (page - 1) * per_page
+    # Exports cover every matching row, not just the current page, so they run as a background job
+    if export in ('csv', 'jsonl'):
+        return queue_export(export_jobs.export_params(event_id, status, search, export,
+                                                      request.args.get('gzip') == '1'))
 
-    search_param = f"%{search}%" if search else None
-    query_params = (event_id, event_id, status, status, search, search_param, per_page, offset)
+    # Keyset pagination on registrations.id (newest first)
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
+    per_page = 5
 
-    query = """
+    where, params = registration_filters(event_id, status, search, before_id=before,
+                                         after_id=None if before is not None else after)
+    # Walking back towards newer rows reads ascending, then flips
+    newer_first = after is None or before is not None
+    query = f"""
         SELECT 
             registrations.id,
             users.username AS user_name,
@@ -316,69 +561,72 @@ def registrations():
             registrations.phone AS user_phone,
             events.title AS event_title,
             registrations.status
-        FROM registrations
-        JOIN users ON registrations.user_id = users.id
-        JOIN events ON registrations.event_id = events.id
-        WHERE (%s IS NULL OR registrations.event_id = %s)
-        AND (%s IS NULL OR registrations.status = %s)
-        AND (%s IS NULL OR users.username LIKE %s)
-        ORDER BY registrations.id DESC
-        LIMIT %s OFFSET %s
-    """
-
-    cur = mysql.connection.cursor(MySQLdb.cursors.DictCursor)
-    cur.execute(query, query_params)
-    registrations = cur.fetchall()
-
-    # Total count for pagination
-    count_query = """
-        SELECT COUNT(*) as total
-        FROM registrations
-        JOIN users ON registrations.user_id = users.id
-        JOIN events ON registrations.event_id = events.id
-        WHERE (%s IS NULL OR registrations.event_id = %s)
-        AND (%s IS NULL OR registrations.status = %s)
-        AND (%s IS NULL OR users.username LIKE %s)
+        {REGISTRATIONS_FROM}
+        {where}
+        ORDER BY registrations.id {'DESC' if newer_first else 'ASC'}
+        LIMIT %s
     """
-    count_params = (event_id, event_id, status, status, search, search_param)
-    cur.execute(count_query, count_params)
-    total = cur.fetchone()['total']
 
-    # Event list for filter dropdown
-    cur.execute("SELECT id, title FROM events")
-    events = cur.fetchall()
+    cur = mysql.read_connection.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(query, (*params, per_page + 1))
+    rows = cur.fetchall()
     cur.close()
 
-    # CSV Export logic
-    if export == 'csv':
-        si = StringIO()
-        csv_writer = csv.writer(si)
-        csv_writer.writerow(['ID', 'User', 'Email', 'Phone', 'Event', 'Status'])
-        for reg in registrations:
-            csv_writer.writerow([reg['id'], reg['user_name'], reg['user_email'], reg['user_phone'], reg['event_title'], reg['status']])
-        output = si.getvalue()
-        return Response(output, mimetype='text/csv', headers={"Content-Disposition": "attachment;filename=registrations.csv"})
+    has_more = len(rows) > per_page
+    registrations = list(rows[:per_page])
+    if newer_first:
+        has_newer, has_older = before is not None, has_more
+    else:
+        registrations.reverse()
+        has_newer, has_older = has_more, True
+
+    # Unsearched totals are maintained on the events rows; anything else
+    # comes from the background-refreshed count cache
+    if not search and (not status or event_stats.counter_column(status)):
+        total = event_stats.count(mysql.read_connection, event_id, status)
+    else:
+        total = registration_counts.get((event_id, status, search),
+                                        lambda: count_registrations(event_id, status, search))
+
+    # Event list for filter dropdown
+    events = event_catalog.choices()
 
-    pagination = Pagination(page=page, total=total, per_page=per_page, css_framework='bootstrap4')
+    newer_url = older_url = None
+    filters = dict(event_id=event_id, status=status, search=search)
+    if registrations and has_newer:
+        newer_url = url_for('registrations', after=registrations[0]['id'], **filters)
+    if registrations and has_older:
+        older_url = url_for('registrations', before=registrations[-1]['id'], **filters)
 
     return render_template('registrations.html', registrations=registrations, events=events,
-                           pagination=pagination, event_id=event_id, status=status, search=search)
+                           total=total, newer_url=newer_url, older_url=older_url,
+                           event_id=event_id, status=status, search=search)
 
 
-@app.route('/admin/delete_registration/<int:reg_id>', methods=['POST'])
+def count_registrations(event_id, status, search):
+    where, params = registration_filters(event_id, status, search)
+    cur = mysql.read_connection.cursor()
+    cur.execute(f"SELECT COUNT(*) {REGISTRATIONS_FROM} {where}", params)
+    total = cur.fetchone()[0]
+    cur.close()
+    return total
+
+
+@routes.route('/admin/delete_registration/<int:reg_id>', methods=['POST'])
 @login_required
 def delete_registration(reg_id):
     if not current_user.is_admin:
         flash("Access denied.")
         return redirect(url_for('home'))
 
-    cur = mysql.connection.cursor()
-    cur.execute("DELETE FROM registrations WHERE id = %s", (reg_id,))
+    event_id = release_seat(mysql.connection, reg_id)
     mysql.connection.commit()
+    if event_id is not None:
+        promote_waitlist(event_id)
     flash('Registration deleted successfully!')
     return redirect(url_for('registrations'))
 
-@app.route('/admin/approve_registration/<int:reg_id>', methods=['GET'])
+@routes.route('/admin/approve_registration/<int:reg_id>', methods=['GET'])
 @login_required
 def approve_registration(reg_id):
     if not current_user.is_admin:
@@ -387,114 +635,317 @@ def approve_registration(reg_id):
 
     cur = mysql.connection.cursor(MySQLdb.cursors.DictCursor)
 
-    cur.execute("UPDATE registrations SET status = 'Approved' WHERE id = %s", (reg_id,))
-    mysql.connection.commit()
-    flash('Registration approved!')
+    # Event row first, then the registration, like every other writer (see reservations.py)
+    cur.execute("""
+        SELECT events.id FROM registrations JOIN events ON events.id = registrations.event_id
+        WHERE registrations.id = %s
+        FOR UPDATE OF events
+    """, (reg_id,))
+    cur.execute("SELECT event_id, status FROM registrations WHERE id = %s FOR UPDATE", (reg_id,))
+    reg = cur.fetchone()
+    if reg and reg['status'] != 'Approved':
+        cur.execute("UPDATE registrations SET status = 'Approved' WHERE id = %s", (reg_id,))
+        event_stats.status_changed(cur, reg['event_id'], reg['status'], 'Approved')
+        timeline.status_changed(cur, [reg_id], 'Approved')
 
     # Get user email for the approved registration
     cur.execute("SELECT users.email, users.username, events.title FROM registrations JOIN users ON registrations.user_id = users.id JOIN events ON registrations.event_id = events.id WHERE registrations.id = %s", (reg_id,))
     reg_data = cur.fetchone()
 
     if reg_data:
-        # Send Approval Email
-        msg = Message('Event Registration Approved',
-                      recipients=[reg_data['email']])  # Send to user's email
-        msg.body = f"Hello {reg_data['username']},\n\nYour registration for the event '{reg_data['title']}' has been approved.\n\nThank you!"
-        try:
-            mail.send(msg)
-            flash("Approval email sent successfully.", "success")
-        except Exception as e:
-            flash("Error sending approval email.", "danger")
-            print(e)
+        # Queue Approval Email in the same transaction as the status change
+        body = f"Hello {reg_data['username']},\n\nYour registration for the event '{reg_data['title']}' has been approved.\n\nThank you!"
+        outbox.enqueue(mysql.connection, reg_data['email'], 'Event Registration Approved', body)
+
+    mysql.connection.commit()
+    flash('Registration approved!')
+    if reg_data:
+        flash("Approval email queued.", "success")
 
     return redirect(url_for('registrations'))
 
 
-@app.route('/export_registrations')
+@routes.route('/admin/registrations/bulk', methods=['POST'])
+@login_required
+def bulk_registrations():
+    if not current_user.is_admin:
+        flash("Access denied.")
+        return redirect(url_for('home'))
+
+    reg_ids = sorted({int(reg_id) for reg_id in request.form.getlist('reg_ids') if reg_id.isdigit()})
+    action = request.form.get('action')
+    if not reg_ids:
+        flash("No registrations selected.", "warning")
+    elif action == 'approve':
+        approved = bulk.approve_registrations(mysql.connection, reg_ids)
+        flash(f"Approved {approved} registrations; approval emails queued.", "success")
+    elif action == 'delete':
+        released = bulk.delete_registrations(mysql.connection, reg_ids)
+        for event_id in released:
+            promote_waitlist(event_id)
+        flash(f"Deleted {sum(released.values())} registrations.", "success")
+    else:
+        flash("Unknown bulk action.", "danger")
+
+    return redirect(request.referrer or url_for('registrations'))
+
+
+@routes.route('/export_registrations')
 @login_required
 def export_registrations():
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT 
-            users.username, users.email, users.phone,
-            events.title, registrations.status 
-        FROM registrations 
-        JOIN users ON registrations.user_id = users.id 
-        JOIN events ON registrations.event_id = events.id 
+    # ?format=csv|jsonl&gzip=1, filtered like /registrations
+    return queue_export(export_jobs.export_params(
+        event_id=request.args.get('event_id', type=int),
+        status=request.args.get('status', type=str),
+        search=request.args.get('search', type=str),
+        fmt=request.args.get('format', 'csv'),
+        compress=request.args.get('gzip') == '1',
+    ))
+
+
+def queue_export(params):
+    """Queue an export (or join the identical one in flight) and go to the exports page."""
+    if not current_user.is_admin:
+        flash("Access denied.")
+        return redirect(url_for('home'))
+
+    try:
+        job_id, created = export_jobs.submit(mysql.connection, current_user.id, params)
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for('export_list'))
+    if created:
+        flash(f"Export #{job_id} queued. It will be ready to download here shortly.", "info")
+    else:
+        flash(f"An identical export (#{job_id}) is already being prepared.", "info")
+    return redirect(url_for('export_list'))
+
+
+@routes.route('/admin/exports', methods=['GET', 'POST'])
+@login_required
+def export_list():
+    if not current_user.is_admin:
+        flash("Access denied.")
+        return redirect(url_for('home'))
+
+    if request.method == 'POST':
+        return queue_export(export_jobs.export_params(
+            event_id=request.form.get('event_id', type=int),
+            status=request.form.get('status'),
+            search=request.form.get('search'),
+            fmt=request.form.get('format', 'csv'),
+            compress=request.form.get('gzip') == '1',
+            archived=request.form.get('archived') == '1',
+        ))
+
+    # Job state is written by the export worker, so read it from the primary
+    jobs = export_jobs.recent(mysql.connection)
+    in_flight = any(job['status'] in export_jobs.ACTIVE for job in jobs)
+    return render_template('exports.html', jobs=jobs, in_flight=in_flight)
+
+
+@routes.route('/admin/exports/<int:job_id>')
+@login_required
+def export_status(job_id):
+    if not current_user.is_admin:
+        return jsonify(error="Access denied."), 403
+    job = export_jobs.get(mysql.connection, job_id)
+    if job is None:
+        return jsonify(error="No such export."), 404
+    status = {key: job[key] for key in ('id', 'status', 'params', 'size', 'error')}
+    for key in ('created_at', 'started_at', 'finished_at', 'expires_at'):
+        status[key] = job[key].isoformat() if job[key] else None
+    if job['status'] == export_jobs.DONE:
+        status['download_url'] = url_for('download_export', job_id=job_id)
+    return jsonify(status)
+
+
+@routes.route('/admin/exports/<int:job_id>/download')
+@login_required
+def download_export(job_id):
+    if not current_user.is_admin:
+        flash("Access denied.")
+        return redirect(url_for('home'))
+    job = export_jobs.get(mysql.connection, job_id)
+    if job is None or job['status'] != export_jobs.DONE:
+        abort(404)
+    return export_jobs.send_artifact(current_app, job)
+
+
+@routes.route('/admin/archive')
+@login_required
+def archive_list():
+    if not current_user.is_admin:
+        flash("Access denied.")
+        return redirect(url_for('home'))
+
+    # One year at a time, so each page reads a single partition
+    years = archive.archived_years(mysql.read_connection)
+    year = request.args.get('year', type=int) or (years[0] if years else None)
+    events, next_cursor = [], None
+    if year is not None:
+        events, next_cursor = archive.archived_events(mysql.read_connection, year,
+                                                      decode_cursor(request.args.get('after')))
+    older_url = url_for('archive_list', year=year, after=next_cursor) if next_cursor else None
+    return render_template('archive.html', years=years, year=year, events=events, older_url=older_url,
+                           after_days=current_app.config.get('ARCHIVE_AFTER_DAYS', 60))
+
+
+@routes.route('/admin/archive/<int:event_id>')
+@login_required
+def archived_registrations(event_id):
+    if not current_user.is_admin:
+        flash("Access denied.")
+        return redirect(url_for('home'))
+
+    event = archive.archived_event(mysql.read_connection, event_id)
+    if event is None:
+        abort(404)
+    status = request.args.get('status', type=str)
+    search = request.args.get('search', type=str)
+    before = request.args.get('before', type=int)
+    per_page = 20
+
+    where, params = registration_filters(event_id, status, search, before_id=before)
+    cur = mysql.read_connection.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(f"""
+        SELECT registrations.id, users.username AS user_name, users.email AS user_email,
+               registrations.phone AS user_phone, registrations.status, registrations.created_at
+        {archive.ARCHIVED_REGISTRATIONS_FROM}
+        {where}
         ORDER BY registrations.id DESC
-    """)
+        LIMIT %s
+    """, (*params, per_page + 1))
     rows = cur.fetchall()
     cur.close()
 
-    def generate():
-        yield 'Username,Email,Phone,Event Title,Status\n'
-        for row in rows:
-            yield ','.join([str(field) for field in row]) + '\n'
-
-    return Response(generate(), mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=registrations.csv'})
+    registrations = rows[:per_page]
+    older_url = None
+    if len(rows) > per_page:
+        older_url = url_for('archived_registrations', event_id=event_id, status=status, search=search,
+                            before=registrations[-1]['id'])
+    return render_template('archive_event.html', event=event, registrations=registrations, older_url=older_url,
+                           status=status, search=search)
 
-@app.route('/dashboard')
+@routes.route('/dashboard')
 @login_required
 def dashboard():
     if current_user.is_admin:
-        # Admin Dashboard
-        cur = mysql.connection.cursor(MySQLdb.cursors.DictCursor)
-
-        # Fetch all events for admin to manage
-        cur.execute("SELECT * FROM events ORDER BY date ASC")
-        events = cur.fetchall()
-
-        # Fetch all pending registrations to approve/reject
-        cur.execute("""
-            SELECT r.id AS reg_id, u.username, u.email, e.title, e.date, r.status
-            FROM registrations r
-            JOIN users u ON r.user_id = u.id
-            JOIN events e ON r.event_id = e.id
-            WHERE r.status = 'Pending'
-            ORDER BY e.date ASC
-        """)
-        pending_regs = cur.fetchall()
-
-        cur.close()
-        return render_template("admin_dashboard.html", events=events, pending_regs=pending_regs)
+        return render_admin_dashboard()
 
     else:
         # Regular User Dashboard
         user_id = current_user.id
 
-        cur = mysql.connection.cursor(MySQLdb.cursors.DictCursor)
+        cur = mysql.read_connection.cursor(MySQLdb.cursors.DictCursor)
         
         # Get user profile info
         cur.execute("SELECT username, email FROM users WHERE id = %s", (user_id,))
         user = cur.fetchone()
-
-        # Get upcoming registrations for the user
-        cur.execute("""
-            SELECT r.id AS reg_id, e.title, e.date, r.status
-            FROM registrations r
-            JOIN events e ON r.event_id = e.id
-            WHERE r.user_id = %s AND e.date >= CURDATE()
-            ORDER BY e.date ASC
-        """, (user_id,))
-        upcoming = cur.fetchall()
-        
         cur.close()
 
-        return render_template("dashboard.html", user=user, upcoming=upcoming)
+        # Upcoming registrations, precomputed in date order (see timeline.py)
+        upcoming = timeline.upcoming(mysql.read_connection, user_id)
+        feed_url = url_for('calendar_feed', token=timeline.feed_token(user_id), _external=True)
+
+        parts = ('dashboard', user_id, current_user.username, content_digest((user, upcoming, feed_url)))
+        return conditional_page(parts, lambda: render_template("dashboard.html", user=user, upcoming=upcoming,
+                                                               feed_url=feed_url))
+
 
+@routes.route('/calendar/<token>.ics')
+def calendar_feed(token):
+    # Calendar apps poll without a session; the signed token is the credential
+    user_id = timeline.user_for_token(token)
+    if user_id is None:
+        abort(404)
+    return timeline.feed_response(user_id)
 
-# Add email configuration to app config
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'  # Use your email provider's SMTP server
-app.config['MAIL_PORT'] = 587  # Use port 587 for secure TLS
-app.config['MAIL_USE_TLS'] = True  # Use TLS (Transport Layer Security)
-app.config['MAIL_USERNAME'] = 'pavithrareddy043@gmail.com'  # Replace with your email
-app.config['MAIL_PASSWORD'] = 'rlqz claz ttab lwef'  # Replace with your email password or app password
-app.config['MAIL_DEFAULT_SENDER'] = 'your-email@gmail.com'  # Default sender email address
 
-# Initialize Flask-Mail
-mail = Mail(app)
 
+def _run_periodically(fn, interval, stop=None):
+    """Call ``fn()`` in a fresh app context once, or every ``interval`` seconds until interrupted.
+
+    With an interval, a run that raises is logged and the next one goes
+    ahead as planned. Ctrl-C ends the loop quietly, and ``stop()`` is always
+    called on the way out.
+    """
+    app = current_app._get_current_object()
+    name = click.get_current_context().info_name
+    try:
+        while True:
+            try:
+                with app.app_context():
+                    fn()
+            except Exception:
+                if not interval:
+                    raise
+                app.logger.exception("%s failed; retrying in %s seconds", name, interval)
+            if not interval:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stop is not None:
+            stop()
+
+
+@routes.command('outbox-worker')
+def outbox_worker():
+    """Deliver queued emails until interrupted."""
+    from flask_mail import Mail
+
+    worker = outbox.OutboxWorker(current_app._get_current_object(), Mail(current_app))
+    worker.start()
+    # The worker's threads do the sending; this only waits for Ctrl-C
+    _run_periodically(lambda: None, 1, stop=worker.stop)
+
+
+@routes.command('export-worker')
+def export_worker():
+    """Build queued registration exports until interrupted."""
+    worker = export_jobs.ExportWorker(current_app._get_current_object())
+    _run_periodically(worker.run, 0, stop=worker.stop)
+
+
+@routes.command('reconcile-stats')
+@click.option('--interval', type=float, default=0, help="Repeat every this many seconds (0 = run once).")
+def reconcile_stats(interval):
+    """Recompute the per-event registration counters from the registrations table."""
+    def run():
+        fixed = event_stats.reconcile(mysql.connection, current_app.config.get('STATS_RECONCILE_BATCH_SIZE', 500))
+        click.echo(f"{fixed} events corrected")
+
+    _run_periodically(run, interval)
+
+
+@routes.command('promote-waitlist')
+@click.option('--interval', type=float, default=0, help="Repeat every this many seconds (0 = run once).")
+def promote_waitlist_command(interval):
+    """Move waitlisted users into any free seats, across all events."""
+    def run():
+        promoted = waitlist.promote_all(mysql.connection, current_app.config.get('WAITLIST_PROMOTE_BATCH_SIZE', 100))
+        click.echo(f"{promoted} waitlisted users promoted")
+
+    _run_periodically(run, interval)
+
+
+@routes.command('archive-events')
+@click.option('--interval', type=float, default=0, help="Repeat every this many seconds (0 = run once).")
+def archive_events(interval):
+    """Move events that ended ARCHIVE_AFTER_DAYS ago, and their registrations, to the archive tables."""
+    def run():
+        events, registrations = archive.archive_past(
+            mysql.connection,
+            current_app.config.get('ARCHIVE_AFTER_DAYS', 60),
+            current_app.config.get('ARCHIVE_BATCH_SIZE', 1000),
+            current_app.config.get('ARCHIVE_BATCH_PAUSE', 0.05),
+        )
+        click.echo(f"{events} events and {registrations} registrations archived")
+
+    _run_periodically(run, interval)
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
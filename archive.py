@@ -0,0 +1,202 @@
+# archive.py
+"""Moves finished events and their registrations out of the live tables.
+
+Events that ended more than ``ARCHIVE_AFTER_DAYS`` ago are moved to
+``events_archive`` and their registrations to ``registrations_archive``
+(migration v0010). Both archive tables are RANGE partitioned by the event's
+year, so browsing one year of history reads one partition. The live
+``events`` and ``registrations`` tables keep only recent and upcoming
+events, and every live query (home, dashboards, /registrations) stays sized
+by those rather than by everything that ever happened. Run it from cron or
+as a long-lived process::
+
+    flask --app app archive-events --interval 3600
+
+Each event is archived in short transactions: its registrations move in
+batches of ``ARCHIVE_BATCH_SIZE`` (copy, then delete, each batch locking
+only its own rows), with ``ARCHIVE_BATCH_PAUSE`` seconds between batches to
+let replicas and other writers keep up. The event row itself goes last,
+locked so no registration can slip in while it is deleted. Every step can be
+repeated safely: a run that dies half way is finished by the next one.
+The event's ``user_timeline`` and ``waitlist`` rows go with it through
+their foreign keys. Other workers drop the event from their catalog and
+search caches when those expire.
+
+Archived rows are read-only. ``ARCHIVED_REGISTRATIONS_FROM`` aliases the
+archive tables to the live names, so ``registration_filters()`` and the
+export query work on them unchanged.
+"""
+
+import time
+
+import MySQLdb.cursors
+
+import timeline
+from event_cache import encode_cursor
+
+EVENT_COLUMNS = ("id, title, date, location, description, capacity, image_path, "
+                 "registered_count, pending_count, approved_count")
+REGISTRATION_COLUMNS = "id, user_id, event_id, name, email, phone, status, created_at"
+
+# registration_query.REGISTRATIONS_FROM, over the archive tables
+ARCHIVED_REGISTRATIONS_FROM = """
+    FROM registrations_archive AS registrations
+    JOIN users ON registrations.user_id = users.id
+    JOIN events_archive AS events ON registrations.event_id = events.id
+"""
+
+CANDIDATES_QUERY = """
+    SELECT id, YEAR(date) AS year FROM events
+    WHERE date < CURDATE() - INTERVAL %s DAY
+    ORDER BY date ASC, id ASC
+    LIMIT %s
+"""
+BATCH_QUERY = """
+    SELECT id FROM registrations
+    WHERE event_id = %s
+    ORDER BY id
+    LIMIT %s
+    FOR UPDATE
+"""
+ARCHIVED_EVENTS_QUERY = """
+    SELECT id, title, date, location, registered_count, pending_count, approved_count, archived_at
+    FROM events_archive
+    WHERE date >= %s AND date < %s AND (date < %s OR (date = %s AND id < %s))
+    ORDER BY date DESC, id DESC
+    LIMIT %s
+"""
+
+
+def archive_past(conn, after_days=60, batch_size=1000, pause=0.0):
+    """Archive every event that ended more than ``after_days`` ago; returns ``(events, registrations)`` moved."""
+    events = registrations = 0
+    while True:
+        cur = conn.cursor()
+        cur.execute(CANDIDATES_QUERY, (after_days, 100))
+        candidates = cur.fetchall()
+        cur.close()
+        conn.commit()
+        if not candidates:
+            return events, registrations
+        for event_id, year in candidates:
+            moved = archive_event(conn, event_id, year, batch_size, pause)
+            if moved is not None:
+                events += 1
+                registrations += moved
+
+
+def archive_event(conn, event_id, year, batch_size=1000, pause=0.0):
+    """Move one event and its registrations to the archive; returns how many registrations moved.
+
+    Returns None if the event is no longer in ``events``.
+    """
+    # DDL commits implicitly, so partitions are made before any transaction starts
+    for table in ('events_archive', 'registrations_archive'):
+        ensure_partitions(conn, table, year)
+
+    moved = 0
+    cur = conn.cursor()
+    try:
+        while True:
+            cur.execute(BATCH_QUERY, (event_id, batch_size))
+            reg_ids = [row[0] for row in cur.fetchall()]
+            if reg_ids:
+                moved += _move_batch(cur, reg_ids)
+                conn.commit()
+                if pause:
+                    time.sleep(pause)
+                continue
+
+            # Locking the event row holds off reserve_seat() until it is gone
+            cur.execute("SELECT id FROM events WHERE id = %s FOR UPDATE", (event_id,))
+            if cur.fetchone() is None:
+                conn.rollback()
+                return None
+            cur.execute("SELECT 1 FROM registrations WHERE event_id = %s LIMIT 1", (event_id,))
+            if cur.fetchone() is not None:
+                # Someone registered since the last batch; move them too
+                conn.rollback()
+                continue
+            # The snapshot is taken last so it has the final counters
+            cur.execute(f"INSERT INTO events_archive ({EVENT_COLUMNS}) SELECT {EVENT_COLUMNS} FROM events WHERE id = %s",
+                        (event_id,))
+            cur.execute("DELETE FROM events WHERE id = %s", (event_id,))
+            conn.commit()
+            return moved
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _move_batch(cur, reg_ids):
+    placeholders = ', '.join(['%s'] * len(reg_ids))
+    # The copy and the delete commit together, so a row is never in both tables or neither
+    cur.execute(f"""
+        INSERT INTO registrations_archive ({REGISTRATION_COLUMNS}, event_date)
+        SELECT r.id, r.user_id, r.event_id, r.name, r.email, r.phone, r.status, r.created_at, e.date
+        FROM registrations r
+        JOIN events e ON e.id = r.event_id
+        WHERE r.id IN ({placeholders})
+    """, reg_ids)
+    timeline.removing(cur, reg_ids)
+    cur.execute(f"DELETE FROM registrations WHERE id IN ({placeholders})", reg_ids)
+    return len(reg_ids)
+
+
+def ensure_partitions(conn, table, year):
+    """Split year partitions off ``pmax`` up to and including ``year``; returns how many were added.
+
+    Years older than the newest partition already have one to land in (the
+    oldest partition takes everything before it), so history archived out
+    of order never needs a partition in the middle of the range.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT PARTITION_DESCRIPTION FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME <> 'pmax'
+    """, (table,))
+    bounds = [int(row[0]) for row in cur.fetchall()]
+    first = max(bounds) if bounds else year
+    years = range(first, year + 1)
+    if years:
+        # pmax is always empty here, so reorganizing it moves no rows
+        parts = ', '.join(f"PARTITION p{y} VALUES LESS THAN ({y + 1})" for y in years)
+        cur.execute(f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO "
+                    f"({parts}, PARTITION pmax VALUES LESS THAN MAXVALUE)")
+    cur.close()
+    return len(years)
+
+
+def archived_years(conn):
+    """Years with archived events, newest first."""
+    cur = conn.cursor()
+    cur.execute("SELECT DISTINCT YEAR(date) FROM events_archive ORDER BY 1 DESC")
+    years = [row[0] for row in cur.fetchall()]
+    cur.close()
+    return years
+
+
+def archived_events(conn, year, cursor=None, limit=20):
+    """One page of ``year``'s archived events, latest first, and the cursor of the next page (or None).
+
+    The year bounds let MySQL read only that year's partition; ``cursor`` is
+    a decoded ``event_cache`` cursor for the last event on the previous page.
+    """
+    before_date, before_id = cursor or (f"{year + 1}-01-01", 0)
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(ARCHIVED_EVENTS_QUERY, (f"{year}-01-01", f"{year + 1}-01-01", before_date, before_date, before_id,
+                                        limit + 1))
+    rows = cur.fetchall()
+    cur.close()
+    events = list(rows[:limit])
+    return events, encode_cursor(events[-1]) if len(rows) > limit else None
+
+
+def archived_event(conn, event_id):
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(f"SELECT {EVENT_COLUMNS}, archived_at FROM events_archive WHERE id = %s", (event_id,))
+    event = cur.fetchone()
+    cur.close()
+    return event
@@ -0,0 +1,44 @@
+# async_app.py
+"""Async serving mode: the same app on gevent, with a cooperative MySQL driver.
+
+The routes stay plain Flask views. What changes is the runtime underneath
+them: every request runs on a greenlet, and MySQL (PyMySQL standing in for
+MySQLdb, so ``MySQLdb.cursors.DictCursor`` etc. keep working) and SMTP
+sockets yield to other requests while they wait. One worker process then
+overlaps hundreds of requests blocked on I/O, such as ``home``,
+``registrations`` and ``register_event``, instead of one (sync workers) or a
+handful (threads). They still draw connections from the same per-process
+pool, so raise ``MYSQL_POOL_MAX_SIZE`` to match the concurrency you expect
+to have waiting on the database.
+
+    gunicorn -w 4 -k gevent --worker-connections 1000 async_app:app
+    python async_app.py            # single process, for local use
+
+CPU-heavy work still holds the process: password hashing is moved onto
+real OS threads (see passwords.py), everything else runs on the hub.
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import sys  # noqa: E402
+
+import pymysql  # noqa: E402
+
+pymysql.install_as_MySQLdb()
+sys.modules.setdefault('MySQLdb.connections', pymysql.connections)
+sys.modules.setdefault('MySQLdb.cursors', pymysql.cursors)
+
+from app import create_app  # noqa: E402
+
+app = create_app()
+
+if __name__ == '__main__':
+    import os
+
+    from gevent.pywsgi import WSGIServer
+
+    port = int(os.environ.get('PORT', 5000))
+    print(f"Serving on http://127.0.0.1:{port} (gevent)")
+    WSGIServer(('127.0.0.1', port), app).serve_forever()
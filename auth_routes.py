@@ -1,8 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 import MySQLdb.cursors
 from extensions import mysql
+from user_cache import remember_identity, forget_identity
+from passwords import hasher
+import search
+from admission import admission
 
 auth = Blueprint('auth', __name__)
 
@@ -18,6 +21,7 @@ class User(UserMixin):
         return str(self.id)
 
 @auth.route('/login', methods=['GET', 'POST'])
+@admission.limit('auth.login')
 def login():
     if request.method == 'POST':
         email = request.form['email']
@@ -27,9 +31,16 @@ def login():
         cur.execute("SELECT * FROM users WHERE email = %s", (email,))
         user = cur.fetchone()
 
-        if user and check_password_hash(user['password'], password):
+        if user and hasher.verify(user['password'], password):
+            if hasher.needs_rehash(user['password']):
+                # Upgrade to the configured method/cost while we have the plain text
+                cur.execute("UPDATE users SET password = %s WHERE id = %s",
+                            (hasher.hash(password), user['id']))
+                mysql.connection.commit()
+
             user_obj = User(user['id'], user['username'], user['email'], user['is_admin'])
             login_user(user_obj)
+            remember_identity(user['id'], user['username'], user['email'], user['role'])
 
             flash('Logged in successfully!', 'success')
 
@@ -44,6 +55,7 @@ def login():
 
 
 @auth.route('/signup', methods=['GET', 'POST'])
+@admission.limit('auth.signup')
 def signup():
     if request.method == 'POST':
         username = request.form['username']
@@ -57,7 +69,7 @@ def signup():
         if existing_user:
             flash('Email already registered.', 'warning')
         else:
-            hashed_password = generate_password_hash(password)
+            hashed_password = hasher.hash(password)
 
             is_admin = email == 'admin1@example.com'  # You can modify the admin logic here
             cur.execute(
@@ -65,6 +77,7 @@ def signup():
                 (username, email, hashed_password, is_admin)
             )
             mysql.connection.commit()
+            search.users_index.put(cur.lastrowid, username)
             flash('Account created successfully! Please log in.', 'success')
             return redirect(url_for('auth.login'))
 
@@ -75,5 +88,6 @@ def signup():
 @login_required
 def logout():
     logout_user()
+    forget_identity()
     flash('Logged out successfully.', 'info')
     return redirect(url_for('auth.login'))
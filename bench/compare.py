@@ -0,0 +1,73 @@
+"""Diff two bench/run.py result files.
+
+    python bench/compare.py baseline.json candidate.json --threshold 10
+
+Prints the relative change per scenario and metric and exits 1 if any
+latency, queries-per-request or memory figure got worse (or throughput got
+lower) by more than ``--threshold`` percent.
+"""
+
+import argparse
+import json
+import sys
+
+# metric -> True if higher is better
+METRICS = {
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'throughput_rps': True,
+    'queries_per_request': False,
+    'peak_rss_mb': False,
+}
+
+
+def change(old, new):
+    if old == 0:
+        return 0.0 if new == 0 else float('inf')
+    return (new - old) / old * 100
+
+
+def compare(baseline, candidate, threshold):
+    regressions = []
+    for name, new in sorted(candidate['scenarios'].items()):
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            print(f"{name}: new scenario")
+            continue
+        parts = []
+        for metric, higher_is_better in METRICS.items():
+            delta = change(old[metric], new[metric])
+            worse = -delta if higher_is_better else delta
+            flag = ' !' if worse > threshold else ''
+            if flag:
+                regressions.append((name, metric, delta))
+            parts.append(f"{metric} {old[metric]:.2f}->{new[metric]:.2f} ({delta:+.1f}%){flag}")
+        print(f"{name}:\n    " + "\n    ".join(parts))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline['meta'].get('commit')}\ncandidate {candidate['meta'].get('commit')}\n")
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold}%:")
+        for name, metric, delta in regressions:
+            print(f"  {name} {metric} {delta:+.1f}%")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Peak-RSS benchmark for the streaming registrations export.
+
+Each row count runs in a fresh child process so ``ru_maxrss`` reflects only
+that run. By default rows come from a synthetic ``fetchmany`` source, which
+isolates the encoder; pass ``--db`` to stream the real export query through
+an SSCursor (capped with LIMIT) against the database from config.py.
+
+    python bench/export_rss.py --rows 10000 100000 1000000 --format csv --gzip
+
+A flat ``peak_rss_mb`` column across row counts is the expected result.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class SyntheticCursor:
+    """Produces ``total`` export-shaped rows on demand."""
+
+    def __init__(self, total):
+        self.total = total
+        self.produced = 0
+
+    def fetchmany(self, size):
+        end = min(self.total, self.produced + size)
+        rows = [
+            (i, f"user{i}", f"user{i}@example.com", "9876543210", f'Event "{i % 97}", hall B', 'Pending')
+            for i in range(self.produced, end)
+        ]
+        self.produced = end
+        return rows
+
+
+def run_child(rows, fmt, compress, use_db):
+    from exports import EXPORT_QUERY, encode_rows
+    from registration_query import REGISTRATIONS_FROM
+
+    if use_db:
+        import MySQLdb
+        import MySQLdb.cursors
+        import config
+        conn = MySQLdb.connect(host=config.DB_HOST, port=config.DB_PORT, user=config.DB_USER,
+                               passwd=config.DB_PASSWORD or '', db=config.DB_NAME)
+        cursor = conn.cursor(MySQLdb.cursors.SSCursor)
+        cursor.execute(EXPORT_QUERY.format(from_=REGISTRATIONS_FROM, where='') + " LIMIT %s", (rows,))
+    else:
+        cursor = SyntheticCursor(rows)
+
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in encode_rows(cursor, fmt, compress))
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{rows},{size},{elapsed:.3f},{peak_kb / 1024:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--gzip', action='store_true')
+    parser.add_argument('--db', action='store_true')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args.child, args.format, args.gzip, args.db)
+        return
+
+    print(f"{'rows':>10} {'bytes':>12} {'seconds':>8} {'peak_rss_mb':>12}")
+    for rows in args.rows:
+        cmd = [sys.executable, __file__, '--child', str(rows), '--format', args.format]
+        cmd += ['--gzip'] if args.gzip else []
+        cmd += ['--db'] if args.db else []
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.strip()
+        n, size, seconds, peak = out.split(',')
+        print(f"{n:>10} {size:>12} {seconds:>8} {peak:>12}")
+
+
+if __name__ == '__main__':
+    main()
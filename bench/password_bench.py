@@ -0,0 +1,94 @@
+"""Login hashing throughput: verifications per second per core.
+
+Times ``PasswordHasher.verify`` (what ``auth.login`` pays per attempt) for
+each method/cost given, first on one thread and then with ``--threads``
+concurrent callers through the hasher's bounded pool, and reports both the
+raw rate and the rate per core. No database is needed.
+
+    python bench/password_bench.py
+    python bench/password_bench.py --method scrypt:16384 --method bcrypt:10 --seconds 5
+
+Pick the cost whose per-core rate still covers your peak logins per second
+divided by the cores you run on, then set PASSWORD_HASH_METHOD and its cost.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import PasswordHasher  # noqa: E402
+
+COST_SETTING = {
+    'scrypt': 'PASSWORD_SCRYPT_N',
+    'pbkdf2': 'PASSWORD_PBKDF2_ITERATIONS',
+    'bcrypt': 'PASSWORD_BCRYPT_ROUNDS',
+}
+DEFAULT_METHODS = ['scrypt:32768', 'scrypt:16384', 'pbkdf2:600000', 'pbkdf2:210000', 'bcrypt:12', 'bcrypt:10']
+
+
+def make_hasher(spec, threads):
+    method, _, cost = spec.partition(':')
+    if method not in COST_SETTING:
+        raise SystemExit(f"unknown method {method!r}; use one of {', '.join(COST_SETTING)}")
+    settings = {'PASSWORD_HASH_METHOD': method, 'PASSWORD_HASH_THREADS': threads}
+    if cost:
+        settings[COST_SETTING[method]] = int(cost)
+    return PasswordHasher(**settings)
+
+
+def rate(hasher, stored, seconds, callers):
+    """Verifications per second with ``callers`` threads hammering ``verify``."""
+    deadline = time.perf_counter() + seconds
+
+    def loop():
+        done = 0
+        while time.perf_counter() < deadline:
+            if not hasher.verify(stored, 'correct horse battery staple'):
+                raise RuntimeError("verification failed")
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        total = sum(f.result() for f in [pool.submit(loop) for _ in range(callers)])
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--method', action='append', help="method[:cost], repeatable (default: a spread of each)")
+    parser.add_argument('--seconds', type=float, default=3, help="time per measurement")
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 2, help="hash pool size / concurrent logins")
+    args = parser.parse_args()
+
+    results = []
+    for spec in args.method or DEFAULT_METHODS:
+        hasher = make_hasher(spec, args.threads)
+        try:
+            stored = hasher.hash('correct horse battery staple')
+        except RuntimeError as e:
+            print(f"{spec}: skipped ({e})", file=sys.stderr)
+            continue
+        single = rate(hasher, stored, args.seconds, 1)
+        pooled = rate(hasher, stored, args.seconds, args.threads * 2)
+        results.append({
+            'method': spec,
+            'ms_per_login': round(1000 / single, 2),
+            'logins_per_sec_per_core': round(single, 1),
+            'logins_per_sec_pooled': round(pooled, 1),
+            'threads': args.threads,
+        })
+        print(f"{spec:>16}  {1000 / single:8.2f} ms/login  {single:8.1f}/s per core  "
+              f"{pooled:8.1f}/s with {args.threads} threads", file=sys.stderr)
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
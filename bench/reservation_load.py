@@ -0,0 +1,124 @@
+"""Concurrent load test for reservations.reserve_seat.
+
+Creates a throwaway event plus enough throwaway users, then lets a pool of
+threads (one MySQL connection each) race to register every user. At the end
+the event must hold exactly ``capacity`` registrations and its
+``registered_count`` must agree. Reservation latency is reported per 10% of
+fill so you can see the check stays flat as the event fills up.
+
+    DB_HOST=... DB_USER=... DB_PASSWORD=... DB_NAME=... \\
+        python bench/reservation_load.py --capacity 10000 --attempts 12000
+
+Everything the script creates is removed again on exit.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import MySQLdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from reservations import reserve_seat, RESERVED  # noqa: E402
+
+
+def connect():
+    return MySQLdb.connect(host=config.DB_HOST, port=config.DB_PORT, user=config.DB_USER,
+                           passwd=config.DB_PASSWORD or '', db=config.DB_NAME)
+
+
+def setup(conn, capacity, attempts):
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO events (title, date, location, description, capacity, registered_count)
+        VALUES ('reservation-load-test', CURDATE(), 'bench', 'bench', %s, 0)
+    """, (capacity,))
+    event_id = cur.lastrowid
+
+    tag = f"bench-{event_id}"
+    cur.executemany(
+        "INSERT INTO users (username, email, password, role) VALUES (%s, %s, '', 'user')",
+        [(f"{tag}-{i}", f"{tag}-{i}@example.invalid") for i in range(attempts)]
+    )
+    cur.execute("SELECT id FROM users WHERE username LIKE %s", (f"{tag}-%",))
+    user_ids = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return event_id, tag, user_ids
+
+
+def teardown(conn, event_id, tag):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM registrations WHERE event_id = %s", (event_id,))
+    cur.execute("DELETE FROM events WHERE id = %s", (event_id,))
+    cur.execute("DELETE FROM users WHERE username LIKE %s", (f"{tag}-%",))
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--capacity', type=int, default=10000)
+    parser.add_argument('--attempts', type=int, default=12000)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    admin = connect()
+    event_id, tag, user_ids = setup(admin, args.capacity, args.attempts)
+
+    local = threading.local()
+    lock = threading.Lock()
+    samples = []  # seconds per successful reservation, in completion order; reported per 10% of fill
+
+    def attempt(user_id):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = connect()
+        started = time.perf_counter()
+        result = reserve_seat(conn, user_id, event_id, 'bench', 'bench@example.invalid', '9999999999')
+        if result == RESERVED:
+            conn.commit()
+        elapsed = time.perf_counter() - started
+        if result == RESERVED:
+            with lock:
+                samples.append(elapsed)
+        return result
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(attempt, user_ids))
+        wall = time.perf_counter() - started
+
+        cur = admin.cursor()
+        cur.execute("SELECT COUNT(*) FROM registrations WHERE event_id = %s", (event_id,))
+        actual = cur.fetchone()[0]
+        cur.execute("SELECT registered_count FROM events WHERE id = %s", (event_id,))
+        counter = cur.fetchone()[0]
+        admin.commit()
+
+        reserved = results.count(RESERVED)
+        print(f"attempts={len(results)} reserved={reserved} capacity={args.capacity}")
+        print(f"rows={actual} registered_count={counter} wall={wall:.2f}s "
+              f"throughput={len(results) / wall:.0f}/s")
+
+        bucket = max(1, len(samples) // 10)
+        for i in range(0, len(samples), bucket):
+            chunk = samples[i:i + bucket]
+            print(f"  fill {i:>6}-{i + len(chunk):>6}: "
+                  f"median {statistics.median(chunk) * 1000:.2f} ms")
+
+        overbooked = actual > args.capacity or actual != counter
+        print("OVERBOOKED" if overbooked else "OK: no overbooking")
+        return 1 if overbooked else 0
+    finally:
+        teardown(admin, event_id, tag)
+        admin.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Load-test every route of the app against a seeded benchmark database.
+
+Boots ``create_app()`` on a local threaded server, logs virtual users in,
+and hammers each route with concurrent requests. For every scenario it records
+p50/p95/p99 latency, throughput, error count, MySQL queries per request
+(from the server's ``Questions`` counter, so keep the bench database to
+yourself while it runs) and peak RSS. The server and the load generator
+share one process, so RSS is an upper bound for the app itself. With
+``--base-url`` it loads a server you started yourself instead (see
+bench/serving_modes.py); start it with ``ADMISSION_ENABLED=0``.
+
+Every virtual user connects from 127.0.0.1, so admission control (see
+admission.py) is switched off unless ``--admission`` is given; with it on,
+429s count as errors.
+
+    python bench/seed.py --database eventease_bench
+    python bench/run.py --database eventease_bench --concurrency 16 --requests 500 \\
+        --output bench/results/$(git rev-parse --short HEAD).json
+    python bench/compare.py bench/results/old.json bench/results/new.json
+
+Scenarios that delete data run last; re-seed before the next run.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from seed import ADMIN_EMAIL, PASSWORD, user_email  # noqa: E402
+
+# (name, login role or None, method, path template, form data factory or None).
+# {event} / {reg} / {user} are filled with random seeded ids per request.
+SCENARIOS = [
+    ('home', None, 'GET', '/', None),
+    ('test_db', None, 'GET', '/test-db', None),
+    ('auth.login_form', None, 'GET', '/auth/login', None),
+    ('auth.login', None, 'POST', '/auth/login',
+     lambda r: {'email': user_email(r['user']), 'password': PASSWORD}),
+    ('auth.signup_form', None, 'GET', '/auth/signup', None),
+    ('auth.signup', None, 'POST', '/auth/signup',
+     lambda r: {'username': f"signup{r['nonce']}", 'email': f"signup{r['nonce']}@bench.invalid",
+                'password': PASSWORD}),
+    ('home.user', 'user', 'GET', '/', None),
+    ('dashboard.user', 'user', 'GET', '/dashboard', None),
+    ('profile', 'user', 'GET', '/profile', None),
+    ('register_event_form', 'user', 'GET', '/register_event/{event}', None),
+    ('register_event', 'user', 'POST', '/register_event/{event}',
+     lambda r: {'name': 'Bench User', 'email': 'bench@bench.invalid', 'phone': '9876543210'}),
+    ('home.admin', 'admin', 'GET', '/', None),
+    ('dashboard.admin', 'admin', 'GET', '/dashboard', None),
+    ('admin_dashboard', 'admin', 'GET', '/admin/dashboard', None),
+    ('admin_dashboard.add', 'admin', 'POST', '/admin/dashboard',
+     lambda r: {'title': f"Bench added {r['nonce']}", 'date': '2030-01-01',
+                'location': 'Bench hall', 'description': 'Added by bench/run.py'}),
+    ('add_event_form', 'admin', 'GET', '/admin/add', None),
+    ('add_event', 'admin', 'POST', '/admin/add',
+     lambda r: {'title': f"Bench added {r['nonce']}", 'date': '2030-01-01',
+                'location': 'Bench hall', 'description': 'Added by bench/run.py'}),
+    ('edit_event_form', 'admin', 'GET', '/admin/edit/{event}', None),
+    ('edit_event', 'admin', 'POST', '/admin/edit/{event}',
+     lambda r: {'title': f"Bench event {r['event']}", 'date': '2030-01-01',
+                'location': 'Bench hall', 'description': 'Edited by bench/run.py'}),
+    ('registrations', 'admin', 'GET', '/registrations', None),
+    ('registrations.filtered', 'admin', 'GET', '/registrations?status=Pending&event_id={event}', None),
+    ('registrations.search', 'admin', 'GET', '/registrations?search=user1', None),
+    ('registrations.export_csv', 'admin', 'GET', '/registrations?export=csv&event_id={event}', None),
+    ('export_registrations', 'admin', 'GET', '/export_registrations?event_id={event}', None),
+    ('approve_registration', 'admin', 'GET', '/admin/approve_registration/{reg}', None),
+    ('db_pool_stats', 'admin', 'GET', '/admin/db-pool', None),
+    ('auth.logout', 'user', 'GET', '/auth/logout', None),
+    # Destructive: keep last
+    ('delete_registration', 'admin', 'POST', '/admin/delete_registration/{reg}', lambda r: {}),
+    ('delete_event', 'admin', 'POST', '/admin/delete/{event}', lambda r: {}),
+]
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualUser:
+    def __init__(self, base_url, role, index):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            NoRedirect, urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        if role:
+            self.login(ADMIN_EMAIL if role == 'admin' else user_email(index))
+
+    def login(self, email):
+        # A successful login redirects; anything else would leave the session anonymous
+        status = self.request('POST', '/auth/login', {'email': email, 'password': PASSWORD})
+        if status != 302:
+            raise SystemExit(f"login as {email} failed with status {status}")
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+def mysql_questions(conn):
+    cur = conn.cursor()
+    cur.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+    value = int(cur.fetchone()[1])
+    cur.close()
+    return value
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(base_url, scenario, args, counts, stats_conn, rss_mb=None):
+    name, role, method, template, make_data = scenario
+    rng = random.Random(name)
+    nonce = iter(range(10 ** 9))
+    nonce_lock = threading.Lock()
+
+    sessions = min(args.concurrency, args.sessions or args.concurrency)
+    users = [VirtualUser(base_url, role, i + 1) for i in range(sessions)]
+    latencies, statuses = [], []
+    lock = threading.Lock()
+
+    def one(i):
+        with nonce_lock:
+            values = {'event': rng.randint(1, counts['events']),
+                      'reg': rng.randint(1, counts['registrations']),
+                      'user': rng.randint(1, counts['users']),
+                      'nonce': f"{os.getpid()}{time.time_ns()}{next(nonce)}"}
+        vu = users[i % len(users)]
+        path = template.format(**values)
+        data = make_data(values) if make_data else None
+        started = time.perf_counter()
+        status = vu.request(method, path, data)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses.append(status)
+
+    questions_before = mysql_questions(stats_conn)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - started
+    # The two SHOW STATUS calls themselves count as questions
+    queries = mysql_questions(stats_conn) - questions_before - 1
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'concurrency': args.concurrency,
+        # 429s are admission control turning the load away, not the route being served
+        'errors': sum(1 for s in statuses if s >= 500 or s == 429),
+        'status_codes': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'throughput_rps': len(latencies) / wall,
+        'queries_per_request': queries / len(latencies),
+        'peak_rss_mb': rss_mb() if rss_mb else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def admission_env(args):
+    """Admission control is off unless ``--admission``: every virtual user connects from 127.0.0.1."""
+    return {'ADMISSION_ENABLED': '1' if args.admission else '0'}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True, help="seeded benchmark database (see bench/seed.py)")
+    parser.add_argument('--seed', action='store_true', help="(re)seed the database first")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--registrations', type=int, default=50000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500, help="requests per scenario")
+    parser.add_argument('--only', nargs='*', help="run only these scenarios")
+    parser.add_argument('--sessions', type=int, help="distinct logged-in clients per scenario (default: --concurrency)")
+    parser.add_argument('--admission', action='store_true', help="keep admission control (rate limits) on")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--base-url', help="load an already running server instead of starting one in-process")
+    parser.add_argument('--output', help="write results JSON here")
+    args = parser.parse_args()
+
+    # config.py reads the environment at import time
+    os.environ['DB_NAME'] = args.database
+    os.environ.update(admission_env(args))
+    counts = {'users': args.users, 'events': args.events, 'registrations': args.registrations}
+    if args.seed:
+        from seed import seed
+        counts = seed(args.database, args.users, args.events, args.registrations)
+
+    from seed import connect
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        from werkzeug.serving import make_server
+        from app import create_app
+
+        app = create_app()
+
+        app.config['SECRET_KEY'] = app.config.get('SECRET_KEY') or 'bench-secret'
+        server = make_server('127.0.0.1', args.port, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{args.port}'
+
+    stats_conn = connect(args.database)
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': sys.version.split()[0],
+            'dataset': counts,
+            'concurrency': args.concurrency,
+            'requests_per_scenario': args.requests,
+        },
+        'scenarios': {},
+    }
+    try:
+        for scenario in SCENARIOS:
+            if args.only and scenario[0] not in args.only:
+                continue
+            result = run_scenario(base_url, scenario, args, counts, stats_conn)
+            results['scenarios'][scenario[0]] = result
+            print(f"{scenario[0]:<28} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                  f"p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps']:8.1f} req/s  "
+                  f"{result['queries_per_request']:5.1f} q/req  errors {result['errors']}")
+    finally:
+        if server:
+            server.shutdown()
+        stats_conn.close()
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
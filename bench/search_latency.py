@@ -0,0 +1,82 @@
+"""Latency of the search queries against a seeded benchmark database.
+
+Runs the home page event search and the /registrations registrant search
+(first page, as the views issue them; the total behind it comes from the
+background-refreshed count cache) for a set of terms and reports
+p50/p95/max per query shape. Exits 1 if any p95 is over ``--budget-ms``.
+
+    python bench/seed.py --database eventease_bench --users 100000 --events 5000 --registrations 1000000
+    python bench/search_latency.py --database eventease_bench --budget-ms 20
+
+Terms default to prefixes the seeder's usernames and events actually
+contain, plus a two-letter one that takes the LIKE fallback.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from seed import connect  # noqa: E402
+
+DEFAULT_TERMS = ['user1', 'user42', 'user999', 'bench', 'event 1', 'us']
+
+
+def shapes(term):
+    """``(name, sql, params)`` for each query a search for ``term`` issues."""
+    from registration_query import REGISTRATIONS_FROM, registration_filters
+    import search
+
+    where, params = registration_filters(search=term)
+    match = search.boolean_query(term)
+    if match:
+        yield 'home.search', search.EVENT_SEARCH_QUERY, (match, match, 13, 0)
+    else:
+        yield 'home.search_short', search.EVENT_PREFIX_QUERY, (search.like_prefix(term), 13, 0)
+    yield 'registrations.search', (
+        f"SELECT registrations.id {REGISTRATIONS_FROM} {where} ORDER BY registrations.id DESC LIMIT 6"), params
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True)
+    parser.add_argument('--terms', nargs='*', default=DEFAULT_TERMS)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    os.environ['DB_NAME'] = args.database
+    conn = connect(args.database)
+    cur = conn.cursor()
+    timings = {}
+    for term in args.terms:
+        for name, sql, params in shapes(term):
+            cur.execute(sql, params)
+            cur.fetchall()  # warm the buffer pool
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                cur.execute(sql, params)
+                cur.fetchall()
+                timings.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+    cur.close()
+    conn.close()
+
+    over = []
+    for name, values in sorted(timings.items()):
+        values.sort()
+        p95 = values[int(0.95 * (len(values) - 1))]
+        print(f"{name:<28} p50 {statistics.median(values):7.2f} ms  p95 {p95:7.2f} ms  max {values[-1]:7.2f} ms")
+        if p95 > args.budget_ms:
+            over.append(name)
+    if over:
+        print(f"Over the {args.budget_ms} ms budget: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Seed a dedicated benchmark database.
+
+Runs the schema migrations, empties the app tables and fills them with
+synthetic users, events and registrations. All users share the password
+``PASSWORD``; ``admin@bench.invalid`` is an admin.
+
+    python bench/seed.py --database eventease_bench --users 2000 --events 500 --registrations 50000
+
+Refuses to touch the database named in DB_NAME unless ``--force`` is given.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'benchpass'
+ADMIN_EMAIL = 'admin@bench.invalid'
+BATCH = 5000
+
+
+def user_email(i):
+    return f'user{i}@bench.invalid'
+
+
+def connect(database):
+    import MySQLdb
+    import config
+    return MySQLdb.connect(host=config.DB_HOST or 'localhost', port=config.DB_PORT, user=config.DB_USER,
+                           passwd=config.DB_PASSWORD or '', db=database)
+
+
+def insert_batched(cur, conn, sql, rows):
+    for i in range(0, len(rows), BATCH):
+        cur.executemany(sql, rows[i:i + BATCH])
+        conn.commit()
+
+
+def seed(database, users, events, registrations, rng=None):
+    from passwords import PasswordHasher
+    import config
+    import migrate
+
+    rng = rng or random.Random(42)
+    conn = connect(database)
+    migrate.upgrade(conn)
+    cur = conn.cursor()
+
+    cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in ('user_timeline', 'waitlist', 'registrations', 'events', 'registrations_archive', 'events_archive',
+                  'users', 'email_outbox'):
+        cur.execute(f"TRUNCATE TABLE {table}")
+    cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+    hashed = PasswordHasher.from_object(config).hash(PASSWORD)
+    user_rows = [('bench-admin', ADMIN_EMAIL, hashed, 'admin', 1)]
+    user_rows += [(f'user{i}', user_email(i), hashed, 'user', 0) for i in range(1, users + 1)]
+    insert_batched(cur, conn, "INSERT INTO users (username, email, password, role, is_admin) "
+                              "VALUES (%s, %s, %s, %s, %s)", user_rows)
+
+    today = date.today()
+    event_rows = [
+        (f'Bench event {i}', today + timedelta(days=rng.randint(-365, 365)),
+         f'Hall {i % 20}', f'Synthetic event number {i}.', 10 ** 9)
+        for i in range(1, events + 1)
+    ]
+    insert_batched(cur, conn, "INSERT INTO events (title, date, location, description, capacity) "
+                              "VALUES (%s, %s, %s, %s, %s)", event_rows)
+
+    # Unique (user_id, event_id) pairs; user ids start at 2 after the admin
+    registrations = min(registrations, users * events)
+    pairs = set()
+    while len(pairs) < registrations:
+        pairs.add((rng.randint(2, users + 1), rng.randint(1, events)))
+    reg_rows = [
+        (user_id, event_id, f'user{user_id - 1}', user_email(user_id - 1), '9876543210',
+         rng.choice(('Pending', 'Approved')))
+        for user_id, event_id in pairs
+    ]
+    insert_batched(cur, conn, "INSERT INTO registrations (user_id, event_id, name, email, phone, status) "
+                              "VALUES (%s, %s, %s, %s, %s, %s)", reg_rows)
+
+    cur.execute("""
+        UPDATE events e
+        SET registered_count = (SELECT COUNT(*) FROM registrations r WHERE r.event_id = e.id),
+            pending_count = (SELECT COUNT(*) FROM registrations r
+                             WHERE r.event_id = e.id AND r.status = 'Pending'),
+            approved_count = (SELECT COUNT(*) FROM registrations r
+                              WHERE r.event_id = e.id AND r.status = 'Approved')
+    """)
+    cur.execute("""
+        INSERT INTO user_timeline (user_id, event_date, reg_id, event_id, title, location, status)
+        SELECT r.user_id, e.date, r.id, r.event_id, e.title, e.location, r.status
+        FROM registrations r
+        JOIN events e ON e.id = r.event_id
+    """)
+    cur.execute("ANALYZE TABLE users, events, registrations, user_timeline")
+    cur.fetchall()
+    conn.commit()
+    conn.close()
+    return {'users': users, 'events': events, 'registrations': registrations}
+
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--registrations', type=int, default=50000)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+
+    if args.database == config.DB_NAME and not args.force:
+        parser.error(f"{args.database} is the app database (DB_NAME); pass --force to wipe it")
+
+    started = time.perf_counter()
+    counts = seed(args.database, args.users, args.events, args.registrations)
+    print(f"Seeded {counts} into {args.database} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Side-by-side load test of the WSGI and async (gevent) serving modes.
+
+Starts gunicorn against the seeded benchmark database twice: once with
+sync workers on ``app:create_app()``, once with gevent workers on ``async_app:app``.
+Both get the same worker count. Each run drives the I/O-bound scenarios from
+bench/run.py at ``--concurrency`` clients (1000 by default) and writes one
+result file per mode in run.py's format, so the two can be diffed with
+bench/compare.py. RSS is the summed peak of the gunicorn processes.
+
+    python bench/seed.py --database eventease_bench
+    python bench/serving_modes.py --database eventease_bench --workers 4 \\
+        --output-dir bench/results/serving
+    python bench/compare.py bench/results/serving/wsgi.json bench/results/serving/async.json
+
+The client opens one thread per concurrent connection; raise ``ulimit -n``
+to well above ``--concurrency`` on both sides first. register_event writes
+data, so re-seed between runs if you want identical starting points.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import run  # noqa: E402
+
+SCENARIO_NAMES = ('home', 'home.user', 'registrations', 'registrations.filtered', 'register_event')
+
+
+def gunicorn_command(mode, args):
+    cmd = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers),
+           '-b', f'127.0.0.1:{args.port}', '--backlog', str(max(2048, args.concurrency * 2)),
+           '--timeout', '120', '--log-level', 'warning', '--chdir', ROOT]
+    if mode == 'async':
+        return cmd + ['-k', 'gevent', '--worker-connections', str(args.concurrency), 'async_app:app']
+    return cmd + ['app:create_app()']
+
+
+def wait_until_up(base_url, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {proc.returncode}")
+        try:
+            with urllib.request.urlopen(base_url + '/auth/login', timeout=2):
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise SystemExit(f"server at {base_url} did not come up within {timeout}s")
+
+
+def process_tree(pid):
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending += [int(child) for child in f.read().split()]
+        except OSError:
+            pass
+    return pids
+
+
+def peak_rss_mb(pid):
+    """Summed VmHWM of the gunicorn master and its workers (Linux only)."""
+    total_kb = 0
+    for proc_pid in process_tree(pid):
+        try:
+            with open(f'/proc/{proc_pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return total_kb / 1024
+
+
+def bench_mode(mode, args, counts):
+    base_url = f'http://127.0.0.1:{args.port}'
+    env = dict(os.environ, DB_NAME=args.database,
+               SECRET_KEY=os.environ.get('SECRET_KEY') or 'bench-secret',
+               MYSQL_POOL_MAX_SIZE=str(args.pool_size), **run.admission_env(args))
+    proc = subprocess.Popen(gunicorn_command(mode, args), env=env, cwd=ROOT)
+    from seed import connect
+    stats_conn = connect(args.database)
+    results = {
+        'meta': {
+            'commit': run.git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': sys.version.split()[0],
+            'mode': mode,
+            'workers': args.workers,
+            'pool_size': args.pool_size,
+            'dataset': counts,
+            'concurrency': args.concurrency,
+            'requests_per_scenario': args.requests,
+        },
+        'scenarios': {},
+    }
+    try:
+        wait_until_up(base_url, proc)
+        for scenario in run.SCENARIOS:
+            if scenario[0] not in SCENARIO_NAMES:
+                continue
+            result = run.run_scenario(base_url, scenario, args, counts, stats_conn,
+                                      rss_mb=lambda: peak_rss_mb(proc.pid))
+            results['scenarios'][scenario[0]] = result
+            print(f"{mode:<6} {scenario[0]:<24} p50 {result['p50_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  "
+                  f"{result['throughput_rps']:8.1f} req/s  errors {result['errors']}")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        stats_conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True, help="seeded benchmark database (see bench/seed.py)")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--registrations', type=int, default=50000)
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=5000, help="requests per scenario")
+    parser.add_argument('--sessions', type=int, default=50, help="distinct logged-in clients per scenario")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--pool-size', type=int, default=50, help="MYSQL_POOL_MAX_SIZE per worker")
+    parser.add_argument('--modes', nargs='*', default=['wsgi', 'async'], choices=['wsgi', 'async'])
+    parser.add_argument('--admission', action='store_true', help="keep admission control (rate limits) on")
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--output-dir', help="write <mode>.json files here")
+    args = parser.parse_args()
+
+    counts = {'users': args.users, 'events': args.events, 'registrations': args.registrations}
+    for mode in args.modes:
+        results = bench_mode(mode, args, counts)
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            path = os.path.join(args.output_dir, f'{mode}.json')
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""Startup cost of the app: import time, time to first response and per-worker memory.
+
+Everything is measured in fresh processes:
+
+import
+    ``import app`` and ``create_app()`` timed separately in a new
+    interpreter, ``--repeat`` times (median reported), plus the slowest
+    modules from ``python -X importtime``.
+first response
+    gunicorn started with ``--workers`` sync workers, with and without
+    ``--preload``: time from spawn until ``/auth/login`` (no database) and
+    ``/`` (first pooled connection) answer.
+worker boot
+    Time from ``fork()`` to a worker being ready to accept, for the initial
+    workers and for one more added with ``SIGTTIN`` the way an autoscaler
+    would, taken from gunicorn's ``post_fork``/``post_worker_init`` hooks.
+memory
+    RSS and PSS of the master and each worker once warm, from
+    ``/proc/<pid>/smaps_rollup`` (Linux only). PSS splits pages shared
+    copy-on-write with a preloading master between the processes sharing
+    them, so it is the number to compare.
+
+    python bench/seed.py --database eventease_bench
+    python bench/startup.py --database eventease_bench --workers 4 --output bench/results/startup.json
+"""
+
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from serving_modes import process_tree  # noqa: E402
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print((imported - started) * 1000, (created - imported) * 1000)
+"""
+
+# gunicorn config: log each worker's fork -> ready time
+HOOKS = """
+import os
+import time
+
+def post_fork(server, worker):
+    worker.bench_forked_at = time.perf_counter()
+
+def post_worker_init(worker):
+    with open(os.environ['STARTUP_BENCH_LOG'], 'a') as f:
+        f.write(f"{os.getpid()} {(time.perf_counter() - worker.bench_forked_at) * 1000:.3f}\\n")
+"""
+
+
+def bench_env(args):
+    return dict(os.environ, DB_NAME=args.database, SECRET_KEY=os.environ.get('SECRET_KEY') or 'bench-secret')
+
+
+def time_imports(args):
+    imports, creates = [], []
+    for _ in range(args.repeat):
+        out = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], env=bench_env(args), cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        imported, created = map(float, out.split())
+        imports.append(imported)
+        creates.append(created)
+    return {'import_ms': statistics.median(imports), 'create_app_ms': statistics.median(creates)}
+
+
+def slowest_imports(args):
+    """``(module, cumulative_ms)`` for the costliest top-level imports of ``import app``."""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], env=bench_env(args), cwd=ROOT,
+                         capture_output=True, text=True, check=True).stderr
+    found = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split(':', 1)[1].split('|')
+        found.append((name.rstrip(), int(cumulative) / 1000))
+    # Nesting is shown by indentation; the least indented entries are app's own imports
+    depth = min((len(name) - len(name.lstrip()) for name, _ in found), default=0)
+    top = [(name.strip(), ms) for name, ms in found if len(name) - len(name.lstrip()) == depth]
+    return sorted(top, key=lambda item: -item[1])[:args.top]
+
+
+def wait_for(url, proc, started, timeout=60):
+    """Milliseconds from ``started`` until ``url`` answers."""
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return (time.perf_counter() - started) * 1000
+        except urllib.error.HTTPError:
+            return (time.perf_counter() - started) * 1000
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.005)
+    raise SystemExit(f"{url} did not answer within {timeout}s")
+
+
+def read_boots(path, count, timeout=60):
+    """Wait for ``count`` worker boot records; returns ``{pid: ms}``."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(path) as f:
+                boots = {int(pid): float(ms) for pid, ms in (line.split() for line in f if line.strip())}
+        except OSError:
+            boots = {}
+        if len(boots) >= count:
+            return boots
+        time.sleep(0.01)
+    raise SystemExit(f"only {len(boots)} of {count} workers reported ready within {timeout}s")
+
+
+def memory_mb(pid):
+    """``(rss, pss)`` of one process in MB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key] = int(rest.split()[0]) / 1024
+    return values.get('Rss', 0.0), values.get('Pss', 0.0)
+
+
+def bench_server(preload, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        hooks, log = os.path.join(tmp, 'hooks.py'), os.path.join(tmp, 'boots.log')
+        with open(hooks, 'w') as f:
+            f.write(HOOKS)
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', hooks, '-w', str(args.workers),
+               '-b', f'127.0.0.1:{args.port}', '--log-level', 'warning', '--chdir', ROOT]
+        if preload:
+            cmd.append('--preload')
+        cmd.append('app:create_app()')
+
+        base_url = f'http://127.0.0.1:{args.port}'
+        started = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=dict(bench_env(args), STARTUP_BENCH_LOG=log), cwd=ROOT)
+        try:
+            result = {
+                'first_response_ms': wait_for(base_url + '/auth/login', proc, started),
+                'first_db_response_ms': wait_for(base_url + '/', proc, started),
+            }
+            boots = read_boots(log, args.workers)
+            result['worker_boot_ms'] = statistics.median(boots.values())
+
+            # Warm every worker a little before measuring memory
+            for _ in range(args.workers * 20):
+                wait_for(base_url + '/', proc, time.perf_counter())
+            workers = [pid for pid in process_tree(proc.pid) if pid != proc.pid]
+            master_rss, master_pss = memory_mb(proc.pid)
+            per_worker = [memory_mb(pid) for pid in workers]
+            result.update(
+                master_rss_mb=master_rss,
+                master_pss_mb=master_pss,
+                worker_rss_mb=statistics.mean(rss for rss, _ in per_worker),
+                worker_pss_mb=statistics.mean(pss for _, pss in per_worker),
+                total_pss_mb=master_pss + sum(pss for _, pss in per_worker),
+            )
+
+            # One more worker, as an autoscaler adding capacity would get it
+            os.kill(proc.pid, signal.SIGTTIN)
+            scaled = read_boots(log, args.workers + 1)
+            result['scale_up_boot_ms'] = next(ms for pid, ms in scaled.items() if pid not in boots)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True, help="seeded benchmark database (see bench/seed.py)")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=10, help="fresh interpreters for the import timing")
+    parser.add_argument('--top', type=int, default=10, help="slowest imports to list")
+    parser.add_argument('--port', type=int, default=5057)
+    parser.add_argument('--output', help="write results JSON here")
+    args = parser.parse_args()
+
+    results = {'imports': time_imports(args), 'slowest_imports': slowest_imports(args), 'servers': {}}
+    print(f"import app     {results['imports']['import_ms']:8.1f} ms")
+    print(f"create_app()   {results['imports']['create_app_ms']:8.1f} ms")
+    for name, ms in results['slowest_imports']:
+        print(f"  {name:<30} {ms:8.1f} ms")
+
+    for preload in (False, True):
+        mode = 'preload' if preload else 'no-preload'
+        result = results['servers'][mode] = bench_server(preload, args)
+        print(f"{mode:<11} first response {result['first_response_ms']:7.1f} ms  "
+              f"first db response {result['first_db_response_ms']:7.1f} ms  "
+              f"worker boot {result['worker_boot_ms']:6.1f} ms  scale-up boot {result['scale_up_boot_ms']:6.1f} ms  "
+              f"worker RSS {result['worker_rss_mb']:6.1f} MB  PSS {result['worker_pss_mb']:6.1f} MB  "
+              f"total PSS {result['total_pss_mb']:6.1f} MB")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
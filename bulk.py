@@ -0,0 +1,215 @@
+# bulk.py
+
+import csv
+import io
+import json
+from datetime import date
+
+import MySQLdb.cursors
+
+import event_stats
+import outbox
+import timeline
+from reservations import retry_on_deadlock
+
+EVENT_FIELDS = ('title', 'date', 'location', 'description', 'capacity')
+
+# Rows per executemany/commit when importing, ids per IN (...) list
+IMPORT_BATCH_SIZE = 1000
+ID_CHUNK_SIZE = 1000
+
+# Keep the import report readable
+MAX_REPORTED_ERRORS = 50
+
+
+def iter_event_rows(stream, filename):
+    """Yield ``(line_number, dict)`` from an uploaded CSV, JSON Lines or JSON file.
+
+    CSV and JSON Lines are read incrementally; a plain JSON array has to be
+    parsed whole.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    name = (filename or '').lower()
+
+    if name.endswith('.csv'):
+        for line, row in enumerate(csv.DictReader(text), start=2):
+            yield line, row
+    elif name.endswith('.jsonl') or name.endswith('.ndjson'):
+        for line, raw in enumerate(text, start=1):
+            if raw.strip():
+                try:
+                    yield line, json.loads(raw)
+                except ValueError:
+                    yield line, None
+    elif name.endswith('.json'):
+        for line, row in enumerate(json.load(text), start=1):
+            yield line, row
+    else:
+        raise ValueError("Upload a .csv, .json or .jsonl file.")
+
+
+def validate_event(row):
+    """Return ``(values, None)`` ready for INSERT, or ``(None, error)``."""
+    if not isinstance(row, dict):
+        return None, "not an object"
+
+    # Only a missing or null field is empty: JSON ``"capacity": 0`` is a capacity, not "unlimited"
+    values = {field: '' if row.get(field) is None else str(row.get(field)).strip() for field in EVENT_FIELDS}
+    missing = [field for field in ('title', 'date', 'location') if not values[field]]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    try:
+        event_date = date.fromisoformat(values['date'])
+    except ValueError:
+        return None, f"bad date {values['date']!r} (expected YYYY-MM-DD)"
+
+    capacity = None
+    if values['capacity']:
+        if not values['capacity'].isdigit():
+            return None, f"bad capacity {values['capacity']!r}"
+        capacity = int(values['capacity'])
+
+    return (values['title'], event_date, values['location'], values['description'], capacity), None
+
+
+def import_events(conn, rows, batch_size=IMPORT_BATCH_SIZE):
+    """Validate and insert events from ``iter_event_rows`` in batched transactions.
+
+    Invalid rows are skipped and reported; valid ones are committed every
+    ``batch_size`` rows.
+    """
+    cur = conn.cursor()
+    sql = """
+        INSERT INTO events (title, date, location, description, capacity)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    batch, imported, errors, rejected = [], 0, [], 0
+
+    def flush():
+        nonlocal imported
+        if batch:
+            cur.executemany(sql, batch)
+            conn.commit()
+            imported += len(batch)
+            batch.clear()
+
+    for line, row in rows:
+        values, error = validate_event(row)
+        if error:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"line {line}: {error}")
+            continue
+        batch.append(values)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    cur.close()
+    return {'imported': imported, 'rejected': rejected, 'errors': errors}
+
+
+def _chunks(ids):
+    for i in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[i:i + ID_CHUNK_SIZE]
+
+
+def _in_list(ids):
+    return ', '.join(['%s'] * len(ids))
+
+
+def _lock_events(conn, reg_ids):
+    """Lock the events of ``reg_ids`` in id order, before any of the registrations.
+
+    Every writer that touches both takes the event row first (see
+    reservations.py), so bulk actions queue behind registrations for the same
+    events instead of deadlocking with them.
+    """
+    cur = conn.cursor()
+    event_ids = set()
+    # A registration never moves to another event, so this needs no lock
+    for chunk in _chunks(reg_ids):
+        cur.execute(f"SELECT DISTINCT event_id FROM registrations WHERE id IN ({_in_list(chunk)})", chunk)
+        event_ids.update(row[0] for row in cur.fetchall())
+    for chunk in _chunks(sorted(event_ids)):
+        cur.execute(f"SELECT id FROM events WHERE id IN ({_in_list(chunk)}) ORDER BY id FOR UPDATE", chunk)
+        cur.fetchall()
+    cur.close()
+
+
+def approve_registrations(conn, reg_ids):
+    """Approve many registrations and queue their emails in one transaction.
+
+    Returns how many registrations changed state; ones already approved are
+    left alone and not emailed twice. A deadlock is retried.
+    """
+    return retry_on_deadlock(conn, _approve_registrations, conn, reg_ids)
+
+
+def _approve_registrations(conn, reg_ids):
+    _lock_events(conn, reg_ids)
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    approved = 0
+    for chunk in _chunks(reg_ids):
+        cur.execute(f"""
+            SELECT registrations.id, registrations.event_id, registrations.status,
+                   users.email, users.username, events.title
+            FROM registrations
+            JOIN users ON registrations.user_id = users.id
+            JOIN events ON registrations.event_id = events.id
+            WHERE registrations.id IN ({_in_list(chunk)}) AND registrations.status <> 'Approved'
+            FOR UPDATE
+        """, chunk)
+        rows = cur.fetchall()
+        if not rows:
+            continue
+
+        ids = [row['id'] for row in rows]
+        cur.execute(f"UPDATE registrations SET status = 'Approved' WHERE id IN ({_in_list(ids)})", ids)
+        moved = {}
+        for row in rows:
+            key = (row['event_id'], row['status'])
+            moved[key] = moved.get(key, 0) + 1
+        for (event_id, status), count in moved.items():
+            event_stats.status_changed(cur, event_id, status, 'Approved', count)
+        timeline.status_changed(cur, ids, 'Approved')
+        outbox.enqueue_many(conn, [
+            (row['email'], 'Event Registration Approved',
+             f"Hello {row['username']},\n\nYour registration for the event '{row['title']}' has been approved.\n\nThank you!")
+            for row in rows
+        ])
+        approved += len(ids)
+    conn.commit()
+    cur.close()
+    return approved
+
+
+def delete_registrations(conn, reg_ids):
+    """Delete many registrations and give their seats back in one transaction.
+
+    Returns ``{event_id: seats_released}``. A deadlock is retried.
+    """
+    return retry_on_deadlock(conn, _delete_registrations, conn, reg_ids)
+
+
+def _delete_registrations(conn, reg_ids):
+    _lock_events(conn, reg_ids)
+    cur = conn.cursor()
+    released = {}
+    for chunk in _chunks(reg_ids):
+        cur.execute(f"""
+            SELECT event_id, status, COUNT(*) FROM registrations
+            WHERE id IN ({_in_list(chunk)})
+            GROUP BY event_id, status
+            FOR UPDATE
+        """, chunk)
+        per_event = cur.fetchall()
+        if not per_event:
+            continue
+        timeline.removing(cur, chunk)
+        cur.execute(f"DELETE FROM registrations WHERE id IN ({_in_list(chunk)})", chunk)
+        for event_id, status, count in per_event:
+            event_stats.removed(cur, event_id, status, count)
+            released[event_id] = released.get(event_id, 0) + count
+    conn.commit()
+    cur.close()
+    return released
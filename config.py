@@ -4,3 +4,96 @@ DB_HOST = os.environ.get("DB_HOST")
 DB_USER = os.environ.get("DB_USER")
 DB_PASSWORD = os.environ.get("DB_PASSWORD")
 DB_NAME = os.environ.get("DB_NAME")
+DB_PORT = int(os.environ.get("DB_PORT", 3306))
+
+# Signs the session cookie; must be the same across all workers
+SECRET_KEY = os.environ.get("SECRET_KEY")
+
+# Home page event catalog
+EVENT_CACHE_TTL = int(os.environ.get("EVENT_CACHE_TTL", 60))  # seconds
+EVENTS_PER_PAGE = int(os.environ.get("EVENTS_PER_PAGE", 12))
+
+# Email outbox worker (see outbox.py)
+OUTBOX_WORKERS = int(os.environ.get("OUTBOX_WORKERS", 2))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 2))  # seconds
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_BACKOFF_BASE = int(os.environ.get("OUTBOX_BACKOFF_BASE", 30))  # seconds, doubled per attempt
+
+# load_user identity cache (see user_cache.py)
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 300))  # seconds
+# Carry id/username/email/role in the signed session cookie so load_user needs no lookup at all
+USER_SESSION_IDENTITY = os.environ.get("USER_SESSION_IDENTITY", "0") == "1"
+
+# MySQL connection pool (see db_pool.py)
+MYSQL_HOST = DB_HOST or "localhost"
+MYSQL_USER = DB_USER
+MYSQL_PASSWORD = DB_PASSWORD
+MYSQL_DB = DB_NAME
+MYSQL_PORT = DB_PORT
+MYSQL_POOL_MIN_SIZE = int(os.environ.get("MYSQL_POOL_MIN_SIZE", 2))
+MYSQL_POOL_MAX_SIZE = int(os.environ.get("MYSQL_POOL_MAX_SIZE", 10))
+MYSQL_POOL_TIMEOUT = float(os.environ.get("MYSQL_POOL_TIMEOUT", 10))  # seconds
+MYSQL_POOL_RECYCLE = int(os.environ.get("MYSQL_POOL_RECYCLE", 3600))  # seconds
+MYSQL_POOL_PING_AFTER = float(os.environ.get("MYSQL_POOL_PING_AFTER", 30))  # seconds idle
+
+# Read replicas for mysql.read_connection (see db_router.py), e.g. "db-replica-1:3306,db-replica-2"
+MYSQL_REPLICAS = os.environ.get("MYSQL_REPLICAS", "")
+MYSQL_REPLICA_MAX_LAG = float(os.environ.get("MYSQL_REPLICA_MAX_LAG", 5))  # seconds
+MYSQL_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("MYSQL_REPLICA_LAG_CHECK_INTERVAL", 5))  # seconds
+MYSQL_READ_YOUR_WRITES_SECONDS = float(os.environ.get("MYSQL_READ_YOUR_WRITES_SECONDS", 5))
+
+# SQL instrumentation (see sql_profiler.py)
+SQL_PROFILER_ENABLED = os.environ.get("SQL_PROFILER_ENABLED", "0") == "1"
+SQL_SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", 200))
+SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", 5))
+
+# Admin dashboard / per-event counters (see event_stats.py)
+ADMIN_PENDING_LIMIT = int(os.environ.get("ADMIN_PENDING_LIMIT", 20))
+STATS_RECONCILE_BATCH_SIZE = int(os.environ.get("STATS_RECONCILE_BATCH_SIZE", 500))
+
+# Waitlist promotions per transaction (see waitlist.py)
+WAITLIST_PROMOTE_BATCH_SIZE = int(os.environ.get("WAITLIST_PROMOTE_BATCH_SIZE", 100))
+
+# Per-user calendar feed (see timeline.py)
+TIMELINE_FEED_TTL = int(os.environ.get("TIMELINE_FEED_TTL", 300))  # seconds a feed's ETag is trusted without a query
+TIMELINE_FEED_CACHE_SIZE = int(os.environ.get("TIMELINE_FEED_CACHE_SIZE", 10000))
+TIMELINE_FEED_PAST_DAYS = int(os.environ.get("TIMELINE_FEED_PAST_DAYS", 30))  # past events kept in the feed
+
+# Archival of finished events (see archive.py); keep ARCHIVE_AFTER_DAYS above TIMELINE_FEED_PAST_DAYS
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 60))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 1000))  # registrations moved per transaction
+ARCHIVE_BATCH_PAUSE = float(os.environ.get("ARCHIVE_BATCH_PAUSE", 0.05))  # seconds between batches
+
+# Autocomplete prefix index (see search.py)
+SEARCH_INDEX_TTL = int(os.environ.get("SEARCH_INDEX_TTL", 300))  # seconds
+SEARCH_INDEX_MAX_ITEMS = int(os.environ.get("SEARCH_INDEX_MAX_ITEMS", 50000))  # newest events/users indexed
+
+# Admission control for login/signup/registration POSTs (see admission.py)
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_RULES = os.environ.get("ADMISSION_RULES")  # None = admission.DEFAULT_RULES
+ADMISSION_STORE_URL = os.environ.get("ADMISSION_STORE_URL")  # e.g. redis://localhost:6379/0
+ADMISSION_MAX_INFLIGHT = int(os.environ.get("ADMISSION_MAX_INFLIGHT", 0))  # 0 = MYSQL_POOL_MAX_SIZE - 2
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", 16))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 0.5))  # seconds
+
+# Background registration exports (see export_jobs.py); EXPORT_DIR defaults to instance/exports
+EXPORT_DIR = os.environ.get("EXPORT_DIR")
+EXPORT_PROCESSES = int(os.environ.get("EXPORT_PROCESSES", 2))
+EXPORT_POLL_INTERVAL = float(os.environ.get("EXPORT_POLL_INTERVAL", 2))  # seconds
+EXPORT_TTL = int(os.environ.get("EXPORT_TTL", 86400))  # seconds a finished file stays downloadable
+EXPORT_JOB_TIMEOUT = int(os.environ.get("EXPORT_JOB_TIMEOUT", 3600))  # seconds before a running job is given up
+EXPORT_CLEANUP_INTERVAL = int(os.environ.get("EXPORT_CLEANUP_INTERVAL", 300))  # seconds
+
+# Event image uploads (see images.py); defaults to static/images/events
+EVENT_IMAGE_DIR = os.environ.get("EVENT_IMAGE_DIR")
+MAX_CONTENT_LENGTH = int(os.environ.get("MAX_UPLOAD_MB", 64)) * 1024 * 1024
+
+# Password hashing (see passwords.py): scrypt, pbkdf2 or bcrypt, plus the cost for each
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+PASSWORD_SCRYPT_N = int(os.environ.get("PASSWORD_SCRYPT_N", 2 ** 15))
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", 600000))
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get("PASSWORD_BCRYPT_ROUNDS", 12))
+# Hashes computed at once per worker process; further logins queue behind them
+PASSWORD_HASH_THREADS = int(os.environ.get("PASSWORD_HASH_THREADS", os.cpu_count() or 2))
@@ -0,0 +1,78 @@
+# count_cache.py
+
+import threading
+import time
+
+from flask import current_app
+
+# Distinct filter combinations remembered at once
+MAX_CACHED_COUNTS = 512
+
+
+class CountCache:
+    """Stale-while-revalidate cache for expensive ``COUNT(*)`` totals.
+
+    The first request for a key pays for the count. After that, a value
+    older than the TTL is still returned immediately while a background
+    thread recomputes it, so list pages never wait on the count again.
+    """
+
+    def __init__(self, ttl_setting='REGISTRATION_COUNT_TTL', default_ttl=30):
+        self.ttl_setting = ttl_setting
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._values = {}
+        self._refreshing = set()
+
+    def get(self, key, loader):
+        """Return the cached total for ``key``, computing it with ``loader()`` if needed.
+
+        ``loader`` runs inside an app context, either this request's or the
+        refresh thread's.
+        """
+        with self._lock:
+            cached = self._values.get(key)
+
+        if cached is None:
+            value = loader()
+            self._store(key, value)
+            return value
+
+        refreshed_at, value = cached
+        ttl = current_app.config.get(self.ttl_setting, self.default_ttl)
+        if time.monotonic() - refreshed_at > ttl:
+            self._refresh_async(key, loader)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._values.clear()
+
+    def _store(self, key, value):
+        with self._lock:
+            if len(self._values) >= MAX_CACHED_COUNTS and key not in self._values:
+                self._values.clear()
+            self._values[key] = (time.monotonic(), value)
+
+    def _refresh_async(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    self._store(key, loader())
+            except Exception as e:
+                app.logger.warning("Count refresh for %s failed: %s", key, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+registration_counts = CountCache()
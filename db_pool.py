@@ -0,0 +1,406 @@
+# db_pool.py
+"""Pooled drop-in replacement for ``flask_mysqldb.MySQL``.
+
+Routes keep using ``mysql.connection.cursor(...)``. The first access in an
+app context checks a connection out of a per-process pool and the app
+context teardown hands it back, instead of opening and closing a fresh
+MySQL connection every time.
+
+Reads the same ``MYSQL_*`` settings as Flask-MySQLdb, plus:
+
+``MYSQL_POOL_MIN_SIZE`` / ``MYSQL_POOL_MAX_SIZE``
+    Connections opened up front / hard cap per process.
+``MYSQL_POOL_TIMEOUT``
+    Seconds to wait for a free connection before raising ``PoolTimeout``.
+``MYSQL_POOL_RECYCLE``
+    Connections older than this many seconds are replaced on checkout.
+``MYSQL_POOL_PING_AFTER``
+    Connections idle longer than this are pinged on checkout (0 = always).
+``MYSQL_REPLICAS``
+    Optional read replicas for ``mysql.read_connection`` (see db_router.py).
+``MYSQL_READ_YOUR_WRITES_SECONDS``
+    How long a client's reads stay on the primary after it commits.
+"""
+
+import os
+import threading
+import time
+import weakref
+from collections import deque
+
+import MySQLdb
+import MySQLdb.connections
+from flask import current_app, g, has_app_context, has_request_context, session
+
+import metrics
+from db_router import Replica, ReplicaRouter, parse_replicas
+from sql_profiler import ProfiledCursorMixin
+
+# Window for the checkouts-per-second metric
+RATE_WINDOW_SECONDS = 60
+
+# Session key holding the time until which this client's reads stay on the primary
+READ_PRIMARY_UNTIL = '_read_primary_until'
+
+# Connections a forked child inherited from its parent. They are kept referenced,
+# never closed: closing one would send COM_QUIT down a socket the parent still uses.
+_inherited = []
+
+
+class PoolTimeout(Exception):
+    """No connection became free within ``MYSQL_POOL_TIMEOUT``."""
+
+
+class _Entry:
+    __slots__ = ('conn', 'created_at', 'returned_at')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = self.returned_at = time.monotonic()
+
+
+class ConnectionPool:
+    def __init__(self, connect, min_size=2, max_size=10, timeout=10, recycle=3600, ping_after=30):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        # Connections are never shared across fork(); each process starts empty
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self._started_at = time.monotonic()
+        self._recent_checkouts = deque()
+        self.counters = dict(checkouts=0, created=0, recycled=0, failed_health_checks=0,
+                             timeouts=0, wait_seconds_total=0.0, wait_seconds_max=0.0)
+
+    def acquire(self):
+        if self._pid != os.getpid():
+            self.after_fork()
+        if self._size < self.min_size:
+            self._fill()
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        entry = None
+        with self._cond:
+            while entry is None:
+                if self._idle:
+                    entry = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    break
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        raise PoolTimeout(f"no MySQL connection free after {self.timeout}s")
+                    self._waiting += 1
+                    self._cond.wait(remaining)
+                    self._waiting -= 1
+
+        if entry is None:
+            entry = self._open()
+        else:
+            entry = self._check(entry)
+
+        now = time.monotonic()
+        waited = now - started
+        with self._cond:
+            self._in_use[id(entry.conn)] = entry
+            self.counters['checkouts'] += 1
+            self.counters['wait_seconds_total'] += waited
+            self.counters['wait_seconds_max'] = max(self.counters['wait_seconds_max'], waited)
+            self._recent_checkouts.append(now)
+        return entry.conn
+
+    def after_fork(self):
+        """Start empty in a forked child: the parent's lock state and sockets aren't ours to use."""
+        _inherited.extend(entry.conn for entry in self._idle)
+        _inherited.extend(entry.conn for entry in self._in_use.values())
+        self._cond = threading.Condition()
+        self._reset()
+
+    def release(self, conn):
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            return
+        try:
+            # Don't leak an open transaction to the next borrower
+            conn.rollback()
+        except MySQLdb.Error:
+            self._discard(entry)
+            return
+        entry.returned_at = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._cond:
+            while self._recent_checkouts and now - self._recent_checkouts[0] > RATE_WINDOW_SECONDS:
+                self._recent_checkouts.popleft()
+            window = min(RATE_WINDOW_SECONDS, max(now - self._started_at, 1e-9))
+            checkouts = self.counters['checkouts']
+            return dict(
+                self.counters,
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                waiting=self._waiting,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                checkouts_per_second=len(self._recent_checkouts) / window,
+                wait_seconds_avg=self.counters['wait_seconds_total'] / checkouts if checkouts else 0.0,
+            )
+
+    def _fill(self):
+        with self._cond:
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            try:
+                entry = self._open()
+            except MySQLdb.Error:
+                continue
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def _open(self):
+        try:
+            entry = _Entry(self.connect())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.counters['created'] += 1
+        return entry
+
+    def _check(self, entry):
+        """Health-check a connection coming off the idle list, replacing it if needed."""
+        now = time.monotonic()
+        if self.recycle and now - entry.created_at > self.recycle:
+            self.counters['recycled'] += 1
+            return self._replace(entry)
+        if now - entry.returned_at >= self.ping_after:
+            try:
+                entry.conn.ping()
+            except MySQLdb.Error:
+                self.counters['failed_health_checks'] += 1
+                return self._replace(entry)
+        return entry
+
+    def _replace(self, entry):
+        try:
+            entry.conn.close()
+        except MySQLdb.Error:
+            pass
+        return self._open()
+
+    def _discard(self, entry):
+        try:
+            entry.conn.close()
+        except MySQLdb.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+class ReplicaConnection(ProfiledCursorMixin, MySQLdb.connections.Connection):
+    pass
+
+
+class PrimaryConnection(ProfiledCursorMixin, MySQLdb.connections.Connection):
+    """Primary connection that pins the client's follow-up reads to the primary after a commit."""
+
+    def commit(self):
+        super().commit()
+        if has_request_context():
+            g._mysql_wrote = True
+            window = current_app.config.get('MYSQL_READ_YOUR_WRITES_SECONDS', 5)
+            session[READ_PRIMARY_UNTIL] = time.time() + window
+
+
+def connect_kwargs(config):
+    """``MySQLdb.connect()`` arguments for the primary, from the ``MYSQL_*`` settings."""
+    kwargs = dict(
+        host=config.get('MYSQL_HOST') or 'localhost',
+        user=config.get('MYSQL_USER') or '',
+        passwd=config.get('MYSQL_PASSWORD') or '',
+        port=config.get('MYSQL_PORT', 3306),
+        connect_timeout=config.get('MYSQL_CONNECT_TIMEOUT', 10),
+        use_unicode=config.get('MYSQL_USE_UNICODE', True),
+        charset=config.get('MYSQL_CHARSET', 'utf8mb4'),
+        autocommit=config.get('MYSQL_AUTOCOMMIT', False),
+    )
+    for setting, arg in (('MYSQL_DB', 'db'), ('MYSQL_UNIX_SOCKET', 'unix_socket'),
+                         ('MYSQL_READ_DEFAULT_FILE', 'read_default_file'),
+                         ('MYSQL_SQL_MODE', 'sql_mode'), ('MYSQL_CURSORCLASS', 'cursorclass')):
+        if config.get(setting):
+            kwargs[arg] = config[setting]
+    kwargs.update(config.get('MYSQL_CUSTOM_OPTIONS') or {})
+    return kwargs
+
+
+class AppPools:
+    """One app's primary pool and optional replica router, kept in ``app.extensions['mysql']``."""
+
+    def __init__(self, pool, router=None):
+        self.pool = pool
+        self.router = router
+
+    def all(self):
+        """``(name, pool)`` for the primary and every replica."""
+        pools = [('primary', self.pool)]
+        if self.router is not None:
+            pools += [(r.name, r.pool) for r in self.router.replicas]
+        return pools
+
+
+class PooledMySQL:
+    """The ``mysql`` extension; each app it is initialized on gets its own pools.
+
+    The metrics collector and the fork hook belong to this object, not to an
+    app, so they are registered once however many apps ``create_app()``
+    builds.
+    """
+
+    def __init__(self, app=None):
+        self._apps = weakref.WeakSet()
+        metrics.register(self.collect)
+        # A preloaded master's pools must not leak into its forked workers
+        os.register_at_fork(after_in_child=self.after_fork)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        kwargs = connect_kwargs(config)
+
+        pool_options = dict(
+            min_size=config.get('MYSQL_POOL_MIN_SIZE', 2),
+            max_size=config.get('MYSQL_POOL_MAX_SIZE', 10),
+            timeout=config.get('MYSQL_POOL_TIMEOUT', 10),
+            recycle=config.get('MYSQL_POOL_RECYCLE', 3600),
+            ping_after=config.get('MYSQL_POOL_PING_AFTER', 30),
+        )
+        pool = ConnectionPool(lambda: PrimaryConnection(**kwargs), **pool_options)
+
+        replicas, router = [], None
+        for host, port in parse_replicas(config.get('MYSQL_REPLICAS')):
+            replica_kwargs = dict(kwargs, host=host, port=port)
+            replica_pool = ConnectionPool(
+                lambda replica_kwargs=replica_kwargs: ReplicaConnection(**replica_kwargs), **pool_options)
+            replicas.append(Replica(f"{host}:{port}", replica_pool))
+        if replicas:
+            router = ReplicaRouter(replicas,
+                                   max_lag=config.get('MYSQL_REPLICA_MAX_LAG', 5),
+                                   check_interval=config.get('MYSQL_REPLICA_LAG_CHECK_INTERVAL', 5),
+                                   logger=app.logger)
+
+        app.extensions['mysql'] = pools = AppPools(pool, router)
+        self._apps.add(pools)
+        app.teardown_appcontext(self.teardown)
+
+    @property
+    def pool(self):
+        """The current app's primary pool."""
+        return current_app.extensions['mysql'].pool
+
+    @property
+    def router(self):
+        """The current app's replica router, or None."""
+        return current_app.extensions['mysql'].router
+
+    @property
+    def connection(self):
+        """The connection checked out for the current app context."""
+        conn = g.get('_mysql_conn')
+        if conn is None:
+            conn = g._mysql_conn = self.pool.acquire()
+        return conn
+
+    @property
+    def read_connection(self):
+        """A connection for read-only queries: a healthy replica when possible.
+
+        Stays on the primary for the rest of a request that committed, and
+        for ``MYSQL_READ_YOUR_WRITES_SECONDS`` after it for the same client.
+        """
+        if self.router is None or g.get('_mysql_wrote') or self._recently_wrote():
+            return self._primary_read()
+
+        checked_out = g.get('_mysql_read')
+        if checked_out is not None:
+            return checked_out[1]
+
+        replica = self.router.pick()
+        if replica is None:
+            return self._primary_read()
+        try:
+            conn = replica.pool.acquire()
+        except (MySQLdb.Error, PoolTimeout):
+            return self._primary_read()
+        g._mysql_read = (replica, conn)
+        return conn
+
+    def after_fork(self):
+        """Reset every app's pools in a freshly forked worker (gunicorn ``--preload``)."""
+        for pools in list(self._apps):
+            for _, pool in pools.all():
+                if pool._pid != os.getpid():
+                    pool.after_fork()
+
+    def stats(self):
+        stats = {'primary': self.pool.stats()}
+        if self.router is not None:
+            stats['routing'] = self.router.stats()
+        return stats
+
+    def collect(self):
+        pools = current_app.extensions.get('mysql') if has_app_context() else None
+        if pools is None:
+            return []
+        stats = [(name, pool.stats()) for name, pool in pools.all()]
+        gauges = [
+            ('eventease_db_pool_size', 'gauge', 'Open connections', 'size'),
+            ('eventease_db_pool_in_use', 'gauge', 'Connections checked out', 'in_use'),
+            ('eventease_db_pool_waiting', 'gauge', 'Threads waiting for a connection', 'waiting'),
+            ('eventease_db_pool_checkouts_total', 'counter', 'Connection checkouts', 'checkouts'),
+            ('eventease_db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection',
+             'wait_seconds_total'),
+            ('eventease_db_pool_timeouts_total', 'counter', 'Checkouts that timed out', 'timeouts'),
+        ]
+        return [(name, kind, help_text, [({'node': node}, s[key]) for node, s in stats])
+                for name, kind, help_text, key in gauges]
+
+    def _primary_read(self):
+        if self.router is not None:
+            self.router.primary_served += 1
+        return self.connection
+
+    def _recently_wrote(self):
+        return has_request_context() and session.get(READ_PRIMARY_UNTIL, 0) > time.time()
+
+    def teardown(self, exception):
+        conn = g.pop('_mysql_conn', None)
+        if conn is not None:
+            self.pool.release(conn)
+        checked_out = g.pop('_mysql_read', None)
+        if checked_out is not None:
+            replica, conn = checked_out
+            replica.pool.release(conn)
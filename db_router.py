@@ -0,0 +1,115 @@
+# db_router.py
+"""Read-replica routing for ``mysql.read_connection``.
+
+Replicas are listed in ``MYSQL_REPLICAS`` as ``host[:port]`` pairs sharing
+the primary's credentials and database name. Each gets its own connection
+pool. A replica only serves reads while its replication lag is at most
+``MYSQL_REPLICA_MAX_LAG`` seconds; lag is re-measured every
+``MYSQL_REPLICA_LAG_CHECK_INTERVAL`` seconds. With no usable replica, reads
+fall back to the primary.
+"""
+
+import itertools
+import threading
+import time
+
+import MySQLdb
+import MySQLdb.cursors
+
+
+class Replica:
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.lag = None  # seconds behind the primary; None = unknown/broken
+        self.checked_at = 0.0
+        self.served = 0
+
+
+class ReplicaRouter:
+    def __init__(self, replicas, max_lag=5, check_interval=5, logger=None):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.logger = logger
+        self.fallbacks = 0
+        self.primary_served = 0
+        self._round_robin = itertools.count()
+        self._check_lock = threading.Lock()
+
+    def pick(self):
+        """A replica fit to serve reads right now, or None for the primary."""
+        self._refresh_lag()
+        usable = [r for r in self.replicas if r.lag is not None and r.lag <= self.max_lag]
+        if not usable:
+            self.fallbacks += 1
+            return None
+        replica = usable[next(self._round_robin) % len(usable)]
+        replica.served += 1
+        return replica
+
+    def stats(self):
+        return {
+            'primary_reads': self.primary_served,
+            'fallbacks': self.fallbacks,
+            'replicas': [
+                {'name': r.name, 'lag': r.lag, 'served': r.served, 'pool': r.pool.stats()}
+                for r in self.replicas
+            ],
+        }
+
+    def _refresh_lag(self):
+        now = time.monotonic()
+        due = [r for r in self.replicas if now - r.checked_at >= self.check_interval]
+        # One thread measures; everyone else routes on the last known lag
+        if not due or not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            for replica in due:
+                replica.lag = self._measure_lag(replica)
+                replica.checked_at = time.monotonic()
+        finally:
+            self._check_lock.release()
+
+    def _measure_lag(self, replica):
+        try:
+            conn = replica.pool.acquire()
+        except Exception as e:
+            self._warn("Replica %s unreachable: %s", replica.name, e)
+            return None
+        try:
+            cur = conn.cursor(MySQLdb.cursors.DictCursor)
+            try:
+                cur.execute("SHOW REPLICA STATUS")
+            except MySQLdb.Error:
+                # Before MySQL 8.0.22 / on MariaDB
+                cur.execute("SHOW SLAVE STATUS")
+            status = cur.fetchone()
+            cur.close()
+        except MySQLdb.Error as e:
+            self._warn("Could not read replication status from %s: %s", replica.name, e)
+            return None
+        finally:
+            replica.pool.release(conn)
+
+        if not status:
+            self._warn("%s is not configured as a replica", replica.name)
+            return None
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return None if lag is None else float(lag)
+
+    def _warn(self, message, *args):
+        if self.logger:
+            self.logger.warning(message, *args)
+
+
+def parse_replicas(value):
+    """``"db2:3306,db3"`` -> ``[("db2", 3306), ("db3", 3306)]``."""
+    replicas = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        replicas.append((host, int(port or 3306)))
+    return replicas
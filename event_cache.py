@@ -0,0 +1,146 @@
+# event_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import MySQLdb.cursors
+from flask import current_app
+
+from extensions import mysql
+
+# Only the columns home.html actually renders
+CATALOG_COLUMNS = "id, title, date, location, description, image_path"
+
+# Upper bound on cached pages so odd cursors can't grow the cache forever; least recently used go first
+MAX_CACHED_PAGES = 256
+
+
+def encode_cursor(event):
+    """Keyset cursor pointing just past ``event`` in (date, id) order."""
+    return f"{event['date'].isoformat()}~{event['id']}"
+
+
+def decode_cursor(value):
+    """Parse a cursor from the query string; anything malformed means page one."""
+    if not value:
+        return None
+    try:
+        raw_date, raw_id = value.split('~', 1)
+        return date.fromisoformat(raw_date), int(raw_id)
+    except ValueError:
+        return None
+
+
+class ReadThroughCache:
+    """Bounded LRU of loaded values, each kept for ``EVENT_CACHE_TTL`` seconds.
+
+    Past ``max_entries`` the least recently used entry is evicted, so a
+    flood of one-off keys only pushes out other cold keys.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_PAGES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+        self._fill_locks = {}
+        self.generation = 0
+
+    def read_through(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` on a miss."""
+        entry = self._get(key)
+        if entry is not None:
+            return entry
+
+        # One query per cold key, even when many requests miss at once
+        with self._fill_lock(key):
+            entry = self._get(key)
+            if entry is not None:
+                return entry
+
+            generation = self.generation
+            entry = loader()
+            ttl = current_app.config.get('EVENT_CACHE_TTL', 60)
+
+            with self._lock:
+                # Don't resurrect data an invalidate() raced past
+                if generation == self.generation:
+                    self._pages[key] = (time.monotonic() + ttl, entry)
+                    self._pages.move_to_end(key)
+                    while len(self._pages) > self.max_entries:
+                        evicted, _ = self._pages.popitem(last=False)
+                        self._fill_locks.pop(evicted, None)
+            return entry
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._pages.clear()
+
+    def _get(self, key):
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is None:
+                return None
+            expires_at, entry = cached
+            if expires_at < time.monotonic():
+                del self._pages[key]
+                return None
+            self._pages.move_to_end(key)
+            return entry
+
+    def _fill_lock(self, key):
+        with self._lock:
+            return self._fill_locks.setdefault(key, threading.Lock())
+
+
+class EventCatalog(ReadThroughCache):
+    """Read-through cache of home page event pages.
+
+    Pages are keyed by their keyset cursor and expire after
+    ``EVENT_CACHE_TTL`` seconds. Write paths call ``invalidate()`` so admins
+    see their changes right away in this worker; the TTL bounds staleness in
+    the others.
+    """
+
+    def page(self, cursor=None, per_page=None):
+        per_page = per_page or current_app.config.get('EVENTS_PER_PAGE', 12)
+        return self.read_through((cursor, per_page), lambda: self._load(cursor, per_page))
+
+    def choices(self):
+        """``(id, title)`` of every event, for filter dropdowns."""
+        return self.read_through('choices', self._load_choices)
+
+    def _load(self, cursor, per_page):
+        cur = mysql.read_connection.cursor(MySQLdb.cursors.DictCursor)
+        if cursor is None:
+            cur.execute(f"""
+                SELECT {CATALOG_COLUMNS} FROM events
+                ORDER BY date ASC, id ASC
+                LIMIT %s
+            """, (per_page + 1,))
+        else:
+            after_date, after_id = cursor
+            cur.execute(f"""
+                SELECT {CATALOG_COLUMNS} FROM events
+                WHERE date > %s OR (date = %s AND id > %s)
+                ORDER BY date ASC, id ASC
+                LIMIT %s
+            """, (after_date, after_date, after_id, per_page + 1))
+        rows = cur.fetchall()
+        cur.close()
+
+        events = tuple(rows[:per_page])
+        next_cursor = encode_cursor(events[-1]) if len(rows) > per_page else None
+        return events, next_cursor
+
+    def _load_choices(self):
+        cur = mysql.read_connection.cursor(MySQLdb.cursors.DictCursor)
+        cur.execute("SELECT id, title FROM events ORDER BY title")
+        rows = tuple(cur.fetchall())
+        cur.close()
+        return rows
+
+
+event_catalog = EventCatalog()
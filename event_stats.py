@@ -0,0 +1,181 @@
+# event_stats.py
+"""Per-event registration counters, kept on the ``events`` row.
+
+``registered_count`` (all registrations, also the seat counter
+``reserve_seat()`` checks), ``pending_count`` and ``approved_count`` are
+adjusted in the same transaction as the registration write that changes
+them; remaining capacity is ``capacity - registered_count``. Dashboards read
+these counters instead of counting or joining ``registrations``.
+
+``reconcile()`` recomputes the counters from ``registrations`` to repair
+drift from writes made outside the app. Run it periodically::
+
+    flask --app app reconcile-stats --interval 3600
+"""
+
+import MySQLdb.cursors
+
+# Registration status -> the events column counting it
+STATUS_COUNTERS = {'Pending': 'pending_count', 'Approved': 'approved_count'}
+
+SUMMARY_QUERY = """
+    SELECT COUNT(*) AS events,
+           COALESCE(SUM(registered_count), 0) AS total,
+           COALESCE(SUM(pending_count), 0) AS pending,
+           COALESCE(SUM(approved_count), 0) AS approved,
+           COALESCE(SUM(GREATEST(capacity - registered_count, 0)), 0) AS remaining
+    FROM events
+"""
+PENDING_EVENTS_QUERY = """
+    SELECT id, title, date, pending_count FROM events
+    WHERE pending_count > 0
+    ORDER BY date ASC, id ASC
+    LIMIT %s
+"""
+# {events} is one %s placeholder per event id
+PENDING_FOR_EVENTS_QUERY = """
+    SELECT r.id AS reg_id, u.username, u.email, r.status, e.id AS event_id, e.title, e.date
+    FROM registrations r
+    JOIN users u ON r.user_id = u.id
+    JOIN events e ON r.event_id = e.id
+    WHERE r.event_id IN ({events}) AND r.status = 'Pending'
+    ORDER BY e.date ASC, e.id ASC, r.id ASC
+    LIMIT %s
+"""
+
+
+def counter_column(status):
+    """The events column counting ``status``, or None. Matches case-insensitively, like MySQL."""
+    return STATUS_COUNTERS.get((status or '').capitalize())
+
+
+def status_changed(cur, event_id, old_status, new_status, count=1):
+    """Move ``count`` registrations of ``event_id`` between status counters."""
+    old_column, new_column = counter_column(old_status), counter_column(new_status)
+    if old_column == new_column:
+        return
+    sets, params = [], []
+    if old_column:
+        sets.append(f"{old_column} = GREATEST({old_column} - %s, 0)")
+        params.append(count)
+    if new_column:
+        sets.append(f"{new_column} = {new_column} + %s")
+        params.append(count)
+    if sets:
+        cur.execute(f"UPDATE events SET {', '.join(sets)} WHERE id = %s", (*params, event_id))
+
+
+def added(cur, event_id, count=1):
+    """Count ``count`` new pending registrations of ``event_id``; the caller has checked capacity."""
+    cur.execute("""
+        UPDATE events
+        SET registered_count = registered_count + %s, pending_count = pending_count + %s
+        WHERE id = %s
+    """, (count, count, event_id))
+
+
+def removed(cur, event_id, status, count=1):
+    """Give back ``count`` seats of ``event_id`` whose registrations (in ``status``) were deleted."""
+    sets = ["registered_count = GREATEST(registered_count - %s, 0)"]
+    column = counter_column(status)
+    if column:
+        sets.append(f"{column} = GREATEST({column} - %s, 0)")
+    cur.execute(f"UPDATE events SET {', '.join(sets)} WHERE id = %s",
+                (count,) * len(sets) + (event_id,))
+
+
+def summary(conn):
+    """Totals across all events: ``events``, ``total``, ``pending``, ``approved``, ``remaining``.
+
+    A scan of the live ``events`` rows. Archiving keeps that set to recent
+    and upcoming events. These are not kept in a single totals row, because
+    every registration would then update that one row.
+    """
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(SUMMARY_QUERY)
+    row = cur.fetchone()
+    cur.close()
+    return {key: int(value) for key, value in row.items()}
+
+
+def count(conn, event_id=None, status=None):
+    """Registrations for one event (or all), optionally only those in a counted ``status``."""
+    column = counter_column(status) if status else 'registered_count'
+    cur = conn.cursor()
+    if event_id:
+        cur.execute(f"SELECT COALESCE(SUM({column}), 0) FROM events WHERE id = %s", (event_id,))
+    else:
+        cur.execute(f"SELECT COALESCE(SUM({column}), 0) FROM events")
+    total = int(cur.fetchone()[0])
+    cur.close()
+    return total
+
+
+def top_pending(conn, limit):
+    """The first ``limit`` pending registrations, soonest event first.
+
+    Takes events with a non-zero ``pending_count`` in date order, only as
+    many as their counters say are needed to reach ``limit``, then fetches
+    their pending registrations in one query. The cost depends on ``limit``
+    rather than on how many registrations are pending.
+    """
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(PENDING_EVENTS_QUERY, (limit,))
+    event_ids, counted = [], 0
+    for event in cur.fetchall():
+        event_ids.append(event['id'])
+        counted += event['pending_count']
+        if counted >= limit:
+            break
+    if not event_ids:
+        cur.close()
+        return []
+
+    cur.execute(PENDING_FOR_EVENTS_QUERY.format(events=', '.join(['%s'] * len(event_ids))), (*event_ids, limit))
+    pending = list(cur.fetchall())
+    cur.close()
+    return pending
+
+
+def reconcile(conn, batch_size=500):
+    """Recompute every event's counters from ``registrations``; returns how many were off.
+
+    Works through events in id order, one transaction per batch. The batch's
+    event rows are locked before counting, so a registration write racing
+    with the batch either lands in the count or adjusts the counter after
+    it, never both.
+    """
+    cur = conn.cursor()
+    fixed, last_id = 0, 0
+    while True:
+        cur.execute("""
+            SELECT id, registered_count, pending_count, approved_count FROM events
+            WHERE id > %s ORDER BY id LIMIT %s
+            FOR UPDATE
+        """, (last_id, batch_size))
+        stored = {row[0]: row[1:] for row in cur.fetchall()}
+        if not stored:
+            conn.commit()
+            break
+        last_id = max(stored)
+
+        ids = list(stored)
+        cur.execute(f"""
+            SELECT event_id, COUNT(*), SUM(status = 'Pending'), SUM(status = 'Approved')
+            FROM registrations
+            WHERE event_id IN ({', '.join(['%s'] * len(ids))})
+            GROUP BY event_id
+        """, ids)
+        actual = {row[0]: tuple(int(value or 0) for value in row[1:]) for row in cur.fetchall()}
+
+        drifted = [(*actual.get(event_id, (0, 0, 0)), event_id) for event_id, counts in stored.items()
+                   if actual.get(event_id, (0, 0, 0)) != tuple(counts)]
+        if drifted:
+            cur.executemany("""
+                UPDATE events SET registered_count = %s, pending_count = %s, approved_count = %s
+                WHERE id = %s
+            """, drifted)
+            fixed += len(drifted)
+        conn.commit()
+    cur.close()
+    return fixed
@@ -0,0 +1,304 @@
+# export_jobs.py
+"""Registration exports built in the background, served as finished files.
+
+Admins submit an export (the /registrations filters plus format and gzip)
+and get a row in ``export_jobs``. Web requests only ever insert that row and
+later serve the finished file. The report itself runs in the export worker::
+
+    flask --app app export-worker
+
+which claims queued jobs and builds each one in a pool of
+``EXPORT_PROCESSES`` processes. Each pool process opens its own MySQL
+connection and streams the rows through ``exports.encode_rows`` into
+``EXPORT_DIR``, so that directory must be the same on the worker and the
+web servers. Finished files are downloadable (with Range requests) for
+``EXPORT_TTL`` seconds, after which the worker deletes them.
+
+Submitting an export identical to one still queued or running returns that
+job instead of starting another: ``active_key`` holds the filter hash only
+while a job is in flight, and its unique index settles races. Exports with
+``archived`` set read the archive tables (see archive.py) instead.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import MySQLdb
+import MySQLdb.cursors
+from flask import send_from_directory
+
+from archive import ARCHIVED_REGISTRATIONS_FROM
+from db_pool import connect_kwargs
+from exports import ENCODERS, EXPORT_QUERY, MIMETYPES, encode_rows
+from extensions import mysql
+from registration_query import REGISTRATIONS_FROM, registration_filters
+from reservations import ER_DUP_ENTRY
+
+QUEUED, RUNNING, DONE, FAILED, EXPIRED = 'queued', 'running', 'done', 'failed', 'expired'
+ACTIVE = (QUEUED, RUNNING)
+
+JOB_COLUMNS = "id, params, status, requested_by, artifact, size, error, created_at, started_at, finished_at, expires_at"
+
+CLAIM_QUERY = """
+    SELECT id, params FROM export_jobs
+    WHERE status = 'queued'
+    ORDER BY id
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+"""
+RECENT_QUERY = f"SELECT {JOB_COLUMNS} FROM export_jobs ORDER BY id DESC LIMIT %s"
+
+# export_jobs.params is VARCHAR(1000); json.dumps escapes non-ASCII, so characters are bytes
+PARAMS_MAX_LENGTH = 1000
+
+
+def export_params(event_id=None, status=None, search=None, fmt='csv', compress=False, archived=False):
+    """The normalized description of an export; equal params mean an identical file."""
+    params = {
+        'event_id': event_id or None,
+        'status': (status or '').strip().lower() or None,
+        'search': (search or '').strip() or None,
+        'format': fmt if fmt in ENCODERS else 'csv',
+        'gzip': bool(compress),
+    }
+    if archived:
+        # Only set when true, so live exports keep the filter keys they always had
+        params['archived'] = True
+    return params
+
+
+def filter_key(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def submit(conn, user_id, params):
+    """Queue an export, or find the identical one in flight. Returns ``(job_id, created)``.
+
+    Raises ``ValueError`` if the filters don't fit in ``export_jobs.params``.
+    """
+    encoded = json.dumps(params, sort_keys=True)
+    if len(encoded) > PARAMS_MAX_LENGTH:
+        raise ValueError("Export filters are too long.")
+    key = filter_key(params)
+    cur = conn.cursor()
+    try:
+        # Retry once: the in-flight duplicate may finish between the two statements
+        for _ in range(2):
+            try:
+                cur.execute("""
+                    INSERT INTO export_jobs (filter_key, active_key, params, requested_by)
+                    VALUES (%s, %s, %s, %s)
+                """, (key, key, encoded, user_id))
+            except MySQLdb.IntegrityError as e:
+                conn.rollback()
+                if e.args[0] != ER_DUP_ENTRY:
+                    raise
+            else:
+                conn.commit()
+                return cur.lastrowid, True
+            cur.execute("SELECT id FROM export_jobs WHERE active_key = %s", (key,))
+            row = cur.fetchone()
+            conn.commit()
+            if row is not None:
+                return row[0], False
+        raise RuntimeError("could not queue export")
+    finally:
+        cur.close()
+
+
+def get(conn, job_id):
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(f"SELECT {JOB_COLUMNS} FROM export_jobs WHERE id = %s", (job_id,))
+    job = cur.fetchone()
+    cur.close()
+    return _decode(job) if job else None
+
+
+def recent(conn, limit=20):
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(RECENT_QUERY, (limit,))
+    jobs = [_decode(job) for job in cur.fetchall()]
+    cur.close()
+    return jobs
+
+
+def _decode(job):
+    job['params'] = json.loads(job['params'])
+    return job
+
+
+def artifact_dir(app):
+    return app.config.get('EXPORT_DIR') or os.path.join(app.instance_path, 'exports')
+
+
+def artifact_name(job_id, params):
+    return f"registrations-{job_id}.{params['format']}" + ('.gz' if params['gzip'] else '')
+
+
+def send_artifact(app, job):
+    """Response for a finished job's file; Range and conditional requests are handled by Werkzeug."""
+    params = job['params']
+    mimetype = 'application/gzip' if params['gzip'] else MIMETYPES[params['format']]
+    return send_from_directory(artifact_dir(app), job['artifact'], mimetype=mimetype, as_attachment=True,
+                               download_name=artifact_name(job['id'], params), max_age=0)
+
+
+def build_artifact(job_id, params, db_settings, directory):
+    """Run one export and write it to ``directory``; returns ``(filename, size)``.
+
+    Runs in an export pool process, on its own connection, with an
+    unbuffered cursor so memory stays bounded however many rows match.
+    """
+    name = artifact_name(job_id, params)
+    path = os.path.join(directory, name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    where, args = registration_filters(params['event_id'], params['status'], params['search'])
+    conn = MySQLdb.connect(**db_settings)
+    try:
+        cur = conn.cursor(MySQLdb.cursors.SSCursor)
+        from_ = ARCHIVED_REGISTRATIONS_FROM if params.get('archived') else REGISTRATIONS_FROM
+        cur.execute(EXPORT_QUERY.format(from_=from_, where=where), args)
+        with open(tmp, 'wb') as f:
+            for chunk in encode_rows(cur, params['format'], params['gzip']):
+                f.write(chunk)
+        cur.close()
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        conn.close()
+    return name, os.path.getsize(path)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExportWorker:
+    def __init__(self, app):
+        self.app = app
+        self.processes = app.config.get('EXPORT_PROCESSES', 2)
+        self.poll_interval = app.config.get('EXPORT_POLL_INTERVAL', 2)
+        self.ttl = app.config.get('EXPORT_TTL', 86400)
+        self.job_timeout = app.config.get('EXPORT_JOB_TIMEOUT', 3600)
+        self.cleanup_interval = app.config.get('EXPORT_CLEANUP_INTERVAL', 300)
+        self.directory = artifact_dir(app)
+        self.db_settings = connect_kwargs(app.config)
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """Claim and build jobs until ``stop()``; jobs still running are put back in the queue."""
+        os.makedirs(self.directory, exist_ok=True)
+        # Spawned, not forked: pool processes start clean, without this process's connections
+        pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+        running = {}
+        next_cleanup = 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    if time.monotonic() >= next_cleanup:
+                        self.cleanup()
+                        next_cleanup = time.monotonic() + self.cleanup_interval
+                    while len(running) < self.processes:
+                        job = self._claim()
+                        if job is None:
+                            break
+                        future = pool.submit(build_artifact, job['id'], job['params'], self.db_settings,
+                                             self.directory)
+                        running[future] = job
+                except Exception as e:
+                    self.app.logger.exception("Export queue poll failed: %s", e)
+
+                if not running:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(running.pop(future), future)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if running:
+                self._requeue([job['id'] for job in running.values()])
+
+    def cleanup(self):
+        """Delete expired files and give up on jobs whose worker died mid-build."""
+        with self.app.app_context():
+            conn = mysql.connection
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE export_jobs
+                SET status = 'failed', active_key = NULL, finished_at = NOW(),
+                    error = 'Export did not finish in time'
+                WHERE status = 'running' AND started_at < NOW() - INTERVAL %s SECOND
+            """, (self.job_timeout,))
+            cur.execute("SELECT id, artifact FROM export_jobs WHERE status = 'done' AND expires_at <= NOW()")
+            expired = cur.fetchall()
+            for _, artifact in expired:
+                _remove_quietly(os.path.join(self.directory, artifact))
+            if expired:
+                cur.executemany("UPDATE export_jobs SET status = 'expired', artifact = NULL WHERE id = %s",
+                                [(job_id,) for job_id, _ in expired])
+            conn.commit()
+            cur.close()
+        return len(expired)
+
+    def _claim(self):
+        with self.app.app_context():
+            conn = mysql.connection
+            cur = conn.cursor(MySQLdb.cursors.DictCursor)
+            cur.execute(CLAIM_QUERY)
+            job = cur.fetchone()
+            if job is not None:
+                cur.execute("UPDATE export_jobs SET status = 'running', started_at = NOW() WHERE id = %s",
+                            (job['id'],))
+            conn.commit()
+            cur.close()
+        return _decode(job) if job else None
+
+    def _finish(self, job, future):
+        with self.app.app_context():
+            conn = mysql.connection
+            cur = conn.cursor()
+            try:
+                artifact, size = future.result()
+            except Exception as e:
+                self.app.logger.warning("Export %s failed: %s", job['id'], e)
+                cur.execute("""
+                    UPDATE export_jobs
+                    SET status = 'failed', active_key = NULL, finished_at = NOW(), error = %s
+                    WHERE id = %s AND status = 'running'
+                """, (str(e)[:500], job['id']))
+            else:
+                # cleanup() may have given up on it meanwhile; a failed job stays failed
+                cur.execute("""
+                    UPDATE export_jobs
+                    SET status = 'done', active_key = NULL, artifact = %s, size = %s,
+                        finished_at = NOW(), expires_at = NOW() + INTERVAL %s SECOND
+                    WHERE id = %s AND status = 'running'
+                """, (artifact, size, self.ttl, job['id']))
+                if cur.rowcount == 0:
+                    _remove_quietly(os.path.join(self.directory, artifact))
+            conn.commit()
+            cur.close()
+
+    def _requeue(self, job_ids):
+        with self.app.app_context():
+            conn = mysql.connection
+            cur = conn.cursor()
+            cur.executemany("UPDATE export_jobs SET status = 'queued', started_at = NULL WHERE id = %s",
+                            [(job_id,) for job_id in job_ids])
+            conn.commit()
+            cur.close()
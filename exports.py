@@ -0,0 +1,82 @@
+# exports.py
+"""Registration export encoding, shared by the export jobs (export_jobs.py) and bench/."""
+
+import csv
+import json
+import zlib
+from io import StringIO
+
+EXPORT_HEADER = ['ID', 'User', 'Email', 'Phone', 'Event', 'Status']
+EXPORT_FIELDS = ['id', 'user', 'email', 'phone', 'event', 'status']
+
+EXPORT_QUERY = """
+    SELECT
+        registrations.id,
+        users.username,
+        users.email,
+        registrations.phone,
+        events.title,
+        registrations.status
+    {from_}
+    {where}
+    ORDER BY registrations.id DESC
+"""
+
+# Rows pulled from the server per round-trip
+CHUNK_SIZE = 5000
+
+MIMETYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+class CsvEncoder:
+    """Encodes row chunks through csv.writer into one reused buffer."""
+
+    def __init__(self):
+        self.buffer = StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def header(self):
+        return self.encode([EXPORT_HEADER])
+
+    def encode(self, rows):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.writer.writerows(rows)
+        return self.buffer.getvalue()
+
+
+class JsonlEncoder:
+    def header(self):
+        return ''
+
+    def encode(self, rows):
+        return ''.join(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str) + '\n' for row in rows)
+
+
+ENCODERS = {'csv': CsvEncoder, 'jsonl': JsonlEncoder}
+
+
+def encode_rows(cursor, fmt='csv', compress=False, chunk_size=CHUNK_SIZE):
+    """Yield the export body chunk by chunk from anything with ``fetchmany``.
+
+    Memory use is bounded by ``chunk_size`` regardless of how many rows the
+    cursor produces.
+    """
+    encoder = ENCODERS[fmt]()
+    gzip = zlib.compressobj(wbits=31) if compress else None
+
+    def emit(text):
+        data = text.encode('utf-8')
+        return gzip.compress(data) if gzip else data
+
+    yield emit(encoder.header())
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        chunk = emit(encoder.encode(rows))
+        if chunk:
+            yield chunk
+    if gzip:
+        yield gzip.flush()
+
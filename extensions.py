@@ -1,6 +1,6 @@
 # extensions.py
-from flask_mysqldb import MySQL
+from db_pool import PooledMySQL
 from flask_login import LoginManager
 
-mysql = MySQL()
+mysql = PooledMySQL()
 login_manager = LoginManager()
@@ -1,2 +1,3 @@
-from werkzeug.security import generate_password_hash
-print(generate_password_hash('password123'))
+import config
+from passwords import PasswordHasher
+print(PasswordHasher.from_object(config).hash('password123'))
@@ -0,0 +1,70 @@
+# hot_queries.py
+"""Queries on the request path, checked with EXPLAIN by ``python migrate.py check``.
+
+Add an entry here whenever a view gains a query that runs on every request
+or scales with table size. Parameters are representative sample values.
+
+Only queries that can avoid a full scan belong here. The admin dashboard
+totals (``event_stats.SUMMARY_QUERY``) sum every ``events`` row by design.
+They stay bounded because finished events are archived (see archive.py),
+so they are deliberately not listed.
+"""
+
+import archive
+import event_stats
+import export_jobs
+import search
+import timeline
+import waitlist
+from event_cache import CATALOG_COLUMNS
+from exports import EXPORT_QUERY
+from registration_query import REGISTRATIONS_FROM, registration_filters
+
+
+def _registrations_page(**filters):
+    where, params = registration_filters(**filters)
+    return (f"SELECT registrations.id {REGISTRATIONS_FROM} {where} "
+            "ORDER BY registrations.id DESC LIMIT 6", params)
+
+
+HOT_QUERIES = {
+    'load_user': ("SELECT * FROM users WHERE id = %s", (1,)),
+    'auth.login': ("SELECT * FROM users WHERE email = %s", ('someone@example.com',)),
+    'home.catalog_first_page': (
+        f"SELECT {CATALOG_COLUMNS} FROM events ORDER BY date ASC, id ASC LIMIT 13", ()),
+    'home.catalog_next_page': (
+        f"SELECT {CATALOG_COLUMNS} FROM events WHERE date > %s OR (date = %s AND id > %s) "
+        "ORDER BY date ASC, id ASC LIMIT 13", ('2025-01-01', '2025-01-01', 1)),
+    'register_event.seat': (
+        "UPDATE events SET registered_count = registered_count + 1, pending_count = pending_count + 1 "
+        "WHERE id = %s AND (capacity IS NULL OR registered_count < capacity)", (1,)),
+    'registrations.page': _registrations_page(),
+    'registrations.page_by_event_status': _registrations_page(event_id=1, status='Pending', before_id=1000),
+    'registrations.page_by_status': _registrations_page(status='Pending'),
+    'registrations.search': _registrations_page(search='alice'),
+    'registrations.search_short': _registrations_page(search='al'),
+    'home.search': (search.EVENT_SEARCH_QUERY, ('+music*', '+music*', 13, 0)),
+    'home.search_short': (search.EVENT_PREFIX_QUERY, ('ja%', 13, 0)),
+    'export.by_event': (EXPORT_QUERY.format(from_=REGISTRATIONS_FROM, where="WHERE registrations.event_id = %s"), (1,)),
+    'dashboard.admin_pending_events': (event_stats.PENDING_EVENTS_QUERY, (20,)),
+    'dashboard.admin_pending_for_events': (event_stats.PENDING_FOR_EVENTS_QUERY.format(events='%s, %s, %s'),
+                                           (1, 2, 3, 20)),
+    'dashboard.user_upcoming': (timeline.UPCOMING_QUERY, (1, 0)),
+    'calendar_feed': (timeline.UPCOMING_QUERY, (1, 30)),
+    'outbox.claim': (
+        "SELECT id FROM email_outbox WHERE status = 'pending' AND next_attempt_at <= NOW() "
+        "ORDER BY id LIMIT 50", ()),
+    'waitlist.head': (waitlist.HEAD_QUERY, (1, 100)),
+    'exports.recent': (export_jobs.RECENT_QUERY, (20,)),
+    'export_jobs.claim': (export_jobs.CLAIM_QUERY, ()),
+    'archive.candidates': (archive.CANDIDATES_QUERY, (60, 100)),
+    'archive.batch': (archive.BATCH_QUERY, (1, 1000)),
+    'archive.events_by_year': (
+        archive.ARCHIVED_EVENTS_QUERY, ('2024-01-01', '2025-01-01', '2025-01-01', '2025-01-01', 0, 21)),
+    'archive.registrations_by_event': (
+        f"SELECT registrations.id {archive.ARCHIVED_REGISTRATIONS_FROM} WHERE registrations.event_id = %s "
+        "ORDER BY registrations.id DESC LIMIT 21", (1,)),
+    'export.archived_by_event': (
+        EXPORT_QUERY.format(from_=archive.ARCHIVED_REGISTRATIONS_FROM, where="WHERE registrations.event_id = %s"),
+        (1,)),
+}
@@ -0,0 +1,143 @@
+# images.py
+"""Event image uploads: content-hashed storage plus responsive variants.
+
+An upload is stored under ``<sha256 prefix>.<ext>`` in ``EVENT_IMAGE_DIR``
+and that name goes into ``events.image_path``. Resized copies
+(``<hash>-<width>.<ext>`` and ``<hash>-<width>.webp``) are produced on a
+background thread pool, so the request only pays for hashing and one write.
+Because names change whenever content does, everything under
+``/media/events/`` is served as immutable.
+
+Resizing needs Pillow; without it only the original is served.
+"""
+
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, send_from_directory, url_for
+from werkzeug.utils import secure_filename
+
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+VARIANT_WIDTHS = (320, 640, 1024)
+PIL_FORMATS = {'jpg': 'JPEG', 'png': 'PNG', 'gif': 'GIF', 'webp': 'WEBP'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+HASHED_NAME = re.compile(r'^[0-9a-f]{20}(-\d+)?\.\w+$')
+
+_executor = None
+_executor_pid = None
+_known_variants = set()
+
+
+def image_dir():
+    return current_app.config.get('EVENT_IMAGE_DIR') or os.path.join(current_app.static_folder, 'images', 'events')
+
+
+def save_upload(upload):
+    """Store an uploaded image and schedule its variants; return its ``image_path``.
+
+    Returns None when there is no file, raises ValueError for unsupported types.
+    """
+    if upload is None or not upload.filename:
+        return None
+    ext = secure_filename(upload.filename).rsplit('.', 1)[-1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise ValueError("Event images must be JPG, PNG, GIF or WebP.")
+    if ext == 'jpeg':
+        ext = 'jpg'
+
+    data = upload.read()
+    name = f"{hashlib.sha256(data).hexdigest()[:20]}.{ext}"
+    folder = image_dir()
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    if _pil() is not None:
+        _resize_executor().submit(_make_variants, folder, name, current_app.logger)
+    return name
+
+
+def _pil():
+    """Pillow's ``Image`` module, imported on the first upload; None without Pillow."""
+    try:
+        from PIL import Image
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return Image
+
+
+def _resize_executor():
+    # One pool per process: a forked worker must not inherit its parent's threads
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-resize')
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _make_variants(folder, name, logger):
+    Image = _pil()
+    stem, ext = name.rsplit('.', 1)
+    try:
+        with Image.open(os.path.join(folder, name)) as original:
+            original.load()
+            for width in VARIANT_WIDTHS:
+                if width >= original.width:
+                    continue
+                height = round(original.height * width / original.width)
+                resized = original.resize((width, height), Image.LANCZOS)
+                for variant_ext in (ext, 'webp'):
+                    target = os.path.join(folder, f"{stem}-{width}.{variant_ext}")
+                    if os.path.exists(target):
+                        continue
+                    img = resized.convert('RGB') if variant_ext == 'jpg' else resized
+                    tmp = f"{target}.tmp"
+                    img.save(tmp, format=PIL_FORMATS[variant_ext], quality=82, optimize=True)
+                    os.replace(tmp, target)
+    except Exception as e:
+        logger.warning("Could not resize %s: %s", name, e)
+
+
+def _variant_exists(folder, filename):
+    if filename in _known_variants:
+        return True
+    if os.path.exists(os.path.join(folder, filename)):
+        _known_variants.add(filename)
+        return True
+    return False
+
+
+def event_image(image_path):
+    """Template helper: ``src``, ``srcset`` and ``webp_srcset`` for an event image.
+
+    Variants that haven't been generated yet are simply left out of the
+    srcsets.
+    """
+    folder = image_dir()
+    stem, _, ext = image_path.rpartition('.')
+    srcset, webp_srcset = [], []
+    for width in VARIANT_WIDTHS:
+        for variant_ext, target in ((ext, srcset), ('webp', webp_srcset)):
+            filename = f"{stem}-{width}.{variant_ext}"
+            if _variant_exists(folder, filename):
+                target.append(f"{url_for('event_media', filename=filename)} {width}w")
+    return {
+        'src': url_for('event_media', filename=image_path),
+        'srcset': ', '.join(srcset),
+        'webp_srcset': ', '.join(webp_srcset),
+    }
+
+
+def serve(filename):
+    # Images uploaded before hashing existed can still change under their name
+    if not HASHED_NAME.match(filename):
+        return send_from_directory(image_dir(), filename)
+    response = send_from_directory(image_dir(), filename, max_age=31536000)
+    response.headers['Cache-Control'] = IMMUTABLE
+    return response
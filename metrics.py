@@ -0,0 +1,35 @@
+# metrics.py
+"""Prometheus text exposition for the app's in-process metrics.
+
+Subsystems register a collector: a function returning
+``[(name, type, help, [(labels_dict, value), ...]), ...]``. ``render()``
+calls every collector and formats the result for ``/metrics``.
+"""
+
+_collectors = []
+
+
+def register(collector):
+    """Add ``collector``; registering the same one again is a no-op, so each family is rendered once."""
+    if collector not in _collectors:
+        _collectors.append(collector)
+    return collector
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render():
+    lines = []
+    for collector in _collectors:
+        for name, kind, help_text, samples in collector():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if labels:
+                    label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in sorted(labels.items()))
+                    lines.append(f"{name}{{{label_text}}} {value}")
+                else:
+                    lines.append(f"{name} {value}")
+    return '\n'.join(lines) + '\n'
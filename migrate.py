@@ -0,0 +1,120 @@
+# migrate.py
+"""Schema migration runner.
+
+    python migrate.py upgrade   # apply pending migrations in order
+    python migrate.py status    # list applied and pending migrations
+    python migrate.py check     # EXPLAIN every hot query, fail on full table scans
+
+Connection settings come from config.py (DB_HOST, DB_USER, DB_PASSWORD, DB_NAME).
+``check`` is only meaningful against a database with realistic row counts
+(see bench/), since MySQL happily scans tiny tables even when an index exists.
+"""
+
+import argparse
+import importlib
+import os
+import pkgutil
+import sys
+
+import MySQLdb
+import MySQLdb.cursors
+
+import config
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+def connect():
+    return MySQLdb.connect(host=config.DB_HOST, port=config.DB_PORT, user=config.DB_USER,
+                           passwd=config.DB_PASSWORD or '', db=config.DB_NAME)
+
+
+def available_migrations():
+    """``[(version, name, module)]`` sorted by version."""
+    found = []
+    for info in pkgutil.iter_modules([MIGRATIONS_DIR]):
+        if not info.name.startswith('v'):
+            continue
+        version, _, name = info.name[1:].partition('_')
+        module = importlib.import_module(f'migrations.{info.name}')
+        found.append((int(version), name, module))
+    return sorted(found, key=lambda m: m[0])
+
+
+def applied_versions(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def upgrade(conn):
+    cur = conn.cursor()
+    done = applied_versions(cur)
+    for version, name, module in available_migrations():
+        if version in done:
+            continue
+        print(f"Applying {version:04d} {name}...")
+        module.upgrade(cur)
+        cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+        conn.commit()
+    print("Schema is up to date.")
+
+
+def status(conn):
+    done = applied_versions(conn.cursor())
+    for version, name, _ in available_migrations():
+        print(f"{'applied' if version in done else 'pending':>8}  {version:04d} {name}")
+
+
+def check(conn, min_rows):
+    """EXPLAIN each hot query; return the names that fall back to a full scan."""
+    from hot_queries import HOT_QUERIES
+
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    failures = []
+    for name, (sql, params) in HOT_QUERIES.items():
+        cur.execute("EXPLAIN " + sql, params)
+        for row in cur.fetchall():
+            full_scan = row['type'] == 'ALL' and (row['rows'] or 0) >= min_rows
+            marker = 'FULL SCAN' if full_scan else 'ok'
+            print(f"{marker:>9}  {name}: table={row['table']} type={row['type']} "
+                  f"key={row['key']} rows={row['rows']}")
+            if full_scan:
+                failures.append(name)
+    conn.rollback()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EventEase schema migrations")
+    parser.add_argument('command', choices=['upgrade', 'status', 'check'])
+    parser.add_argument('--min-rows', type=int, default=100,
+                        help="ignore full scans the optimizer estimates below this many rows")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.command == 'upgrade':
+            upgrade(conn)
+        elif args.command == 'status':
+            status(conn)
+        else:
+            failures = check(conn, args.min_rows)
+            if failures:
+                print(f"{len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} "
+                      f"fall back to a full table scan: {', '.join(sorted(set(failures)))}")
+                return 1
+            print("All hot queries use an index.")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# migrations/__init__.py
+"""Versioned schema migrations, applied in order by ``migrate.py``.
+
+Each ``vNNNN_<name>.py`` module defines ``upgrade(cur)``. Migrations must be
+safe to run against databases that were set up by hand before migrations
+existed, so prefer the ``*_if_missing`` helpers below over bare DDL.
+"""
+
+
+def table_exists(cur, table):
+    cur.execute("""
+        SELECT 1 FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cur.fetchone() is not None
+
+
+def column_exists(cur, table, column):
+    cur.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cur.fetchone() is not None
+
+
+def index_exists(cur, table, index):
+    cur.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, index))
+    return cur.fetchone() is not None
+
+
+def add_column_if_missing(cur, table, column, definition):
+    if not column_exists(cur, table, column):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def add_index_if_missing(cur, table, index, columns, unique=False, fulltext=False):
+    if not index_exists(cur, table, index):
+        kind = "UNIQUE INDEX" if unique else "FULLTEXT INDEX" if fulltext else "INDEX"
+        cur.execute(f"CREATE {kind} {index} ON {table} ({columns})")
+
+
+def drop_index_if_exists(cur, table, index):
+    if index_exists(cur, table, index):
+        cur.execute(f"DROP INDEX {index} ON {table}")
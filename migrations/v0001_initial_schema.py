@@ -0,0 +1,56 @@
+"""Base users/events/registrations schema, plus the columns the app assumes."""
+
+from migrations import add_column_if_missing
+
+
+def upgrade(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(100) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role VARCHAR(20) NOT NULL DEFAULT 'user',
+            is_admin TINYINT(1) NOT NULL DEFAULT 0,
+            name VARCHAR(100) NULL,
+            phone VARCHAR(20) NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            date DATE NOT NULL,
+            location VARCHAR(255) NOT NULL,
+            description TEXT,
+            capacity INT NULL,
+            image_path VARCHAR(255) NULL
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS registrations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            event_id INT NOT NULL,
+            name VARCHAR(100) NULL,
+            email VARCHAR(255) NULL,
+            phone VARCHAR(20) NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'Pending',
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT fk_registrations_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            CONSTRAINT fk_registrations_event FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+        )
+    """)
+
+    # Databases created before migrations may be missing these
+    add_column_if_missing(cur, 'users', 'role', "VARCHAR(20) NOT NULL DEFAULT 'user'")
+    add_column_if_missing(cur, 'users', 'is_admin', "TINYINT(1) NOT NULL DEFAULT 0")
+    add_column_if_missing(cur, 'users', 'name', "VARCHAR(100) NULL")
+    add_column_if_missing(cur, 'users', 'phone', "VARCHAR(20) NULL")
+    add_column_if_missing(cur, 'events', 'capacity', "INT NULL")
+    add_column_if_missing(cur, 'events', 'image_path', "VARCHAR(255) NULL")
+    add_column_if_missing(cur, 'registrations', 'name', "VARCHAR(100) NULL")
+    add_column_if_missing(cur, 'registrations', 'email', "VARCHAR(255) NULL")
+    add_column_if_missing(cur, 'registrations', 'phone', "VARCHAR(20) NULL")
+    add_column_if_missing(cur, 'registrations', 'status', "VARCHAR(20) NOT NULL DEFAULT 'Pending'")
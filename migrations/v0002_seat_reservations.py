@@ -0,0 +1,16 @@
+"""Maintained seat counter and one registration per user per event (reservations.py)."""
+
+from migrations import add_column_if_missing, add_index_if_missing, column_exists
+
+
+def upgrade(cur):
+    if not column_exists(cur, 'events', 'registered_count'):
+        add_column_if_missing(cur, 'events', 'registered_count', "INT NOT NULL DEFAULT 0")
+        cur.execute("""
+            UPDATE events e
+            SET registered_count = (SELECT COUNT(*) FROM registrations r WHERE r.event_id = e.id)
+        """)
+
+    # Fails if duplicate (user_id, event_id) rows exist; remove them first.
+    # Also serves "WHERE user_id = %s" lookups from dashboard().
+    add_index_if_missing(cur, 'registrations', 'uq_registrations_user_event', 'user_id, event_id', unique=True)
@@ -0,0 +1,19 @@
+"""Indexes for the hot queries checked by ``python migrate.py check``.
+
+InnoDB appends the primary key to every secondary index, so
+``events(date)`` already orders by ``(date, id)`` for the home catalog and
+``registrations(event_id, status)`` already orders by ``id`` within a filter.
+"""
+
+from migrations import add_index_if_missing
+
+
+def upgrade(cur):
+    # auth.login / auth.signup: WHERE email = %s
+    add_index_if_missing(cur, 'users', 'ix_users_email', 'email')
+    # home catalog keyset: ORDER BY date, id / WHERE date > %s ...
+    add_index_if_missing(cur, 'events', 'ix_events_date', 'date')
+    # /registrations?event_id=..&status=..
+    add_index_if_missing(cur, 'registrations', 'ix_registrations_event_status', 'event_id, status')
+    # /registrations?status=.. and the admin dashboard's pending list
+    add_index_if_missing(cur, 'registrations', 'ix_registrations_status', 'status')
@@ -0,0 +1,16 @@
+"""Pending/approved counters next to registered_count (event_stats.py)."""
+
+from migrations import add_column_if_missing, column_exists
+
+
+def upgrade(cur):
+    if not (column_exists(cur, 'events', 'pending_count') and column_exists(cur, 'events', 'approved_count')):
+        add_column_if_missing(cur, 'events', 'pending_count', "INT NOT NULL DEFAULT 0")
+        add_column_if_missing(cur, 'events', 'approved_count', "INT NOT NULL DEFAULT 0")
+        cur.execute("""
+            UPDATE events e
+            SET pending_count = (SELECT COUNT(*) FROM registrations r
+                                 WHERE r.event_id = e.id AND r.status = 'Pending'),
+                approved_count = (SELECT COUNT(*) FROM registrations r
+                                  WHERE r.event_id = e.id AND r.status = 'Approved')
+        """)
@@ -0,0 +1,17 @@
+"""FULLTEXT indexes for event and registrant search (search.py).
+
+Building a FULLTEXT index rebuilds the table; on a large ``users`` table
+run this off-peak.
+"""
+
+from migrations import add_index_if_missing
+
+
+def upgrade(cur):
+    # Home page search: MATCH(title, description, location)
+    add_index_if_missing(cur, 'events', 'ft_events_search', 'title, description, location', fulltext=True)
+    # /registrations?search=..: MATCH(username, email)
+    add_index_if_missing(cur, 'users', 'ft_users_search', 'username, email', fulltext=True)
+    # Fallback for search terms too short for the FULLTEXT index: username / title LIKE 'ab%'
+    add_index_if_missing(cur, 'users', 'ix_users_username', 'username')
+    add_index_if_missing(cur, 'events', 'ix_events_title', 'title')
@@ -0,0 +1,20 @@
+"""Per-event FIFO waitlist for full events (waitlist.py)."""
+
+
+def upgrade(cur):
+    # (event_id, id) is the queue order; the unique key keeps one place per user
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS waitlist (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            event_id INT NOT NULL,
+            user_id INT NOT NULL,
+            name VARCHAR(100) NULL,
+            email VARCHAR(255) NULL,
+            phone VARCHAR(20) NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_waitlist_user_event (user_id, event_id),
+            KEY ix_waitlist_event_queue (event_id, id),
+            CONSTRAINT fk_waitlist_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            CONSTRAINT fk_waitlist_event FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+        )
+    """)
@@ -0,0 +1,27 @@
+"""Background registration exports (export_jobs.py)."""
+
+
+def upgrade(cur):
+    # active_key holds the filter hash only while a job is queued or running,
+    # so the unique key lets one job per distinct export be in flight at a time
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            filter_key CHAR(64) NOT NULL,
+            active_key CHAR(64) NULL,
+            params VARCHAR(1000) NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'queued',
+            requested_by INT NULL,
+            artifact VARCHAR(255) NULL,
+            size BIGINT NULL,
+            error VARCHAR(500) NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME NULL,
+            finished_at DATETIME NULL,
+            expires_at DATETIME NULL,
+            UNIQUE KEY uq_export_jobs_active (active_key),
+            KEY ix_export_jobs_queue (status, id),
+            KEY ix_export_jobs_expiry (status, expires_at),
+            CONSTRAINT fk_export_jobs_user FOREIGN KEY (requested_by) REFERENCES users (id) ON DELETE SET NULL
+        )
+    """)
@@ -0,0 +1,28 @@
+"""Per-user registration timeline behind the dashboard and calendar feed (timeline.py)."""
+
+
+def upgrade(cur):
+    # Clustered by user and date, so a user's upcoming events are one range scan
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_timeline (
+            user_id INT NOT NULL,
+            event_date DATE NOT NULL,
+            reg_id INT NOT NULL,
+            event_id INT NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            location VARCHAR(255) NULL,
+            status VARCHAR(20) NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, event_date, reg_id),
+            UNIQUE KEY uq_user_timeline_reg (reg_id),
+            KEY ix_user_timeline_event (event_id),
+            CONSTRAINT fk_user_timeline_registration FOREIGN KEY (reg_id) REFERENCES registrations (id)
+                ON DELETE CASCADE
+        )
+    """)
+    cur.execute("""
+        INSERT IGNORE INTO user_timeline (user_id, event_date, reg_id, event_id, title, location, status)
+        SELECT r.user_id, e.date, r.id, r.event_id, e.title, e.location, r.status
+        FROM registrations r
+        JOIN events e ON e.id = r.event_id
+    """)
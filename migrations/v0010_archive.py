@@ -0,0 +1,43 @@
+"""Year-partitioned archive of past events and their registrations (archive.py)."""
+
+
+def upgrade(cur):
+    # Partitioned InnoDB tables can't have foreign keys, so the live tables stay
+    # as they are and finished rows move here. Each table starts with only the
+    # catch-all pmax partition; the archiver splits years off it as it goes
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS events_archive (
+            id INT NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            date DATE NOT NULL,
+            location VARCHAR(255) NOT NULL,
+            description TEXT,
+            capacity INT NULL,
+            image_path VARCHAR(255) NULL,
+            registered_count INT NOT NULL DEFAULT 0,
+            pending_count INT NOT NULL DEFAULT 0,
+            approved_count INT NOT NULL DEFAULT 0,
+            archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (date, id),
+            KEY ix_events_archive_id (id)
+        )
+        PARTITION BY RANGE (YEAR(date)) (PARTITION pmax VALUES LESS THAN MAXVALUE)
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS registrations_archive (
+            id INT NOT NULL,
+            user_id INT NOT NULL,
+            event_id INT NOT NULL,
+            name VARCHAR(100) NULL,
+            email VARCHAR(255) NULL,
+            phone VARCHAR(20) NULL,
+            status VARCHAR(20) NOT NULL,
+            created_at DATETIME NOT NULL,
+            event_date DATE NOT NULL,
+            archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, event_date),
+            KEY ix_registrations_archive_event (event_id, status),
+            KEY ix_registrations_archive_user (user_id)
+        )
+        PARTITION BY RANGE (YEAR(event_date)) (PARTITION pmax VALUES LESS THAN MAXVALUE)
+    """)
@@ -0,0 +1,157 @@
+# outbox.py
+"""Durable outbound email queue.
+
+Views call ``enqueue()`` inside the same transaction as the write that
+triggers the email, so a registration and its confirmation either both
+commit or neither does. ``OutboxWorker`` drains the table in batches,
+reusing one SMTP connection per batch and retrying failures with
+exponential backoff.
+
+Run the worker with ``flask --app app outbox-worker``. To try it locally
+without a real mail server::
+
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=0 flask --app app outbox-worker
+"""
+
+import threading
+
+import MySQLdb.cursors
+
+from extensions import mysql
+
+# How long a claimed batch stays invisible to other workers before it is
+# considered abandoned and picked up again.
+CLAIM_LEASE_SECONDS = 300
+
+
+def enqueue(conn, recipient, subject, body):
+    """Queue an email in the caller's transaction; nothing is sent until commit."""
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO email_outbox (recipient, subject, body)
+        VALUES (%s, %s, %s)
+    """, (recipient, subject, body))
+    cur.close()
+
+
+def enqueue_many(conn, messages):
+    """Queue ``(recipient, subject, body)`` tuples in one round-trip."""
+    if not messages:
+        return
+    cur = conn.cursor()
+    cur.executemany("""
+        INSERT INTO email_outbox (recipient, subject, body)
+        VALUES (%s, %s, %s)
+    """, messages)
+    cur.close()
+
+
+class OutboxWorker:
+    def __init__(self, app, mail):
+        self.app = app
+        self.mail = mail
+        self.batch_size = app.config.get('OUTBOX_BATCH_SIZE', 50)
+        self.poll_interval = app.config.get('OUTBOX_POLL_INTERVAL', 2)
+        self.max_attempts = app.config.get('OUTBOX_MAX_ATTEMPTS', 8)
+        self.backoff_base = app.config.get('OUTBOX_BACKOFF_BASE', 30)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self, workers=None):
+        """Drain the outbox from background threads until ``stop()``."""
+        workers = workers or self.app.config.get('OUTBOX_WORKERS', 2)
+        for i in range(workers):
+            thread = threading.Thread(target=self.run, name=f'outbox-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception as e:
+                self.app.logger.exception("Outbox batch failed: %s", e)
+                sent = 0
+            if not sent:
+                self._stop.wait(self.poll_interval)
+
+    def drain_once(self):
+        """Send one batch of due emails. Returns how many were handled."""
+        # Only the worker sends mail; web processes never import the mail stack
+        from flask_mail import Message
+
+        with self.app.app_context():
+            batch = self._claim()
+            if not batch:
+                return 0
+
+            sent, failed = [], []
+            try:
+                with self.mail.connect() as smtp:
+                    for row in batch:
+                        try:
+                            smtp.send(Message(row['subject'], recipients=[row['recipient']], body=row['body']))
+                            sent.append(row)
+                        except Exception as e:
+                            failed.append((row, e))
+            except Exception as e:
+                # Couldn't even connect: retry everything not already sent
+                done = {row['id'] for row in sent}
+                failed += [(row, e) for row in batch if row['id'] not in done]
+
+            self._record(sent, failed)
+            return len(batch)
+
+    def _claim(self):
+        conn = mysql.connection
+        cur = conn.cursor(MySQLdb.cursors.DictCursor)
+        cur.execute("""
+            SELECT id, recipient, subject, body, attempts
+            FROM email_outbox
+            WHERE status = 'pending' AND next_attempt_at <= NOW()
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (self.batch_size,))
+        batch = cur.fetchall()
+        if batch:
+            ids = [row['id'] for row in batch]
+            placeholders = ', '.join(['%s'] * len(ids))
+            cur.execute(f"""
+                UPDATE email_outbox
+                SET next_attempt_at = NOW() + INTERVAL %s SECOND
+                WHERE id IN ({placeholders})
+            """, (CLAIM_LEASE_SECONDS, *ids))
+        conn.commit()
+        cur.close()
+        return batch
+
+    def _record(self, sent, failed):
+        conn = mysql.connection
+        cur = conn.cursor()
+        if sent:
+            cur.executemany(
+                "UPDATE email_outbox SET status = 'sent', sent_at = NOW(), attempts = attempts + 1 WHERE id = %s",
+                [(row['id'],) for row in sent]
+            )
+        for row, error in failed:
+            attempts = row['attempts'] + 1
+            status = 'failed' if attempts >= self.max_attempts else 'pending'
+            delay = self.backoff_base * 2 ** (attempts - 1)
+            cur.execute("""
+                UPDATE email_outbox
+                SET status = %s, attempts = %s, last_error = %s,
+                    next_attempt_at = NOW() + INTERVAL %s SECOND
+                WHERE id = %s
+            """, (status, attempts, str(error)[:500], delay, row['id']))
+            self.app.logger.warning("Email %s to %s failed (attempt %s): %s",
+                                    row['id'], row['recipient'], attempts, error)
+        conn.commit()
+        cur.close()
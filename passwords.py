@@ -0,0 +1,140 @@
+# passwords.py
+"""Password hashing for signup, login and profile updates.
+
+``PASSWORD_HASH_METHOD`` picks the algorithm for new hashes (``scrypt``,
+``pbkdf2`` or ``bcrypt``) and ``PASSWORD_SCRYPT_N`` /
+``PASSWORD_PBKDF2_ITERATIONS`` / ``PASSWORD_BCRYPT_ROUNDS`` its cost.
+Existing hashes of any supported kind still verify; ``needs_rehash()``
+tells login when a stored hash is out of date so it can be upgraded in place.
+
+Hashing and verification run on a small shared thread pool
+(``PASSWORD_HASH_THREADS``), which caps how many CPU-heavy hashes a worker
+process computes at once so a burst of logins can't starve other requests.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    import bcrypt
+except ImportError:  # pragma: no cover - optional dependency
+    bcrypt = None
+
+DEFAULTS = {
+    'PASSWORD_HASH_METHOD': 'scrypt',
+    'PASSWORD_SCRYPT_N': 2 ** 15,
+    'PASSWORD_PBKDF2_ITERATIONS': 600000,
+    'PASSWORD_BCRYPT_ROUNDS': 12,
+    'PASSWORD_HASH_THREADS': os.cpu_count() or 2,
+}
+
+
+class PasswordHasher:
+    def __init__(self, **settings):
+        self.settings = dict(DEFAULTS, **settings)
+        self._executor = None
+        self._pid = None
+
+    @classmethod
+    def from_object(cls, obj):
+        """A hasher configured like the app, for scripts that run outside it (e.g. ``config``)."""
+        return cls(**{key: getattr(obj, key) for key in DEFAULTS if getattr(obj, key, None) is not None})
+
+    def init_app(self, app):
+        for key in DEFAULTS:
+            if app.config.get(key) is not None:
+                self.settings[key] = app.config[key]
+        self._executor = None
+
+    @property
+    def method(self):
+        return self.settings['PASSWORD_HASH_METHOD']
+
+    def hash(self, password):
+        return self._run(self._hash, password)
+
+    def verify(self, stored, password):
+        """True if ``password`` matches ``stored``; malformed or unknown hashes never match."""
+        if not stored:
+            return False
+        return self._run(self._verify, stored, password)
+
+    def needs_rehash(self, stored):
+        """Whether ``stored`` was made with a different method or cost than configured."""
+        return _describe(stored) != self._target()
+
+    def _target(self):
+        if self.method == 'bcrypt':
+            return ('bcrypt', int(self.settings['PASSWORD_BCRYPT_ROUNDS']))
+        if self.method == 'pbkdf2':
+            return ('pbkdf2:sha256', int(self.settings['PASSWORD_PBKDF2_ITERATIONS']))
+        return ('scrypt', int(self.settings['PASSWORD_SCRYPT_N']))
+
+    def _hash(self, password):
+        if self.method == 'bcrypt':
+            if bcrypt is None:
+                raise RuntimeError("PASSWORD_HASH_METHOD is bcrypt but the bcrypt package is not installed")
+            rounds = int(self.settings['PASSWORD_BCRYPT_ROUNDS'])
+            return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+        if self.method == 'pbkdf2':
+            return generate_password_hash(password, method=f"pbkdf2:sha256:{self.settings['PASSWORD_PBKDF2_ITERATIONS']}")
+        return generate_password_hash(password, method=f"scrypt:{self.settings['PASSWORD_SCRYPT_N']}:8:1")
+
+    def _verify(self, stored, password):
+        if stored.startswith('$2'):
+            if bcrypt is None:
+                return False
+            try:
+                return bcrypt.checkpw(password.encode(), stored.encode())
+            except ValueError:
+                return False
+        try:
+            return check_password_hash(stored, password)
+        except (ValueError, TypeError):
+            # e.g. legacy 'sha256$...' hashes current Werkzeug can't read
+            return False
+
+    def _run(self, fn, *args):
+        if self._executor is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = _executor_class()(max_workers=int(self.settings['PASSWORD_HASH_THREADS']),
+                                               thread_name_prefix='password-hash')
+        return self._executor.submit(fn, *args).result()
+
+
+def _executor_class():
+    # Under the gevent serving mode (async_app.py) the patched ThreadPoolExecutor
+    # runs on greenlets; hashes need real OS threads so the hub keeps serving.
+    if 'gevent' in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor
+    return ThreadPoolExecutor
+
+
+def _describe(stored):
+    """``(method, cost)`` of a stored hash, or None if unrecognised."""
+    if not stored:
+        return None
+    if stored.startswith('$2'):
+        try:
+            return ('bcrypt', int(stored.split('$')[2]))
+        except (IndexError, ValueError):
+            return None
+    method = stored.split('$', 1)[0]
+    parts = method.split(':')
+    try:
+        if parts[0] == 'scrypt':
+            return ('scrypt', int(parts[1]))
+        if parts[0] == 'pbkdf2':
+            return (f"pbkdf2:{parts[1]}", int(parts[2]))
+    except (IndexError, ValueError):
+        return None
+    return None
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,42 @@
+# registration_query.py
+
+from search import registrant_filter
+
+# Every registrations listing joins the same three tables
+REGISTRATIONS_FROM = """
+    FROM registrations
+    JOIN users ON registrations.user_id = users.id
+    JOIN events ON registrations.event_id = events.id
+"""
+
+
+def registration_filters(event_id=None, status=None, search=None, before_id=None, after_id=None):
+    """Build the WHERE clause for the /registrations filters.
+
+    Only active filters produce a predicate, so MySQL can use the index for
+    whichever ones are set instead of evaluating ``(%s IS NULL OR ...)``.
+    ``before_id``/``after_id`` are keyset bounds on ``registrations.id``;
+    ``search`` matches registrants by username or email (see search.py).
+    Returns ``(sql, params)``; ``sql`` is empty when nothing is filtered.
+    """
+    clauses, params = [], []
+    if before_id is not None:
+        clauses.append("registrations.id < %s")
+        params.append(before_id)
+    if after_id is not None:
+        clauses.append("registrations.id > %s")
+        params.append(after_id)
+    if event_id is not None:
+        clauses.append("registrations.event_id = %s")
+        params.append(event_id)
+    if status:
+        clauses.append("registrations.status = %s")
+        params.append(status)
+    if search:
+        clause, search_params = registrant_filter(search)
+        clauses.append(clause)
+        params.extend(search_params)
+
+    if not clauses:
+        return "", []
+    return "WHERE " + " AND ".join(clauses), params
@@ -0,0 +1,125 @@
+# reservations.py
+
+import MySQLdb
+
+import event_stats
+import timeline
+
+# reserve_seat() outcomes
+RESERVED = 'reserved'
+ALREADY_REGISTERED = 'already_registered'
+EVENT_FULL = 'event_full'
+EVENT_NOT_FOUND = 'event_not_found'
+
+# MySQL error codes
+ER_DUP_ENTRY = 1062
+ER_LOCK_DEADLOCK = 1213
+
+DEADLOCK_RETRIES = 3
+
+
+def retry_on_deadlock(conn, fn, *args, **kwargs):
+    """Call ``fn(*args, **kwargs)``, running it again if InnoDB picks it as a deadlock victim.
+
+    ``fn`` must do one transaction's work and nothing that can't be repeated:
+    a deadlock has already rolled the whole transaction back.
+    """
+    for attempt in range(DEADLOCK_RETRIES):
+        try:
+            return fn(*args, **kwargs)
+        except MySQLdb.OperationalError as e:
+            conn.rollback()
+            if e.args[0] != ER_LOCK_DEADLOCK or attempt == DEADLOCK_RETRIES - 1:
+                raise
+
+
+def reserve_seat(conn, user_id, event_id, name=None, email=None, phone=None):
+    """Atomically claim a seat on ``event_id`` for ``user_id``.
+
+    The seat is taken first, with a single conditional UPDATE on the
+    maintained ``registered_count`` counter, so the capacity check is O(1)
+    and two concurrent requests can never both take the last seat. That
+    UPDATE also locks the event row before the registration is inserted:
+    every writer that touches both takes the event row first (see
+    waitlist.py), so registering for the same event serializes on that lock
+    instead of deadlocking. A duplicate then fails on the
+    ``(user_id, event_id)`` unique key and the rollback gives the seat back.
+    The same UPDATE bumps the event's pending counter (see event_stats.py),
+    and the registration is added to the user's timeline (see timeline.py).
+    A deadlock with some other writer is retried a few times.
+
+    On success the transaction is left open so the caller can add related
+    writes before committing; on failure it has already been rolled back.
+    """
+    return retry_on_deadlock(conn, _reserve_seat, conn, user_id, event_id, name, email, phone)
+
+
+def _reserve_seat(conn, user_id, event_id, name, email, phone):
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE events
+            SET registered_count = registered_count + 1, pending_count = pending_count + 1
+            WHERE id = %s AND (capacity IS NULL OR registered_count < capacity)
+        """, (event_id,))
+        if cur.rowcount == 0:
+            # Full or gone; a full event may still hold this user's seat
+            cur.execute("""
+                SELECT EXISTS (SELECT 1 FROM registrations WHERE user_id = %s AND event_id = %s)
+                FROM events WHERE id = %s
+            """, (user_id, event_id, event_id))
+            row = cur.fetchone()
+            conn.rollback()
+            if row is None:
+                return EVENT_NOT_FOUND
+            return ALREADY_REGISTERED if row[0] else EVENT_FULL
+
+        try:
+            cur.execute("""
+                INSERT INTO registrations (user_id, event_id, name, email, phone)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (user_id, event_id, name, email, phone))
+        except MySQLdb.IntegrityError as e:
+            conn.rollback()
+            if e.args[0] == ER_DUP_ENTRY:
+                return ALREADY_REGISTERED
+            raise
+
+        timeline.added(cur, user_id, cur.lastrowid)
+        return RESERVED
+    finally:
+        cur.close()
+
+
+def release_seat(conn, reg_id):
+    """Delete a registration and give its seat back, in the caller's transaction.
+
+    Returns the event id the seat belonged to, or None if the registration
+    no longer exists. Like reserve_seat() it locks the event row before the
+    registration, and a deadlock is retried; the transaction is left open
+    for the caller to commit.
+    """
+    return retry_on_deadlock(conn, _release_seat, conn, reg_id)
+
+
+def _release_seat(conn, reg_id):
+    cur = conn.cursor()
+    try:
+        # A registration never moves to another event, so this needs no lock
+        cur.execute("SELECT event_id FROM registrations WHERE id = %s", (reg_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        event_id = row[0]
+        cur.execute("SELECT id FROM events WHERE id = %s FOR UPDATE", (event_id,))
+        cur.execute("SELECT status FROM registrations WHERE id = %s FOR UPDATE", (reg_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+
+        timeline.removing(cur, [reg_id])
+        cur.execute("DELETE FROM registrations WHERE id = %s", (reg_id,))
+        event_stats.removed(cur, event_id, row[0])
+        return event_id
+    finally:
+        cur.close()
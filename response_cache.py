@@ -0,0 +1,85 @@
+# response_cache.py
+"""Rendered-fragment caching and ETag revalidation for the event pages.
+
+Fragments (the home page card grid, the admin event list) are rendered once
+per auth state and stored in the event catalog cache, so they share its TTL
+and are dropped whenever an event is written. Each fragment carries a digest
+of its rendered HTML. Page ETags are built from those digests rather than a
+per-process counter, so every worker computes the same ETag for the same
+content and a revalidation can be answered by any of them.
+"""
+
+import hashlib
+import os
+from collections import namedtuple
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from markupsafe import Markup
+
+from event_cache import event_catalog
+
+Fragment = namedtuple('Fragment', 'html digest extra')
+
+_template_salt = None
+
+
+def auth_state():
+    """Which variant of a shared fragment the current user sees."""
+    if not current_user.is_authenticated:
+        return 'anonymous'
+    return 'admin' if current_user.is_admin else 'user'
+
+
+def cached_fragment(key, build, cache=event_catalog):
+    """Return a ``Fragment`` for ``key`` cached in ``cache``; ``build()`` returns ``(html, extra)``.
+
+    ``extra`` is anything else the page derives from the same data (e.g. the
+    next-page cursor); it is folded into the digest.
+    """
+    def load():
+        html, extra = build()
+        digest = hashlib.sha1(f"{html}|{extra!r}".encode()).hexdigest()
+        return Fragment(Markup(html), digest, extra)
+
+    return cache.read_through(('fragment',) + tuple(key), load)
+
+
+def content_digest(value):
+    return hashlib.sha1(repr(value).encode()).hexdigest()
+
+
+def conditional_page(parts, render):
+    """Answer with 304 if the client already has this page, else ``render()`` it.
+
+    ``parts`` must capture everything the page depends on. Pages with flash
+    messages waiting are always rendered and never tagged.
+    """
+    if request.method != 'GET' or session.get('_flashes'):
+        return render()
+
+    etag = hashlib.sha1('|'.join(map(str, (_templates_version(), *parts))).encode()).hexdigest()
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = make_response(render())
+
+    response.set_etag(etag)
+    # Authenticated pages carry the user's name in the navbar
+    response.headers['Cache-Control'] = 'private, no-cache' if current_user.is_authenticated else 'public, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def _templates_version():
+    """Digest of the template sources, so a deploy that changes markup changes every ETag."""
+    global _template_salt
+    if _template_salt is None:
+        digest = hashlib.sha1()
+        folder = os.path.join(current_app.root_path, current_app.template_folder)
+        for dirpath, _, filenames in sorted(os.walk(folder)):
+            for filename in sorted(filenames):
+                with open(os.path.join(dirpath, filename), 'rb') as f:
+                    digest.update(f.read())
+        _template_salt = digest.hexdigest()
+    return _template_salt
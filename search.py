@@ -0,0 +1,205 @@
+# search.py
+"""Event and registrant search.
+
+Full searches go to MySQL FULLTEXT indexes (migration v0006) in boolean
+mode, where every word of the query must match as a word prefix. Words
+shorter than InnoDB's minimum token size never make it into the index, so
+a query made only of such words falls back to an indexed ``LIKE 'term%'``.
+
+Result pages are cached in ``results_cache``, an LRU of their own, so a
+stream of one-off queries can't evict the home page catalog.
+
+Autocomplete is answered from ``PrefixIndex``, a sorted in-process list of
+word prefixes over the newest ``SEARCH_INDEX_MAX_ITEMS`` rows. Write paths
+update it directly in the worker that made the change
+(``events_index.put()`` etc.). Every worker rebuilds its copy from the
+database in the background, on first use and then every
+``SEARCH_INDEX_TTL`` seconds. Requests never wait for a build; until the
+first one finishes, suggestions are empty.
+"""
+
+import bisect
+import re
+import threading
+import time
+
+import MySQLdb.cursors
+from flask import current_app
+
+from event_cache import CATALOG_COLUMNS, ReadThroughCache, event_catalog
+from extensions import mysql
+
+# innodb_ft_min_token_size default; shorter words aren't in the index
+FT_MIN_TOKEN_SIZE = 3
+# Ranked results are paged by offset, so don't let that grow unbounded
+MAX_SEARCH_PAGE = 50
+# Distinct (query, page) results and fragments kept per process
+MAX_CACHED_SEARCHES = 512
+
+WORD = re.compile(r'\w+', re.UNICODE)
+
+EVENT_SEARCH_QUERY = f"""
+    SELECT {CATALOG_COLUMNS},
+           MATCH(title, description, location) AGAINST (%s IN BOOLEAN MODE) AS score
+    FROM events
+    WHERE MATCH(title, description, location) AGAINST (%s IN BOOLEAN MODE)
+    ORDER BY score DESC, date ASC, id ASC
+    LIMIT %s OFFSET %s
+"""
+EVENT_PREFIX_QUERY = f"""
+    SELECT {CATALOG_COLUMNS}, 0 AS score FROM events
+    WHERE title LIKE %s
+    ORDER BY date ASC, id ASC
+    LIMIT %s OFFSET %s
+"""
+MATCHING_USERS = "SELECT id FROM users WHERE MATCH(username, email) AGAINST (%s IN BOOLEAN MODE)"
+
+
+def words(text):
+    return WORD.findall((text or '').lower())
+
+
+def boolean_query(term):
+    """``+word*`` for each indexable word of ``term``, or '' if there are none."""
+    return ' '.join(f'+{word}*' for word in words(term) if len(word) >= FT_MIN_TOKEN_SIZE)
+
+
+def like_prefix(term):
+    escaped = term.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{escaped}%"
+
+
+def registrant_filter(term):
+    """``(clause, params)`` restricting registrations to users matching ``term``."""
+    match = boolean_query(term)
+    if match:
+        return f"registrations.user_id IN ({MATCHING_USERS})", [match]
+    return "users.username LIKE %s", [like_prefix(term)]
+
+
+def search_events(term, page=1, per_page=None):
+    """One page of events matching ``term``, best match first. Returns ``(events, has_more)``."""
+    per_page = per_page or current_app.config.get('EVENTS_PER_PAGE', 12)
+    page = max(1, min(page, MAX_SEARCH_PAGE))
+    # Key and query on the same normalized term, so a cached page is always the one its key names
+    term = ' '.join(words(term))
+    return results_cache.read_through(results_key(term, page, per_page), lambda: _load_events(term, page, per_page))
+
+
+def results_key(*parts):
+    """A ``results_cache`` key; it changes whenever this worker invalidates the event catalog."""
+    return ('search', event_catalog.generation, *parts)
+
+
+def _load_events(term, page, per_page):
+    offset = (page - 1) * per_page
+    match = boolean_query(term)
+    cur = mysql.read_connection.cursor(MySQLdb.cursors.DictCursor)
+    if match:
+        cur.execute(EVENT_SEARCH_QUERY, (match, match, per_page + 1, offset))
+    else:
+        cur.execute(EVENT_PREFIX_QUERY, (like_prefix(term), per_page + 1, offset))
+    rows = cur.fetchall()
+    cur.close()
+    return tuple(rows[:per_page]), len(rows) > per_page
+
+
+class PrefixIndex:
+    """Sorted ``(word, id)`` pairs for prefix lookups, plus each id's label."""
+
+    def __init__(self, query):
+        self.query = query  # takes the row limit as its one parameter
+        self._lock = threading.Lock()
+        self._keys = []
+        self._items = {}
+        self._built_at = None
+        self._rebuilding = False
+
+    def suggest(self, prefix, limit=10):
+        """Up to ``limit`` ``{'id', 'label'}`` whose text has a word starting with ``prefix``."""
+        prefix = ' '.join(words(prefix))
+        if not prefix:
+            return []
+        self._ensure_fresh()
+        # Multi-word input: complete on the last word, require the others
+        *required, last = prefix.split(' ')
+        found = []
+        with self._lock:
+            i = bisect.bisect_left(self._keys, (last,))
+            seen = set()
+            while i < len(self._keys) and self._keys[i][0].startswith(last) and len(found) < limit:
+                item_id = self._keys[i][1]
+                i += 1
+                if item_id in seen:
+                    continue
+                seen.add(item_id)
+                label, text_words = self._items[item_id]
+                if all(any(w.startswith(r) for w in text_words) for r in required):
+                    found.append({'id': item_id, 'label': label})
+        return found
+
+    def put(self, item_id, label, *text):
+        """Add or replace ``item_id``; its words come from ``label`` and ``text``."""
+        with self._lock:
+            self._remove(item_id)
+            text_words = sorted(set(words(' '.join((label, *[t or '' for t in text])))))
+            self._items[item_id] = (label, text_words)
+            for word in text_words:
+                bisect.insort(self._keys, (word, item_id))
+
+    def discard(self, item_id):
+        with self._lock:
+            self._remove(item_id)
+
+    def reset(self):
+        """Forget everything; the next lookup rebuilds from the database."""
+        with self._lock:
+            self._keys, self._items, self._built_at = [], {}, None
+
+    def _remove(self, item_id):
+        old = self._items.pop(item_id, None)
+        if old is None:
+            return
+        for word in old[1]:
+            i = bisect.bisect_left(self._keys, (word, item_id))
+            if i < len(self._keys) and self._keys[i] == (word, item_id):
+                del self._keys[i]
+
+    def _ensure_fresh(self):
+        """Start a background rebuild if the index is missing or older than ``SEARCH_INDEX_TTL``."""
+        ttl = current_app.config.get('SEARCH_INDEX_TTL', 300)
+        with self._lock:
+            if self._rebuilding or (self._built_at is not None and time.monotonic() - self._built_at <= ttl):
+                return
+            self._rebuilding = True
+        app = current_app._get_current_object()
+        threading.Thread(target=self._rebuild_in_context, args=(app,), daemon=True).start()
+
+    def _rebuild_in_context(self, app):
+        try:
+            with app.app_context():
+                self._rebuild()
+        except Exception as e:
+            app.logger.warning("Search index rebuild failed: %s", e)
+            with self._lock:
+                self._rebuilding = False
+
+    def _rebuild(self):
+        cur = mysql.read_connection.cursor()
+        cur.execute(self.query, (current_app.config.get('SEARCH_INDEX_MAX_ITEMS', 50000),))
+        items, keys = {}, []
+        for item_id, label, *text in cur.fetchall():
+            text_words = sorted(set(words(' '.join((label, *[t or '' for t in text])))))
+            items[item_id] = (label, text_words)
+            keys.extend((word, item_id) for word in text_words)
+        cur.close()
+        keys.sort()
+        with self._lock:
+            self._keys, self._items = keys, items
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+
+
+events_index = PrefixIndex("SELECT id, title, location FROM events ORDER BY date DESC, id DESC LIMIT %s")
+users_index = PrefixIndex("SELECT id, username FROM users ORDER BY id DESC LIMIT %s")
+results_cache = ReadThroughCache(MAX_CACHED_SEARCHES)
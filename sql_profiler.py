@@ -0,0 +1,231 @@
+# sql_profiler.py
+"""Per-request SQL instrumentation.
+
+When ``SQL_PROFILER_ENABLED`` is set, every cursor handed out by
+``mysql.connection`` / ``mysql.read_connection`` records each statement's
+fingerprint, duration, row count and call site. Each request then gets:
+
+* a ``Server-Timing: db;dur=...`` header and a debug log line with its totals,
+* a warning when one fingerprint runs ``SQL_N_PLUS_ONE_THRESHOLD`` times or
+  more (a likely N+1), or identical SQL and parameters run twice,
+* a warning for any statement slower than ``SQL_SLOW_QUERY_MS``.
+
+Aggregates are served to admins at ``/admin/sql-stats`` and to Prometheus
+at ``/metrics``. When disabled, the only cost is one attribute check per
+``cursor()`` call.
+"""
+
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+
+import metrics
+
+# Distinct fingerprints / call sites remembered before the oldest are dropped
+MAX_FINGERPRINTS = 500
+MAX_CALL_SITES = 5
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_WHITESPACE = re.compile(r"\s+")
+
+_SKIP_FILES = (os.path.abspath(__file__), os.sep + 'MySQLdb' + os.sep, os.sep + 'pymysql' + os.sep)
+
+
+def fingerprint(sql):
+    """Normalize SQL so statements differing only in literals group together."""
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (?+)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint_id(fp):
+    return hashlib.sha1(fp.encode()).hexdigest()[:12]
+
+
+def _call_site():
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not any(skip in filename for skip in _SKIP_FILES):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return '?'
+
+
+class ProfilingCursor:
+    """Thin wrapper timing ``execute``/``executemany`` on a real cursor."""
+
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            self._profiler.record(query, args, time.perf_counter() - started, self._cursor.rowcount)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            self._profiler.record(query, None, time.perf_counter() - started, self._cursor.rowcount)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+class ProfiledCursorMixin:
+    """Mix into a MySQLdb Connection subclass to hand out profiling cursors."""
+
+    def cursor(self, cursorclass=None):
+        cur = super().cursor(cursorclass)
+        if profiler.enabled:
+            return ProfilingCursor(cur, profiler)
+        return cur
+
+
+class SqlProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = 200
+        self.n_plus_one = 5
+        self.logger = None
+        self._lock = threading.Lock()
+        self._reset_aggregates()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_PROFILER_ENABLED', False)
+        self.slow_ms = app.config.get('SQL_SLOW_QUERY_MS', 200)
+        self.n_plus_one = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)
+        self.logger = app.logger
+        if self.enabled:
+            app.after_request(self._summarize)
+
+    def _reset_aggregates(self):
+        self.queries = {}  # fingerprint -> stats
+        self.endpoints = {}  # endpoint -> stats
+        self.slow_queries = 0
+
+    def reset(self):
+        with self._lock:
+            self._reset_aggregates()
+
+    def record(self, sql, args, seconds, rows):
+        if isinstance(sql, bytes):
+            sql = sql.decode('utf-8', 'replace')
+        fp = fingerprint(sql)
+        site = _call_site()
+
+        with self._lock:
+            stats = self.queries.get(fp)
+            if stats is None:
+                if len(self.queries) >= MAX_FINGERPRINTS:
+                    self.queries.pop(next(iter(self.queries)))
+                stats = self.queries[fp] = {'id': fingerprint_id(fp), 'count': 0, 'seconds': 0.0,
+                                            'max_seconds': 0.0, 'rows': 0, 'call_sites': []}
+            stats['count'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['rows'] += max(rows or 0, 0)
+            if site not in stats['call_sites'] and len(stats['call_sites']) < MAX_CALL_SITES:
+                stats['call_sites'].append(site)
+            if seconds * 1000 >= self.slow_ms:
+                self.slow_queries += 1
+
+        if seconds * 1000 >= self.slow_ms and self.logger:
+            self.logger.warning("Slow query (%.1f ms, %s rows) at %s: %s", seconds * 1000, rows, site, fp)
+
+        if has_request_context():
+            log = g.setdefault('_sql_log', [])
+            log.append((fp, repr((sql, args)), seconds))
+
+    def _summarize(self, response):
+        log = g.pop('_sql_log', None)
+        if not log:
+            return response
+
+        total = sum(seconds for _, _, seconds in log)
+        per_fp = Counter(fp for fp, _, _ in log)
+        exact = Counter(key for _, key, _ in log)
+        n_plus_one = [fp for fp, count in per_fp.items() if count >= self.n_plus_one]
+        duplicates = sum(count - 1 for count in exact.values() if count > 1)
+
+        endpoint = request.endpoint or request.path
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, {'requests': 0, 'queries': 0, 'seconds': 0.0,
+                                                         'n_plus_one': 0, 'duplicates': 0})
+            stats['requests'] += 1
+            stats['queries'] += len(log)
+            stats['seconds'] += total
+            stats['n_plus_one'] += bool(n_plus_one)
+            stats['duplicates'] += duplicates
+
+        self.logger.debug("%s %s: %d queries, %.1f ms in SQL", request.method, request.path,
+                          len(log), total * 1000)
+        for fp in n_plus_one:
+            self.logger.warning("Possible N+1 in %s: %d x %s", endpoint, per_fp[fp], fp)
+        if duplicates:
+            self.logger.warning("%s ran %d duplicate queries", endpoint, duplicates)
+
+        response.headers.add('Server-Timing', f'db;dur={total * 1000:.1f};desc="{len(log)} queries"')
+        return response
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'slow_query_ms': self.slow_ms,
+                'slow_queries': self.slow_queries,
+                'endpoints': {name: dict(stats) for name, stats in self.endpoints.items()},
+                'queries': sorted(
+                    ({'fingerprint': fp, **stats, 'call_sites': list(stats['call_sites'])}
+                     for fp, stats in self.queries.items()),
+                    key=lambda q: q['seconds'], reverse=True),
+            }
+
+    def collect(self):
+        with self._lock:
+            queries = list(self.queries.values())
+            endpoints = list(self.endpoints.items())
+            slow = self.slow_queries
+        return [
+            ('eventease_sql_queries_total', 'counter', 'Statements executed, by fingerprint id',
+             [({'query': q['id']}, q['count']) for q in queries]),
+            ('eventease_sql_seconds_total', 'counter', 'Time spent in statements, by fingerprint id',
+             [({'query': q['id']}, round(q['seconds'], 6)) for q in queries]),
+            ('eventease_sql_slow_queries_total', 'counter', 'Statements slower than SQL_SLOW_QUERY_MS',
+             [({}, slow)]),
+            ('eventease_requests_profiled_total', 'counter', 'Requests that ran SQL, by endpoint',
+             [({'endpoint': name}, s['requests']) for name, s in endpoints]),
+            ('eventease_request_queries_total', 'counter', 'Statements run by requests, by endpoint',
+             [({'endpoint': name}, s['queries']) for name, s in endpoints]),
+            ('eventease_request_n_plus_one_total', 'counter', 'Requests flagged as likely N+1, by endpoint',
+             [({'endpoint': name}, s['n_plus_one']) for name, s in endpoints]),
+        ]
+
+
+profiler = SqlProfiler()
+metrics.register(profiler.collect)
@@ -0,0 +1,26 @@
+# test_app_factory.py
+import pytest
+
+pytest.importorskip('MySQLdb')
+
+from app import create_app  # noqa: E402
+
+
+def metric_families(text):
+    return [line.split()[2] for line in text.splitlines() if line.startswith('# HELP ')]
+
+
+def test_second_app_does_not_duplicate_metric_families():
+    first, second = create_app(), create_app()
+    for app in (first, second):
+        families = metric_families(app.test_client().get('/metrics').get_data(as_text=True))
+        assert 'eventease_db_pool_size' in families
+        assert 'eventease_admission_inflight' in families
+        assert len(families) == len(set(families))
+
+
+def test_each_app_keeps_its_own_pools_and_admission_state():
+    first, second = create_app(), create_app()
+    assert first.extensions['mysql'] is not second.extensions['mysql']
+    assert first.extensions['mysql'].pool is not second.extensions['mysql'].pool
+    assert first.extensions['admission'] is not second.extensions['admission']
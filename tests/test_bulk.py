@@ -0,0 +1,29 @@
+# test_bulk.py
+from datetime import date
+
+import pytest
+
+pytest.importorskip('MySQLdb')
+
+from bulk import validate_event  # noqa: E402
+
+EVENT = {'title': 'Jazz night', 'date': '2030-05-01', 'location': 'Main hall', 'description': ''}
+
+
+def test_zero_capacity_is_kept():
+    values, error = validate_event(dict(EVENT, capacity=0))
+    assert error is None
+    assert values == ('Jazz night', date(2030, 5, 1), 'Main hall', '', 0)
+
+
+@pytest.mark.parametrize('capacity', [None, ''])
+def test_missing_capacity_is_unlimited(capacity):
+    values, error = validate_event(dict(EVENT, capacity=capacity))
+    assert error is None
+    assert values[-1] is None
+
+
+def test_false_capacity_is_rejected():
+    values, error = validate_event(dict(EVENT, capacity=False))
+    assert values is None
+    assert error == "bad capacity 'False'"
@@ -0,0 +1,227 @@
+# timeline.py
+"""Per-user timeline of registrations, and the iCalendar feed built from it.
+
+``user_timeline`` (migration v0009) holds one row per registration with the
+event fields the dashboard and the feed show, clustered on
+``(user_id, event_date, reg_id)``: a user's upcoming events are one range
+scan of their own rows, already in date order, with no join. Rows are
+written in the same transaction as the change they mirror: ``added()`` when
+a seat is taken, ``status_changed()`` on approval, ``event_changed()`` when
+an admin edits an event. Deleting a registration (or its event) removes the
+row through the foreign key; ``removing()`` beforehand just lets this
+process's feed cache know.
+
+Every user can subscribe to ``/calendar/<token>.ics``. The token is the
+user id signed with ``SECRET_KEY``, so checking it needs no lookup. Each
+user's feed ETag is remembered for ``TIMELINE_FEED_TTL`` seconds, and a
+poll that still matches it gets a 304 without touching the database.
+Writes made by this process forget the affected users' ETags right away;
+other workers catch up within the TTL. There is no Last-Modified: the
+newest ``updated_at`` in the feed goes backwards when a registration is
+deleted or an event leaves the window, and a client holding the later date
+would never see the change.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import MySQLdb.cursors
+from flask import Response, current_app, request
+from itsdangerous import BadSignature, URLSafeSerializer
+from werkzeug.http import is_resource_modified
+
+from extensions import mysql
+
+UPCOMING_QUERY = """
+    SELECT reg_id, event_id, title, event_date AS date, location, status,
+           UNIX_TIMESTAMP(updated_at) AS updated_at
+    FROM user_timeline
+    WHERE user_id = %s AND event_date >= CURDATE() - INTERVAL %s DAY
+    ORDER BY event_date ASC, reg_id ASC
+"""
+
+TOKEN_SALT = 'calendar-feed'
+
+
+def added(cur, user_id, reg_id):
+    """Mirror a new registration into its user's timeline."""
+    cur.execute("""
+        INSERT INTO user_timeline (user_id, event_date, reg_id, event_id, title, location, status)
+        SELECT r.user_id, e.date, r.id, r.event_id, e.title, e.location, r.status
+        FROM registrations r
+        JOIN events e ON e.id = r.event_id
+        WHERE r.id = %s
+    """, (reg_id,))
+    feed_validators.invalidate(user_id)
+
+
+def status_changed(cur, reg_ids, status):
+    """Set the status shown for ``reg_ids``."""
+    if not reg_ids:
+        return
+    user_ids = _users_of(cur, reg_ids)
+    cur.execute(f"UPDATE user_timeline SET status = %s WHERE reg_id IN ({_in_list(reg_ids)})", (status, *reg_ids))
+    for user_id in user_ids:
+        feed_validators.invalidate(user_id)
+
+
+def removing(cur, reg_ids):
+    """Call before deleting ``reg_ids``; their rows go with them through the foreign key."""
+    if reg_ids:
+        for user_id in _users_of(cur, reg_ids):
+            feed_validators.invalidate(user_id)
+
+
+def _users_of(cur, reg_ids):
+    cur.execute(f"SELECT DISTINCT user_id FROM user_timeline WHERE reg_id IN ({_in_list(reg_ids)})", list(reg_ids))
+    # Works on plain and DictCursor cursors alike
+    return [row['user_id'] if isinstance(row, dict) else row[0] for row in cur.fetchall()]
+
+
+def _in_list(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def event_changed(cur, event_id, title, date, location):
+    """Copy an edited event's title, date and location into every timeline that has it."""
+    cur.execute("""
+        UPDATE user_timeline SET title = %s, event_date = %s, location = %s
+        WHERE event_id = %s
+    """, (title, date, location, event_id))
+    # Possibly thousands of users; edits are rare, so forget everyone
+    feed_validators.clear()
+
+
+def upcoming(conn, user_id, past_days=0):
+    """The user's registrations from ``past_days`` ago onwards, soonest first."""
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute(UPCOMING_QUERY, (user_id, past_days))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def feed_token(user_id):
+    return _serializer().dumps(int(user_id))
+
+
+def user_for_token(token):
+    """The user id a feed token was issued for, or None if it isn't valid."""
+    try:
+        return int(_serializer().loads(token))
+    except (BadSignature, TypeError, ValueError):
+        return None
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.secret_key, salt=TOKEN_SALT)
+
+
+def feed_response(user_id):
+    """The user's ``.ics`` feed, or a 304 if the client's copy is current."""
+    etag = feed_validators.get(user_id)
+    if etag and not is_resource_modified(request.environ, etag=etag):
+        return _with_etag(Response(status=304), etag)
+
+    rows = upcoming(mysql.read_connection, user_id, current_app.config.get('TIMELINE_FEED_PAST_DAYS', 30))
+    body = render_ics(rows)
+    etag = hashlib.sha1(body.encode()).hexdigest()
+    feed_validators.put(user_id, etag)
+
+    response = _with_etag(Response(body, mimetype='text/calendar'), etag)
+    response.headers['Content-Disposition'] = 'inline; filename=eventease.ics'
+    return response.make_conditional(request)
+
+
+def _with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def render_ics(rows):
+    """An iCalendar document with one all-day event per registration."""
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//EventEase//Registrations//EN',
+             'CALSCALE:GREGORIAN', 'METHOD:PUBLISH', 'X-WR-CALNAME:EventEase']
+    for row in rows:
+        lines += [
+            'BEGIN:VEVENT',
+            f"UID:registration-{row['reg_id']}@eventease",
+            # From the row, not the clock, so an unchanged feed renders byte for byte the same
+            f"DTSTAMP:{_utc(row['updated_at']):%Y%m%dT%H%M%SZ}",
+            f"DTSTART;VALUE=DATE:{row['date']:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{row['date'] + timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{_escape(row['title'])}",
+        ]
+        if row['location']:
+            lines.append(f"LOCATION:{_escape(row['location'])}")
+        lines += [
+            f"STATUS:{'CONFIRMED' if (row['status'] or '').lower() == 'approved' else 'TENTATIVE'}",
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(int(timestamp), timezone.utc)
+
+
+def _escape(text):
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    # Content lines are at most 75 octets; continuations start with a space
+    parts, current = [], ''
+    for char in line:
+        if len((current + char).encode('utf-8')) > 75:
+            parts.append(current)
+            current = ' '
+        current += char
+    parts.append(current)
+    return '\r\n'.join(parts)
+
+
+class FeedValidators:
+    """Bounded LRU of each user's last feed ETag, with a TTL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is None:
+                return None
+            expires_at, etag = cached
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return etag
+
+    def put(self, user_id, etag):
+        ttl = current_app.config.get('TIMELINE_FEED_TTL', 300)
+        maxsize = current_app.config.get('TIMELINE_FEED_CACHE_SIZE', 10000)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, etag)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+feed_validators = FeedValidators()
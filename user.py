@@ -3,6 +3,9 @@
 from flask_login import UserMixin
 
 class User(UserMixin):
+    # Kept small: instances live in the user_cache LRU between requests
+    __slots__ = ('id', 'username', 'email', 'role')
+
     def __init__(self, id, username, email, role='user'):
         self.id = id
         self.username = username
@@ -0,0 +1,78 @@
+# user_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, session
+
+from user import User
+
+SESSION_KEY = 'identity'
+
+
+class UserCache:
+    """Bounded LRU of ``User`` objects keyed by id, with a TTL.
+
+    Lets ``load_user`` skip the users table on most authenticated requests.
+    Call ``invalidate()`` whenever a user row changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            cached = self._users.get(key)
+            if cached is None:
+                return None
+            expires_at, user = cached
+            if expires_at < time.monotonic():
+                del self._users[key]
+                return None
+            self._users.move_to_end(key)
+            return user
+
+    def put(self, user):
+        ttl = current_app.config.get('USER_CACHE_TTL', 300)
+        maxsize = current_app.config.get('USER_CACHE_SIZE', 10000)
+        key = user.get_id()
+        with self._lock:
+            self._users[key] = (time.monotonic() + ttl, user)
+            self._users.move_to_end(key)
+            while len(self._users) > maxsize:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+def remember_identity(user_id, username, email, role):
+    """Store the user's identity in the (signed) session cookie, when enabled."""
+    if current_app.config.get('USER_SESSION_IDENTITY'):
+        session[SESSION_KEY] = {'id': str(user_id), 'username': username, 'email': email, 'role': role}
+
+
+def identity_from_session(user_id):
+    """Rebuild a ``User`` from the session cookie, or None if it isn't there."""
+    if not current_app.config.get('USER_SESSION_IDENTITY'):
+        return None
+    identity = session.get(SESSION_KEY)
+    if not identity or identity.get('id') != str(user_id):
+        return None
+    return User(id=int(identity['id']), username=identity['username'],
+                email=identity['email'], role=identity['role'])
+
+
+def forget_identity():
+    session.pop(SESSION_KEY, None)
@@ -0,0 +1,137 @@
+# waitlist.py
+"""Per-event FIFO waitlist for full events.
+
+``join()`` is a single INSERT; the queue order is ``(event_id, id)``.
+``promote()`` fills free seats from the head of an event's queue, one
+transaction per batch. Each batch locks the event row first, which
+serializes it with other promoters and with ``reserve_seat()`` on the same
+event, so a freed seat is handed out exactly once however many deletes race.
+Both paths lock the event row before inserting any registration; keep that
+order in anything else that writes both, or the two can deadlock. A batch
+chosen as a deadlock victim anyway is retried like ``reserve_seat()``.
+Promoted users get a pending registration and an email through the outbox.
+
+Seats are promoted into right after the write that frees them
+(``delete_registration``, bulk delete, a capacity raise in ``edit_event``).
+``flask --app app promote-waitlist`` sweeps every event, for seats freed
+by a process that died before it could promote.
+"""
+
+import MySQLdb.cursors
+
+import event_stats
+import outbox
+import timeline
+from reservations import retry_on_deadlock
+
+# join() outcomes
+JOINED = 'joined'
+ALREADY_WAITLISTED = 'already_waitlisted'
+PROMOTED = 'promoted'
+
+HEAD_QUERY = """
+    SELECT w.id, w.user_id, w.name, w.email, w.phone, u.username, u.email AS account_email
+    FROM waitlist w
+    JOIN users u ON u.id = w.user_id
+    WHERE w.event_id = %s
+    ORDER BY w.id
+    LIMIT %s
+    FOR UPDATE OF w SKIP LOCKED
+"""
+
+
+def join(conn, user_id, event_id, name=None, email=None, phone=None):
+    """Queue ``user_id`` for a seat on ``event_id`` and commit.
+
+    Returns ``JOINED``, ``ALREADY_WAITLISTED``, or ``PROMOTED`` when a seat
+    freed up in the meantime and went straight to this user.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT IGNORE INTO waitlist (event_id, user_id, name, email, phone)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (event_id, user_id, name, email, phone))
+    joined = cur.rowcount == 1
+    cur.close()
+    conn.commit()
+
+    # A seat released between our full check and this commit found an empty queue
+    if user_id in promote(conn, event_id):
+        return PROMOTED
+    return JOINED if joined else ALREADY_WAITLISTED
+
+
+def promote(conn, event_id, batch_size=100):
+    """Move waiters into free seats on ``event_id``, oldest first; returns the promoted user ids."""
+    promoted = []
+    while True:
+        handled, user_ids = retry_on_deadlock(conn, _promote_batch, conn, event_id, batch_size)
+        promoted += user_ids
+        if not handled:
+            return promoted
+
+
+def promote_all(conn, batch_size=100):
+    """``promote()`` every event with free seats and a non-empty queue; returns how many were promoted."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT e.id FROM events e
+        WHERE (e.capacity IS NULL OR e.registered_count < e.capacity)
+          AND EXISTS (SELECT 1 FROM waitlist w WHERE w.event_id = e.id)
+    """)
+    event_ids = [row[0] for row in cur.fetchall()]
+    cur.close()
+    conn.commit()
+    return sum(len(promote(conn, event_id, batch_size)) for event_id in event_ids)
+
+
+def _promote_batch(conn, event_id, batch_size):
+    """One transaction: returns ``(waiters taken off the queue, promoted user ids)``.
+
+    Locks the event row, then the waiters, then inserts their registrations:
+    the same event-then-registration order as ``reserve_seat()``.
+    """
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    cur.execute("SELECT title, capacity, registered_count FROM events WHERE id = %s FOR UPDATE", (event_id,))
+    event = cur.fetchone()
+    free = 0
+    if event is not None:
+        free = batch_size if event['capacity'] is None else min(batch_size, event['capacity'] - event['registered_count'])
+    if free <= 0:
+        conn.rollback()
+        cur.close()
+        return 0, []
+
+    cur.execute(HEAD_QUERY, (event_id, free))
+    waiters = cur.fetchall()
+    if not waiters:
+        conn.rollback()
+        cur.close()
+        return 0, []
+
+    promoted, messages = [], []
+    for waiter in waiters:
+        # Someone who got a seat directly while queued just leaves the queue
+        cur.execute("""
+            INSERT IGNORE INTO registrations (user_id, event_id, name, email, phone)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (waiter['user_id'], event_id, waiter['name'], waiter['email'], waiter['phone']))
+        if cur.rowcount == 1:
+            timeline.added(cur, waiter['user_id'], cur.lastrowid)
+            promoted.append(waiter['user_id'])
+            messages.append((
+                waiter['email'] or waiter['account_email'],
+                'A seat opened up for you',
+                f"Hello {waiter['name'] or waiter['username']},\n\n"
+                f"A seat freed up for '{event['title']}' and you have been registered from the waitlist.\n\n"
+                "Best regards,\nEventEase Team",
+            ))
+
+    ids = [waiter['id'] for waiter in waiters]
+    cur.execute(f"DELETE FROM waitlist WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+    if promoted:
+        event_stats.added(cur, event_id, len(promoted))
+        outbox.enqueue_many(conn, messages)
+    conn.commit()
+    cur.close()
+    return len(waiters), promoted